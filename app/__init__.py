@@ -1,17 +1,45 @@
 # Inicjalizacja aplikacji Flask oraz innych modułów
-# Tutaj tworzona jest instancja aplikacji wraz z konfiguracją
+# Rozszerzenia tworzone są przy imporcie pakietu, a aplikację wraz z konfiguracją buduje `create_app`
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from app.replica import RoutingSession
 
 
-app = Flask(__name__)
-CORS(app)
-app.config.from_object('config.Config')
-db = SQLAlchemy(app)
-jwt = JWTManager(app)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+jwt = JWTManager()
 
-migrate = Migrate(app, db)
-from app import routes, models
+# Nagłówki odpowiedzi dostępne dla skryptów frontendu
+CORS_EXPOSE_HEADERS = ['X-Next-Cursor', 'ETag', 'X-DB-Query-Count', 'X-DB-Time-Ms', 'X-DB-Duplicate-Queries']
+
+
+# Utworzenie aplikacji z konfiguracją `config.Config`, opcjonalnie nadpisaną słownikiem `config`.
+# Moduły obsługujące żądania importowane są tutaj, więc w serwerze z wczytaniem aplikacji przed utworzeniem
+# procesów roboczych (np. gunicorn --preload) są współdzielone między nimi; polecenia CLI ładowane są leniwie.
+def create_app(config=None):
+    app = Flask(__name__)
+    CORS(app, expose_headers=CORS_EXPOSE_HEADERS)
+    app.config.from_object('config.Config')
+    if config:
+        app.config.update(config)
+    db.init_app(app)
+    jwt.init_app(app)
+
+    from app.routes import BLUEPRINTS
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
+
+    from app.cache import response_cache
+    response_cache.configure(app.config)
+    from app.versioning import availability
+    availability.configure(app.config)
+    from app.passwords import password_hasher
+    password_hasher.configure(app.config)
+    from app.profiler import init_profiler
+    init_profiler(app)
+
+    # Polecenia CLI
+    from app.cli import LazyCommands
+    app.cli = LazyCommands(app, name=app.name)
+    return app
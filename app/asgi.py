@@ -0,0 +1,200 @@
+# Asynchroniczna ścieżka odczytu (ASGI) dla list o największym ruchu: katalogu, czytelników, wypożyczeń
+# i historii wypożyczeń. Endpointy GET obsługiwane są przez Starlette i asynchroniczny SQLAlchemy (asyncpg),
+# więc oczekiwanie na bazę danych nie zajmuje wątku, a liczba równoległych żądań nie jest ograniczona liczbą
+# procesów. Zapytania, stronicowanie, filtry, ETagi, pamięć podręczna i serializacja są wspólne z endpointami
+# Flaska, więc odpowiedzi mają tę samą treść. Pozostałe żądania (zapisy, odpowiedzi strumieniowe, bazy inne
+# niż PostgreSQL) obsługuje aplikacja Flask w puli wątków. Uruchomienie, np.:
+#     uvicorn --factory app.asgi:create_asgi_app --workers 4
+import contextlib
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_etags
+
+from app import CORS_EXPOSE_HEADERS, create_app, serializers
+from app.cache import response_cache
+from app.filters import filter_loan_history, filter_loans, get_loan_filters, overdue_since
+from app.models import Book, Borrower, Loan, LoanHistory
+from app.pagination import get_page_args, page_query, split_page
+from app.replica import REPLICA_BIND
+from app.streaming import NDJSON_MIMETYPE
+from app.versioning import AVAILABILITY, make_etag, versions_from_rows, versions_query
+
+ASYNC_DRIVER = 'postgresql+asyncpg'
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping')
+
+
+# Silnik asyncpg dla odczytów: replika, jeśli jest skonfigurowana, z tymi samymi ustawieniami puli i limitu
+# czasu instrukcji co silnik synchroniczny. Zwraca None dla baz innych niż PostgreSQL.
+def create_read_engine(config):
+    source = config['SQLALCHEMY_BINDS'].get(REPLICA_BIND) \
+        or {'url': config['SQLALCHEMY_DATABASE_URI'], **config['SQLALCHEMY_ENGINE_OPTIONS']}
+    url = make_url(config.get('ASYNC_DATABASE_URL') or source['url'])
+    if url.get_backend_name() != 'postgresql':
+        return None
+
+    options = {name: source[name] for name in POOL_OPTIONS if name in source}
+    if config.get('DB_STATEMENT_TIMEOUT'):
+        options['connect_args'] = {'server_settings': {'statement_timeout': str(config['DB_STATEMENT_TIMEOUT'])}}
+    return create_async_engine(url.set(drivername=ASYNC_DRIVER), **options)
+
+
+class AsyncReads:
+    def __init__(self, flask_app, engine, fallback):
+        self.flask_app = flask_app
+        self.engine = engine
+        self.fallback = fallback
+
+    # Odpowiedź JSON o treści identycznej z `jsonify` aplikacji Flask
+    def json(self, data, status_code=200, headers=None):
+        return Response(self.flask_app.json.response(data).get_data(), status_code=status_code, headers=headers,
+                        media_type=self.flask_app.json.mimetype)
+
+    # Odpowiedzi strumieniowe (app/streaming.py) pozostają w aplikacji Flask
+    @staticmethod
+    def streamed(request):
+        return 'stream' in request.query_params or NDJSON_MIMETYPE in request.headers.get('accept', '')
+
+    async def authors(self, connection, book_ids):
+        authors = {}
+        for chunk in serializers.book_id_chunks(book_ids):
+            rows = (await connection.execute(serializers.book_authors_query(chunk))).all()
+            serializers.group_authors(rows, authors)
+        return authors
+
+    # Strona wyników zapytania budowanego przez `build` (w kontekście aplikacji Flask, bez połączenia z bazą).
+    # `author_key` - kolumna z ID książki, dla której serializacja potrzebuje autorów.
+    async def page(self, request, connection, build, key_column, serialize, author_key=None):
+        with self.flask_app.app_context():
+            try:
+                limit, after = get_page_args(request.query_params)
+            except ValueError:
+                return self.json({'error': 'Nieprawidłowe parametry stronicowania'}, 400)
+            statement = page_query(build(), key_column, limit, after).statement
+
+        rows, next_cursor = split_page((await connection.execute(statement)).all(), key_column, limit)
+        if author_key:
+            data = serialize(rows, await self.authors(connection, [getattr(row, author_key) for row in rows]))
+        else:
+            data = serialize(rows)
+        return self.json(data, headers={'X-Next-Cursor': next_cursor} if next_cursor else None)
+
+    # Odpowiednik dekoratora `versioned(*names, cache=True)`: ETag z wersji tabel, 304 dla aktualnej wersji
+    # u klienta i pamięć podręczna odpowiedzi wspólna z endpointami Flaska
+    async def versioned(self, request, connection, names, respond):
+        versions = versions_from_rows(names, (await connection.execute(versions_query(names))).all())
+        path, query_string = request.url.path, request.scope['query_string']
+        etag = make_etag(path, query_string, names, versions)
+        if parse_etags(request.headers.get('if-none-match')).contains(etag):
+            return Response(status_code=304, headers={'ETag': f'"{etag}"'})
+
+        cache_key = (path, query_string)
+        cached = response_cache.get(cache_key, versions)
+        if cached:
+            body, mimetype, headers = cached
+            response = Response(body, media_type=mimetype, headers=dict(headers))
+        else:
+            response = await respond()
+            if response.status_code == 200:
+                headers = [(key, value) for key, value in response.headers.items()
+                           if key.lower() not in ('content-type', 'content-length', 'set-cookie')]
+                response_cache.set(cache_key, versions, names, response.body, response.media_type, headers)
+
+        if response.status_code == 200:
+            response.headers['ETag'] = f'"{etag}"'
+            response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    async def categories(self, request, connection):
+        async def respond():
+            with self.flask_app.app_context():
+                statement = serializers.categories_query().statement
+            return self.json(serializers.serialize_categories((await connection.execute(statement)).all()))
+        return await self.versioned(request, connection, ('categories',), respond)
+
+    async def books(self, request, connection):
+        async def respond():
+            return await self.page(request, connection, serializers.books_query, Book.id, serializers.serialize_books,
+                                   'id')
+        return await self.versioned(request, connection, ('books', 'categories', 'copies', AVAILABILITY), respond)
+
+    async def readers(self, request, connection):
+        return await self.page(request, connection, serializers.readers_query, Borrower.id,
+                               serializers.serialize_readers)
+
+    async def borrowers(self, request, connection):
+        return await self.page(request, connection, serializers.borrowers_query, Borrower.id,
+                               serializers.serialize_borrowers)
+
+    async def loans(self, request, connection):
+        try:
+            filters = get_loan_filters(request.query_params)
+        except ValueError:
+            return self.json({'error': 'Nieprawidłowe parametry filtrowania'}, 400)
+        since = overdue_since()
+        return await self.page(request, connection, lambda: filter_loans(serializers.loans_query(), filters, since),
+                               Loan.id, serializers.serialize_loans, 'book_id')
+
+    async def loan_history(self, request, connection):
+        try:
+            filters = get_loan_filters(request.query_params)
+        except ValueError:
+            return self.json({'error': 'Nieprawidłowe parametry filtrowania'}, 400)
+        since = overdue_since()
+        return await self.page(request, connection,
+                               lambda: filter_loan_history(serializers.loan_history_query(since), filters, since),
+                               LoanHistory.id, serializers.serialize_loan_history)
+
+
+# Endpoint ASGI: połączenie z bazą pobierane jest z puli na czas przygotowania odpowiedzi
+class ReadEndpoint:
+    def __init__(self, reads, handler, streams=False):
+        self.reads = reads
+        self.handler = handler
+        self.streams = streams
+
+    async def __call__(self, scope, receive, send):
+        request = Request(scope, receive)
+        if self.streams and self.reads.streamed(request):
+            await self.reads.fallback(scope, receive, send)
+            return
+        async with self.reads.engine.connect() as connection:
+            response = await self.handler(request, connection)
+        await response(scope, receive, send)
+
+
+def create_asgi_app(config=None):
+    flask_app = create_app(config)
+    fallback = WSGIMiddleware(flask_app, workers=flask_app.config.get('ASGI_WSGI_THREADS', 10))
+    engine = create_read_engine(flask_app.config) if flask_app.config.get('ASGI_ASYNC_READS', True) else None
+
+    routes = []
+    if engine is not None:
+        reads = AsyncReads(flask_app, engine, fallback)
+        endpoints = [
+            ('/api/categories', reads.categories, False),
+            ('/api/books', reads.books, False),
+            ('/api/readers', reads.readers, False),
+            ('/api/borrowers', reads.borrowers, False),
+            ('/api/loans', reads.loans, True),
+            ('/api/loan-history', reads.loan_history, True),
+        ]
+        routes = [Route(path, CORSMiddleware(ReadEndpoint(reads, handler, streams), allow_origins=['*'],
+                                             expose_headers=CORS_EXPOSE_HEADERS), methods=['GET'])
+                  for path, handler, streams in endpoints]
+    # Pozostałe ścieżki i metody (w tym POST na ścieżkach powyżej) obsługuje aplikacja Flask
+    routes.append(Mount('/', app=fallback))
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        if engine is not None:
+            await engine.dispose()
+
+    return Starlette(routes=routes, lifespan=lifespan)
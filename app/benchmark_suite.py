@@ -0,0 +1,456 @@
+# Zestaw pomiarów wydajności endpointów na syntetycznej bibliotece (`flask benchmark run`).
+# Zbiór danych generowany jest deterministycznie (ziarno losowania) w skonfigurowanej bazie danych,
+# a każdy endpoint z `app/routes/` wywoływany jest przez klienta testowego Flaska.
+# Wynik (percentyle opóźnień, liczba zapytań SQL na żądanie, szczytowe zużycie pamięci) zapisywany jest jako JSON,
+# który można porównać z zapisanym wcześniej wynikiem odniesienia.
+import random
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer
+
+from app import db
+from app.circulation import delete_copies
+from app.models import (Book, Borrower, Category, Copy, Loan, LoanHistory, Notification, OutgoingEmail, Report,
+                        Reservation, TableVersion, User)
+from app.pagination import encode_cursor
+from app.profiler import collect_queries
+from app.seeding import WORDS, default_counts, seed_database
+from app.versioning import bump_version
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Liczba książek dla nazwanych skal; pozostałe tabele mają rozmiar proporcjonalny do liczby książek
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+# Znacznik w `table_versions` oznaczający bazę wypełnioną przez generator (wartość: liczba książek)
+DATASET_MARKER = 'benchmark_dataset'
+
+BENCH_ADMIN = 'bench-admin@example.com'
+BENCH_PASSWORD = 'bench-password'
+
+
+def resolve_scale(scale):
+    if scale.lower() in SCALES:
+        return SCALES[scale.lower()]
+    return int(scale)
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje wartość w kilobajtach, macOS w bajtach
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+# Wygenerowanie syntetycznej biblioteki o podanej liczbie książek (generator z `app/seeding.py`)
+# oraz konta administratora, którym logują się scenariusze
+def build_dataset(books, seed=42):
+    seed_database(default_counts(books), seed)
+    admin = User(username=BENCH_ADMIN, role_id=1)
+    admin.set_password(BENCH_PASSWORD)
+    db.session.add(admin)
+    db.session.add(TableVersion(name=DATASET_MARKER, version=books))
+    bump_version('users')
+    db.session.commit()
+
+
+# Przygotowanie bazy: wygenerowanie danych w pustej bazie albo ponowne użycie zbioru z poprzedniego uruchomienia.
+# Baza zawierająca inne dane jest odrzucana, aby pomiar nie zmodyfikował danych produkcyjnych.
+def prepare_dataset(books, seed):
+    marker = db.session.get(TableVersion, DATASET_MARKER)
+    if marker is not None:
+        if marker.version != books:
+            raise RuntimeError(f'Baza zawiera zbiór testowy innej wielkości ({marker.version} książek)')
+        return False
+    if db.session.query(Book.id).first() is not None:
+        raise RuntimeError('Baza danych zawiera dane; uruchom pomiary na osobnej bazie (DATABASE_URL)')
+    build_dataset(books, seed)
+    return True
+
+
+class Scenario:
+    def __init__(self, name, method, rule, build, expected=(200,), auth=False):
+        self.name = name
+        self.method = method
+        self.rule = rule
+        self.build = build
+        self.expected = expected
+        self.auth = auth
+
+
+# Kontekst scenariuszy: identyfikatory przykładowych rekordów i obiekty utworzone przez wcześniejsze scenariusze
+class BenchContext:
+    def __init__(self, rng, page_size):
+        self.rng = rng
+        self.page_size = page_size
+        self.marker = uuid.uuid4().hex[:8]
+        self.counter = 0
+        self.created = {}
+        self.token = None
+        self.admin_id = db.session.query(User.id).filter(User.username == BENCH_ADMIN).scalar()
+        self.book_range = db.session.query(db.func.min(Book.id), db.func.max(Book.id)).one()
+        self.history_range = db.session.query(db.func.min(LoanHistory.id), db.func.max(LoanHistory.id)).one()
+        self.borrower_range = db.session.query(db.func.min(Borrower.id), db.func.max(Borrower.id)).one()
+        self.category_id = db.session.query(db.func.min(Category.id)).scalar()
+        # Kursor strony położonej w połowie listy książek (stronicowanie daleko od początku)
+        self.deep_cursor = encode_cursor((self.book_range[0] + self.book_range[1]) // 2)
+        # Książki wypożyczane przez scenariusze - każda co najwyżej raz, więc zawsze jest dostępny egzemplarz
+        book_ids = range(self.book_range[0], self.book_range[1] + 1)
+        self.loan_books = iter(rng.sample(book_ids, min(len(book_ids), 20_000)))
+
+    def next_id(self):
+        self.counter += 1
+        return f'{self.marker}{self.counter:06d}'
+
+    def random_id(self, id_range):
+        return self.rng.randint(*id_range)
+
+    def push(self, kind, value):
+        self.created.setdefault(kind, []).append(value)
+
+    def pop(self, kind):
+        values = self.created.get(kind)
+        return values.pop() if values else None
+
+    def last(self, kind):
+        values = self.created.get(kind)
+        return values[-1] if values else None
+
+
+def _book_payload(ctx, isbn):
+    return {'title': f'Benchmark {isbn}', 'isbn': isbn, 'category': ctx.category_id, 'publication_year': 2020,
+            'publisher': 'Benchmark', 'quantity': 1, 'authors': [{'firstName': 'Jan', 'lastName': 'Benchmark'}]}
+
+
+def _reader_payload(unique):
+    return {'first_name': 'Jan', 'last_name': 'Benchmark', 'email': f'reader-{unique}@example.com',
+            'phone_number': unique[-9:], 'pesel': unique[-11:].rjust(11, '0'), 'address': 'ul. Testowa 1',
+            'postalCodeAndCity': '00-001 Warszawa'}
+
+
+def _employee_payload(unique):
+    return {'first_name': 'Ewa', 'last_name': 'Benchmark', 'email': f'employee-{unique}@example.com',
+            'pesel': unique[-11:].rjust(11, '0'), 'phone_number': unique[-9:], 'password': BENCH_PASSWORD}
+
+
+def _created_id(kind, key):
+    def remember(ctx, response):
+        data = response.get_json(silent=True) or {}
+        if data.get(key) is not None:
+            ctx.push(kind, data[key])
+    return remember
+
+
+def _reset_token():
+    serializer = URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+    return serializer.dumps(BENCH_ADMIN, salt=current_app.config['SECURITY_PASSWORD_SALT'])
+
+
+# Scenariusze: funkcja `build(ctx)` zwraca (ścieżka, treść JSON lub dane formularza, funkcja po odpowiedzi).
+# Scenariusze zapisu korzystają z rekordów utworzonych przez poprzedzające je scenariusze, więc dane bazowe
+# pozostają niezmienione między uruchomieniami.
+def build_scenarios():
+    def page(path):
+        return lambda ctx: (f'{path}?limit={ctx.page_size}', None, None)
+
+    def deep_page(path):
+        return lambda ctx: (f'{path}?limit={ctx.page_size}&after={ctx.deep_cursor}', None, None)
+
+    def create_loan(kind):
+        def remember(ctx, response):
+            for loan_id in response.get_json()['loan_ids']:
+                ctx.push(kind, loan_id)
+                ctx.push('all_loans', loan_id)
+
+        def build(ctx):
+            return '/api/loans', {'book_ids': [next(ctx.loan_books)], 'borrower_id': ctx.random_id(ctx.borrower_range),
+                                  'loan_date': '2024-01-01', 'return_date': '2024-01-31'}, remember
+        return build
+
+    # Wypożyczenie egzemplarza po kodzie kreskowym; kod trafia do scenariusza zwrotu po kodach
+    def create_loan_by_barcode(ctx):
+        barcode = ctx.pop('copy')
+
+        def remember(ctx, response):
+            for loan_id in response.get_json()['loan_ids']:
+                ctx.push('all_loans', loan_id)
+            ctx.push('lent_copy', barcode)
+
+        return '/api/loans', {'barcodes': [barcode], 'borrower_id': ctx.random_id(ctx.borrower_range),
+                              'loan_date': '2024-01-01', 'return_date': '2024-01-31'}, remember
+
+    def return_by_barcode(ctx):
+        barcode = ctx.pop('lent_copy')
+        return '/api/loans/return', {'barcodes': [barcode]}, lambda ctx, response: ctx.push('returned_copy', barcode)
+
+    def remember_copies(ctx, response):
+        for barcode in response.get_json()['barcodes']:
+            ctx.push('copy', barcode)
+
+    def remember_reservation(ctx, response):
+        reservation_id = response.get_json()['reservation_id']
+        ctx.push('reservation', reservation_id)
+        ctx.push('all_reservations', reservation_id)
+
+    return [
+        Scenario('login', 'POST', '/users/login',
+                 lambda ctx: ('/users/login', {'username': BENCH_ADMIN, 'password': BENCH_PASSWORD}, None)),
+        Scenario('user_details', 'GET', '/api/user-details', lambda ctx: ('/api/user-details', None, None), auth=True),
+        Scenario('get_user', 'GET', '/users/<int:user_id>', lambda ctx: (f'/users/{ctx.admin_id}', None, None),
+                 auth=True),
+        Scenario('update_user', 'PUT', '/users/<int:user_id>',
+                 lambda ctx: (f'/users/{ctx.admin_id}', {'username': BENCH_ADMIN}, None), auth=True),
+        Scenario('change_password', 'POST', '/api/change-password',
+                 lambda ctx: ('/api/change-password', {'oldPassword': BENCH_PASSWORD, 'newPassword': BENCH_PASSWORD},
+                              None), auth=True),
+        Scenario('reset_password', 'POST', '/reset-password',
+                 lambda ctx: ('/reset-password', {'email': BENCH_ADMIN}, None)),
+        Scenario('reset_with_token', 'POST', '/reset/<token>',
+                 lambda ctx: (f'/reset/{_reset_token()}', {'password': BENCH_PASSWORD}, None)),
+        # Zmiana nazwy na końcu grupy - wcześniejsze scenariusze korzystają z nazwy konta administratora
+        Scenario('update_username', 'PUT', '/api/update-username', lambda ctx: (
+            '/api/update-username', {'newUsername': f'bench-renamed-{ctx.next_id()}@example.com'},
+            lambda ctx, response: setattr(ctx, 'token', response.get_json()['newToken'])), auth=True),
+
+        Scenario('get_categories', 'GET', '/api/categories', lambda ctx: ('/api/categories', None, None)),
+        Scenario('add_category', 'POST', '/api/categories',
+                 lambda ctx: ('/api/categories', {'name': f'Benchmark {ctx.next_id()}'},
+                              _created_id('category', 'category_id')), expected=(201,)),
+        Scenario('delete_category', 'DELETE', '/api/categories/<int:category_id>',
+                 lambda ctx: (f"/api/categories/{ctx.pop('category')}", None, None)),
+
+        Scenario('get_books', 'GET', '/api/books', page('/api/books')),
+        Scenario('get_books_deep_page', 'GET', '/api/books', deep_page('/api/books')),
+        Scenario('search_books', 'GET', '/api/books/search',
+                 lambda ctx: (f'/api/books/search?q={ctx.rng.choice(WORDS)}', None, None)),
+        Scenario('add_book', 'POST', '/api/books',
+                 lambda ctx: ('/api/books', _book_payload(ctx, ctx.next_id()), _created_id('book', 'book_id')),
+                 expected=(201,)),
+        Scenario('update_book', 'PUT', '/api/books/<int:book_id>', lambda ctx: (
+            f"/api/books/{ctx.last('book')}", dict(_book_payload(ctx, ctx.next_id()), title='Zmieniony'),
+            None)),
+        Scenario('add_copies', 'POST', '/api/books/<int:book_id>/copies',
+                 lambda ctx: (f"/api/books/{ctx.last('book')}/copies", {'count': 1}, remember_copies),
+                 expected=(201,)),
+        Scenario('get_book_copies', 'GET', '/api/books/<int:book_id>/copies',
+                 lambda ctx: (f'/api/books/{ctx.random_id(ctx.book_range)}/copies?limit={ctx.page_size}',
+                              None, None)),
+        Scenario('get_copy', 'GET', '/api/copies/<barcode>',
+                 lambda ctx: (f"/api/copies/{ctx.last('copy')}", None, None)),
+        Scenario('create_loan_by_barcode', 'POST', '/api/loans', create_loan_by_barcode, expected=(201,)),
+        Scenario('return_loans_by_barcode', 'POST', '/api/loans/return', return_by_barcode),
+        Scenario('delete_copy', 'DELETE', '/api/copies/<barcode>',
+                 lambda ctx: (f"/api/copies/{ctx.pop('returned_copy')}", None, None)),
+        Scenario('create_loan', 'POST', '/api/loans', create_loan('loan'), expected=(201,)),
+        Scenario('return_loan', 'POST', '/api/loans/return/<int:loan_id>',
+                 lambda ctx: (f"/api/loans/return/{ctx.pop('loan')}", None, None)),
+        Scenario('create_loan_for_batch', 'POST', '/api/loans', create_loan('batch_loan'), expected=(201,)),
+        Scenario('return_loans_batch', 'POST', '/api/loans/return',
+                 lambda ctx: ('/api/loans/return', {'loan_ids': [ctx.pop('batch_loan')]}, None)),
+        Scenario('create_reservation', 'POST', '/api/reservations', lambda ctx: (
+            '/api/reservations', {'book_id': next(ctx.loan_books), 'borrower_id': ctx.random_id(ctx.borrower_range)},
+            remember_reservation), expected=(201,)),
+        Scenario('get_reservation', 'GET', '/api/reservations/<int:reservation_id>',
+                 lambda ctx: (f"/api/reservations/{ctx.last('reservation')}", None, None)),
+        Scenario('get_book_reservations', 'GET', '/api/books/<int:book_id>/reservations',
+                 lambda ctx: (f'/api/books/{ctx.random_id(ctx.book_range)}/reservations?limit={ctx.page_size}',
+                              None, None)),
+        Scenario('delete_reservation', 'DELETE', '/api/reservations/<int:reservation_id>',
+                 lambda ctx: (f"/api/reservations/{ctx.pop('reservation')}", None, None)),
+        Scenario('delete_book', 'DELETE', '/api/books/<int:book_id>',
+                 lambda ctx: (f"/api/books/{ctx.pop('book')}", None, None)),
+        Scenario('import_books', 'POST', '/api/books/import', lambda ctx: (
+            '/api/books/import?format=csv',
+            'title,isbn,category,publication_year,publisher,authors\n'
+            + ''.join(f'Import {isbn},{isbn},{ctx.category_id},2020,Benchmark,Jan Benchmark\n'
+                      for isbn in (ctx.next_id() for _ in range(10))),
+            None)),
+
+        Scenario('get_readers', 'GET', '/api/readers', page('/api/readers')),
+        Scenario('get_borrowers', 'GET', '/api/borrowers', page('/api/borrowers')),
+        Scenario('add_reader', 'POST', '/add-reader',
+                 lambda ctx: ('/add-reader', _reader_payload(ctx.next_id()), _created_id('reader', 'reader_id')),
+                 expected=(201,)),
+        Scenario('update_reader', 'PUT', '/api/readers/<int:reader_id>', lambda ctx: (
+            f"/api/readers/{ctx.last('reader')}", _reader_payload(ctx.next_id()), None)),
+        Scenario('delete_reader', 'DELETE', '/api/readers/<int:reader_id>',
+                 lambda ctx: (f"/api/readers/{ctx.pop('reader')}", None, None)),
+
+        Scenario('get_employees', 'GET', '/api/employees', page('/api/employees')),
+        Scenario('add_employee', 'POST', '/add-employee',
+                 lambda ctx: ('/add-employee', _employee_payload(ctx.next_id()),
+                              _created_id('employee', 'employee_id')), expected=(201,)),
+        Scenario('update_employee', 'PUT', '/api/employees/<int:employee_id>', lambda ctx: (
+            f"/api/employees/{ctx.last('employee')}", _employee_payload(ctx.next_id()), None)),
+        Scenario('delete_employee', 'DELETE', '/api/employees/<int:employee_id>',
+                 lambda ctx: (f"/api/employees/{ctx.pop('employee')}", None, None)),
+
+        Scenario('get_loans', 'GET', '/api/loans', page('/api/loans')),
+        Scenario('get_loan_history', 'GET', '/api/loan-history', page('/api/loan-history')),
+        Scenario('get_overdue_loans', 'GET', '/api/loans',
+                 lambda ctx: (f'/api/loans?status=Przetrzymana&limit={ctx.page_size}', None, None)),
+        Scenario('get_borrower_loan_history', 'GET', '/api/loan-history',
+                 lambda ctx: (f'/api/loan-history?borrower_id={ctx.random_id(ctx.borrower_range)}'
+                              f'&limit={ctx.page_size}', None, None)),
+        Scenario('get_loan_details', 'GET', '/api/loans/details/<int:loan_history_id>',
+                 lambda ctx: (f'/api/loans/details/{ctx.random_id(ctx.history_range)}', None, None)),
+        Scenario('create_report', 'POST', '/api/reports', lambda ctx: (
+            '/api/reports', {'type': 'most_borrowed', 'params': {'limit': ctx.rng.randint(1, 1000)}},
+            _created_id('report', 'id')), expected=(200, 202), auth=True),
+        Scenario('get_report', 'GET', '/api/reports/<int:report_id>',
+                 lambda ctx: (f"/api/reports/{ctx.last('report')}", None, None), auth=True),
+        Scenario('cache_metrics', 'GET', '/api/cache/metrics', lambda ctx: ('/api/cache/metrics', None, None)),
+    ]
+
+
+def _percentiles(values):
+    if len(values) < 2:
+        value = round(values[0], 2) if values else None
+        return {'p50': value, 'p95': value, 'p99': value}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {'p50': round(cuts[49], 2), 'p95': round(cuts[94], 2), 'p99': round(cuts[98], 2)}
+
+
+def _measure_scenario(app, client, ctx, scenario, requests_per_route):
+    timings, queries, statuses = [], [], {}
+    for _ in range(requests_per_route):
+        with app.app_context():
+            path, payload, after = scenario.build(ctx)
+        kwargs = {}
+        if isinstance(payload, str):
+            kwargs['data'] = payload.encode()
+            kwargs['content_type'] = 'text/csv'
+        elif payload is not None:
+            kwargs['json'] = payload
+        if scenario.auth:
+            kwargs['headers'] = {'Authorization': f'Bearer {ctx.token}'}
+
+        with collect_queries() as stats:
+            start = time.perf_counter()
+            response = client.open(path, method=scenario.method, **kwargs)
+            response.get_data()
+            elapsed = (time.perf_counter() - start) * 1000
+        timings.append(elapsed)
+        queries.append(stats.statements)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if after is not None and response.status_code in scenario.expected:
+            after(ctx, response)
+
+    return {
+        'method': scenario.method,
+        'route': scenario.rule,
+        'requests': requests_per_route,
+        'errors': sum(count for status, count in statuses.items() if status not in scenario.expected),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'latency_ms': dict(_percentiles(timings), mean=round(statistics.mean(timings), 2)),
+        'queries_per_request': {'mean': round(statistics.mean(queries), 2), 'max': max(queries)},
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def run_scenarios(requests_per_route, page_size, seed, only=None):
+    app = current_app._get_current_object()
+    client = app.test_client()
+    ctx = BenchContext(random.Random(seed), page_size)
+    scenarios = [scenario for scenario in build_scenarios() if not only or scenario.name in only]
+
+    # Żądania wykonywane są w osobnym wątku bez aktywnego kontekstu aplikacji polecenia CLI,
+    # dzięki czemu każde otrzymuje własny kontekst i sesję bazy danych - tak jak na serwerze
+    def measure_all():
+        ctx.token = client.post('/users/login', json={'username': BENCH_ADMIN, 'password': BENCH_PASSWORD}) \
+            .get_json()['access_token']
+        return {scenario.name: _measure_scenario(app, client, ctx, scenario, requests_per_route)
+                for scenario in scenarios}
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = executor.submit(measure_all).result()
+
+    _cleanup(ctx)
+    return results, _uncovered_routes(app, build_scenarios())
+
+
+# Usunięcie danych pozostawionych przez scenariusze (konto administratora wraca do pierwotnej nazwy)
+def _cleanup(ctx):
+    loan_ids = ctx.created.get('all_loans', [])
+    if loan_ids:
+        # Egzemplarze niezwróconych wypożyczeń wracają do puli dostępnych
+        Copy.query.filter(Copy.id.in_(db.select(Loan.copy_id).where(Loan.id.in_(loan_ids),
+                                                                    Loan.status == 'Wypożyczona'))) \
+            .update({'status': 'Dostępny'}, synchronize_session=False)
+        LoanHistory.query.filter(LoanHistory.loan_id.in_(loan_ids)).delete(synchronize_session=False)
+        Notification.query.filter(Notification.loan_id.in_(loan_ids)).delete(synchronize_session=False)
+        Loan.query.filter(Loan.id.in_(loan_ids)).delete(synchronize_session=False)
+    imported = Book.query.filter(Book.isbn.like(f'{ctx.marker}%')).all()
+    if imported:
+        delete_copies([book.id for book in imported])
+    for book in imported:
+        book.authors = []
+        db.session.delete(book)
+    User.query.filter(User.id == ctx.admin_id).update({'username': BENCH_ADMIN}, synchronize_session=False)
+    OutgoingEmail.query.filter(OutgoingEmail.recipient == BENCH_ADMIN).delete(synchronize_session=False)
+    reservation_ids = ctx.created.get('all_reservations', [])
+    if reservation_ids:
+        Copy.query.filter(Copy.id.in_(db.select(Reservation.copy_id).where(Reservation.id.in_(reservation_ids),
+                                                                           Reservation.status == 'Przydzielona'))) \
+            .update({'status': 'Dostępny'}, synchronize_session=False)
+        Reservation.query.filter(Reservation.id.in_(reservation_ids)).delete(synchronize_session=False)
+    report_ids = ctx.created.get('report', [])
+    if report_ids:
+        Report.query.filter(Report.id.in_(report_ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def _uncovered_routes(app, scenarios):
+    covered = {(scenario.method, scenario.rule) for scenario in scenarios}
+    routes = {(method, rule.rule) for rule in app.url_map.iter_rules() if rule.endpoint != 'static'
+              for method in rule.methods - {'HEAD', 'OPTIONS'}}
+    return sorted(f'{method} {rule}' for method, rule in routes - covered)
+
+
+# Porównanie z wynikiem odniesienia: regresja, gdy p95 wzrośnie o więcej niż `tolerance`
+# lub endpoint wykonuje więcej zapytań SQL niż poprzednio
+def compare_with_baseline(results, baseline, tolerance):
+    comparison = {}
+    for name, result in results.items():
+        previous = baseline.get('routes', {}).get(name)
+        if not previous:
+            continue
+        old_p95, new_p95 = previous['latency_ms']['p95'], result['latency_ms']['p95']
+        old_queries = previous['queries_per_request']['mean']
+        new_queries = result['queries_per_request']['mean']
+        comparison[name] = {
+            'p95_ratio': round(new_p95 / old_p95, 2) if old_p95 else None,
+            'queries_delta': round(new_queries - old_queries, 2),
+            'regression': bool((old_p95 and new_p95 > old_p95 * (1 + tolerance)) or new_queries > old_queries)
+        }
+    return comparison
+
+
+def run_suite(scale, requests_per_route, page_size=50, seed=42, only=None):
+    books = resolve_scale(scale)
+    start = time.perf_counter()
+    built = prepare_dataset(books, seed)
+    build_seconds = time.perf_counter() - start
+
+    results, uncovered = run_scenarios(requests_per_route, page_size, seed, only)
+    return {
+        'scale': {'books': books, 'seed': seed, 'dataset_built': built, 'build_seconds': round(build_seconds, 2)},
+        'database': db.session.get_bind().dialect.name,
+        'python': sys.version.split()[0],
+        'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+        'requests_per_route': requests_per_route,
+        'page_size': page_size,
+        'peak_rss_mb': peak_rss_mb(),
+        'routes': results,
+        'uncovered_routes': uncovered
+    }
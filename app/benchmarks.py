@@ -0,0 +1,414 @@
+# Polecenia CLI do pomiaru wydajności (`flask benchmark ...`).
+import asyncio
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+import httpx
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+
+from app import benchmark_suite, db, serializers
+from app.asgi import create_read_engine
+from app.circulation import book_status, copy_barcodes, delete_copies
+from app.models import Book, Borrower, Copy, Loan, LoanHistory, User
+
+benchmark_cli = AppGroup('benchmark', help='Pomiary wydajności aplikacji.')
+
+
+def _orm_available(book):
+    return sum(1 for copy in book.copies if copy.status == 'Dostępny')
+
+
+# Dotychczasowa serializacja książek przez obiekty ORM (punkt odniesienia dla pomiarów)
+def _orm_books():
+    books = Book.query.options(joinedload(Book.category), selectinload(Book.authors), selectinload(Book.copies)) \
+        .order_by(Book.id).all()
+    return [{
+        'id': book.id,
+        'title': book.title,
+        'isbn': book.isbn,
+        'category': book.category.name if book.category else 'Brak kategorii',
+        'publication_year': book.publication_year,
+        'publisher': book.publisher,
+        'quantity': _orm_available(book),
+        'status': book_status(_orm_available(book)),
+        'authors': [{'firstName': author.first_name, 'lastName': author.last_name} for author in book.authors]
+    } for book in books]
+
+
+def _orm_readers():
+    return [{
+        'id': reader.id,
+        'first_name': reader.first_name,
+        'last_name': reader.last_name,
+        'email': reader.email,
+        'phone_number': reader.phone_number,
+        'pesel': reader.pesel,
+        'address': reader.address,
+        'postal_code': reader.postal_code,
+        'city': reader.city
+    } for reader in Borrower.query.order_by(Borrower.id).all()]
+
+
+def _orm_loans():
+    loans = Loan.query \
+        .join(Book, Loan.book_id == Book.id) \
+        .join(Borrower, Loan.borrower_id == Borrower.id) \
+        .options(contains_eager(Loan.book).selectinload(Book.authors), contains_eager(Loan.borrower)) \
+        .order_by(Loan.id) \
+        .all()
+    return [{
+        'id': loan.id,
+        'book_title_with_authors': f"{loan.book.title}-"
+                                   + ', '.join(f"{author.first_name} {author.last_name}" for author in loan.book.authors),
+        'borrower_name': f"{loan.borrower.first_name} {loan.borrower.last_name}",
+        'borrower_pesel': loan.borrower.pesel,
+        'loan_date': loan.loan_date.strftime('%Y-%m-%d'),
+        'return_date': loan.return_date.strftime('%Y-%m-%d') if loan.return_date else None,
+        'status': loan.status
+    } for loan in loans]
+
+
+def _projection_books():
+    return serializers.serialize_books(serializers.books_query().order_by(Book.id).all())
+
+
+def _projection_readers():
+    return serializers.serialize_readers(serializers.readers_query().order_by(Borrower.id).all())
+
+
+def _projection_loans():
+    return serializers.serialize_loans(serializers.loans_query().order_by(Loan.id).all())
+
+
+# Wielokrotne wykonanie funkcji; zwraca wynik ostatniego wywołania i czasy w milisekundach
+def _measure(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        # Czyszczenie sesji, aby obiekty z poprzedniego przebiegu nie zaniżały kosztu ORM
+        db.session.expunge_all()
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+        db.session.rollback()
+    return result, timings
+
+
+# Porównanie serializacji przez ORM z serializacją opartą na projekcji kolumn
+@benchmark_cli.command('serializers')
+@click.option('--repeat', default=5, show_default=True, help='Liczba powtórzeń każdego pomiaru.')
+def benchmark_serializers(repeat):
+    cases = {
+        'get_books': (_orm_books, _projection_books),
+        'get_all_readers': (_orm_readers, _projection_readers),
+        'get_loans': (_orm_loans, _projection_loans),
+    }
+    report = {}
+    for name, (orm_path, projection_path) in cases.items():
+        orm_result, orm_timings = _measure(orm_path, repeat)
+        projection_result, projection_timings = _measure(projection_path, repeat)
+        orm_ms = statistics.median(orm_timings)
+        projection_ms = statistics.median(projection_timings)
+        report[name] = {
+            'rows': len(projection_result),
+            'orm_ms': round(orm_ms, 2),
+            'projection_ms': round(projection_ms, 2),
+            'speedup': round(orm_ms / projection_ms, 2) if projection_ms else None,
+            'identical_output': orm_result == projection_result
+        }
+    click.echo(json.dumps(report, indent=2))
+
+
+# Test obciążeniowy równoległych wypożyczeń jednej książki: sprawdza, czy nie wydano więcej egzemplarzy niż istnieje
+# i czy żaden egzemplarz nie został wypożyczony dwa razy
+@benchmark_cli.command('checkout-stress')
+@click.option('--copies', default=5, show_default=True, help='Liczba egzemplarzy książki testowej.')
+@click.option('--clients', default=50, show_default=True, help='Liczba równoległych prób wypożyczenia.')
+def checkout_stress(copies, clients):
+    app = current_app._get_current_object()
+    marker = uuid.uuid4().hex[:10]
+    book = Book(title=f'stress-{marker}', isbn=marker, publication_year=2000, publisher='stress')
+    borrower = Borrower(first_name='Stress', last_name='Test', pesel=marker[:11], address='-', postal_code='-',
+                        city='-')
+    db.session.add_all([book, borrower])
+    db.session.flush()
+    db.session.add_all([Copy(book_id=book.id, barcode=barcode, status='Dostępny')
+                        for barcode in copy_barcodes(book.id, copies)])
+    db.session.commit()
+    book_id, borrower_id = book.id, borrower.id
+
+    barrier = threading.Barrier(clients)
+
+    def attempt(_):
+        client = app.test_client()
+        barrier.wait()
+        response = client.post('/api/loans', json={
+            'book_ids': [book_id],
+            'borrower_id': borrower_id,
+            'loan_date': '2024-01-01',
+            'return_date': '2024-01-31'
+        })
+        return response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        statuses = list(pool.map(attempt, range(clients)))
+    elapsed = time.perf_counter() - start
+
+    db.session.expire_all()
+    remaining = db.session.query(Copy.id).filter(Copy.book_id == book_id, Copy.status == 'Dostępny').count()
+    loans = db.session.query(Loan.id, Loan.copy_id).filter(Loan.book_id == book_id).all()
+    loan_ids = [loan_id for loan_id, _ in loans]
+    report = {
+        'copies': copies,
+        'clients': clients,
+        'successful': statuses.count(201),
+        'rejected': statuses.count(400),
+        'errors': len(statuses) - statuses.count(201) - statuses.count(400),
+        'loans_created': len(loan_ids),
+        'remaining_quantity': remaining,
+        'elapsed_ms': round(elapsed * 1000, 2),
+        'oversold': len(loan_ids) > copies or remaining != copies - len(loan_ids)
+                    or len({copy_id for _, copy_id in loans}) != len(loans)
+    }
+
+    # Usunięcie danych testowych
+    if loan_ids:
+        LoanHistory.query.filter(LoanHistory.loan_id.in_(loan_ids)).delete(synchronize_session=False)
+        Loan.query.filter(Loan.id.in_(loan_ids)).delete(synchronize_session=False)
+    delete_copies([book_id])
+    Book.query.filter_by(id=book_id).delete()
+    Borrower.query.filter_by(id=borrower_id).delete()
+    db.session.commit()
+
+    click.echo(json.dumps(report, indent=2))
+    if report['oversold']:
+        raise SystemExit(1)
+
+
+def _percentiles(values):
+    if len(values) < 2:
+        return {'p50': None, 'p95': None, 'p99': None}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {'p50': round(cuts[49], 2), 'p95': round(cuts[94], 2), 'p99': round(cuts[98], 2)}
+
+
+# Fala równoległych logowań: przepustowość logowania oraz opóźnienia innego endpointu przed i w trakcie fali
+@benchmark_cli.command('login-storm')
+@click.option('--logins', default=200, show_default=True, help='Łączna liczba logowań.')
+@click.option('--clients', default=16, show_default=True, help='Liczba równolegle logujących się klientów.')
+@click.option('--probe', default='/api/loans?limit=50', show_default=True,
+              help='Endpoint, którego opóźnienia są mierzone w trakcie fali logowań.')
+def login_storm(logins, clients, probe):
+    app = current_app._get_current_object()
+    marker = uuid.uuid4().hex[:10]
+    username, password = f'storm-{marker}@example.com', marker
+    user = User(username=username, role_id=None)
+    user.set_password(password)
+    db.session.add(user)
+    db.session.commit()
+    user_id = user.id
+
+    def probe_once(client):
+        start = time.perf_counter()
+        client.get(probe)
+        return (time.perf_counter() - start) * 1000
+
+    probe_client = app.test_client()
+    probe_once(probe_client)
+    baseline = [probe_once(probe_client) for _ in range(50)]
+
+    storm_running = threading.Event()
+    storm_running.set()
+    during = []
+
+    def probe_loop():
+        client = app.test_client()
+        while storm_running.is_set():
+            during.append(probe_once(client))
+
+    def login(_):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post('/users/login', json={'username': username, 'password': password})
+        return response.status_code, (time.perf_counter() - start) * 1000
+
+    prober = threading.Thread(target=probe_loop)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    storm_running.clear()
+    prober.join()
+
+    User.query.filter_by(id=user_id).delete()
+    db.session.commit()
+
+    statuses = [status for status, _ in results]
+    report = {
+        'hash_method': current_app.config.get('PASSWORD_HASH_METHOD'),
+        'hash_workers': current_app.config.get('PASSWORD_HASH_WORKERS'),
+        'logins': logins,
+        'clients': clients,
+        'successful': statuses.count(200),
+        'rejected_busy': statuses.count(503),
+        'errors': len(statuses) - statuses.count(200) - statuses.count(503),
+        'logins_per_s': round(logins / elapsed, 2),
+        'login_ms': _percentiles([ms for _, ms in results]),
+        'probe': probe,
+        'probe_baseline_ms': _percentiles(baseline),
+        'probe_during_storm_ms': _percentiles(during),
+        'probe_requests_during_storm': len(during)
+    }
+    click.echo(json.dumps(report, indent=2))
+
+
+CONCURRENCY_PATHS = ('/api/books?limit=50', '/api/readers?limit=50', '/api/loans?limit=50',
+                     '/api/loan-history?limit=50')
+
+
+# Uruchomienie serwera w osobnym procesie i oczekiwanie, aż zacznie odpowiadać
+def _start_server(command, port, probe, env=None):
+    server = subprocess.Popen(command, cwd=os.path.dirname(current_app.root_path), env=env)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise click.ClickException(f'Serwer {command[2]} zakończył działanie z kodem {server.returncode}')
+        try:
+            if httpx.get(f'http://127.0.0.1:{port}{probe}').status_code == 200:
+                return server
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise click.ClickException(f'Serwer {command[2]} nie odpowiedział w ciągu 60 s')
+
+
+# Serwer ASGI (app/asgi.py) z asynchroniczną ścieżką odczytu
+def _start_asgi_server(port, workers, probe):
+    return _start_server(
+        [sys.executable, '-m', 'uvicorn', '--factory', 'app.asgi:create_asgi_app', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning', '--no-access-log'],
+        port, probe, env=dict(os.environ, ASGI_ASYNC_READS='True'))
+
+
+# Dotychczasowe wdrożenie synchroniczne: aplikacja Flask w procesach roboczych gunicorna (sync workers)
+def _start_wsgi_server(port, workers, probe):
+    if importlib.util.find_spec('gunicorn') is None:
+        raise click.ClickException('Pomiar trybu synchronicznego wymaga gunicorna '
+                                   '(pip install -r requirements-dev.txt)')
+    return _start_server(
+        [sys.executable, '-m', 'gunicorn', '--preload', '--workers', str(workers), '--worker-class', 'sync',
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:create_app()'],
+        port, probe)
+
+
+# Obciążenie serwera przez `clients` równoległych klientów (każdy z własnym połączeniem keep-alive)
+# wysyłających łącznie `requests` żądań GET
+async def _drive(base_url, paths, clients, requests):
+    latencies, statuses = [], []
+    remaining = iter(range(requests))
+
+    async def worker():
+        async with httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=1),
+                                     timeout=60) as client:
+            for number in remaining:
+                start = time.perf_counter()
+                try:
+                    status = (await client.get(paths[number % len(paths)])).status_code
+                except httpx.HTTPError:
+                    status = None
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses.append(status)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests_per_s': round(requests / elapsed, 2),
+        'latency_ms': _percentiles(latencies),
+        'errors': len(statuses) - statuses.count(200)
+    }
+
+
+# Przepustowość endpointów odczytu przy wielu równoległych klientach: ścieżka asynchroniczna (uvicorn, asyncpg)
+# w porównaniu z dotychczasowym wdrożeniem synchronicznym (gunicorn z procesami roboczymi sync), np.:
+#     DATABASE_URL=postgresql://.../library_bench flask benchmark concurrency --clients 500
+@benchmark_cli.command('concurrency')
+@click.option('--clients', default=500, show_default=True, help='Liczba równoległych klientów.')
+@click.option('--requests', 'total_requests', default=10000, show_default=True,
+              help='Łączna liczba żądań w każdym trybie.')
+@click.option('--path', 'paths', multiple=True, help='Mierzone endpointy (można podać wielokrotnie).')
+@click.option('--workers', default=1, show_default=True, help='Liczba procesów serwera ASGI.')
+@click.option('--sync-workers', default=4, show_default=True,
+              help='Liczba procesów roboczych gunicorna w trybie synchronicznym.')
+@click.option('--port', default=8765, show_default=True, help='Port, na którym uruchamiany jest serwer.')
+def benchmark_concurrency(clients, total_requests, paths, workers, sync_workers, port):
+    if create_read_engine(current_app.config) is None:
+        raise click.ClickException('Asynchroniczna ścieżka odczytu wymaga bazy PostgreSQL')
+    paths = list(paths or CONCURRENCY_PATHS)
+
+    report = {'clients': clients, 'requests': total_requests, 'workers': workers, 'sync_workers': sync_workers,
+              'paths': paths}
+    for mode, start_server, server_workers in (('async', _start_asgi_server, workers),
+                                               ('sync', _start_wsgi_server, sync_workers)):
+        server = start_server(port, server_workers, paths[0])
+        try:
+            report[mode] = asyncio.run(_drive(f'http://127.0.0.1:{port}', paths, clients, total_requests))
+        finally:
+            server.terminate()
+            server.wait()
+
+    if report['sync']['requests_per_s']:
+        report['speedup'] = round(report['async']['requests_per_s'] / report['sync']['requests_per_s'], 2)
+    click.echo(json.dumps(report, indent=2))
+
+
+# Pomiar wszystkich endpointów na syntetycznej bibliotece, np.:
+#     DATABASE_URL=postgresql://.../library_bench flask benchmark run --scale 100k --output wynik.json
+#     flask benchmark run --scale 100k --baseline wynik.json
+@benchmark_cli.command('run')
+@click.option('--scale', default='10k', show_default=True,
+              help='Liczba książek w zbiorze danych: 10k, 100k, 1m lub dowolna liczba.')
+@click.option('--requests', 'requests_per_route', default=50, show_default=True,
+              help='Liczba żądań dla każdego scenariusza.')
+@click.option('--page-size', default=50, show_default=True, help='Rozmiar strony dla endpointów list.')
+@click.option('--seed', default=42, show_default=True, help='Ziarno generatora danych i parametrów żądań.')
+@click.option('--only', multiple=True, help='Uruchom tylko wskazane scenariusze (można podać wielokrotnie).')
+@click.option('--output', type=click.Path(dir_okay=False), help='Plik, do którego zostanie zapisany wynik JSON.')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Wynik odniesienia do porównania.')
+@click.option('--tolerance', default=0.2, show_default=True,
+              help='Dopuszczalny względny wzrost p95 względem wyniku odniesienia.')
+def benchmark_run(scale, requests_per_route, page_size, seed, only, output, baseline, tolerance):
+    try:
+        report = benchmark_suite.run_suite(scale, requests_per_route, page_size, seed, set(only))
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    regressions = []
+    if baseline:
+        with open(baseline, encoding='utf-8') as f:
+            report['comparison'] = benchmark_suite.compare_with_baseline(report['routes'], json.load(f), tolerance)
+        regressions = [name for name, result in report['comparison'].items() if result['regression']]
+        report['regressions'] = regressions
+
+    result = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(result)
+    click.echo(result)
+    if regressions:
+        raise SystemExit(1)
@@ -0,0 +1,77 @@
+# Pamięć podręczna odpowiedzi katalogu w obrębie procesu.
+# Wpisy oznaczone są wersjami tabel z `table_versions`, więc zapis wykonany w dowolnym
+# procesie (np. innym workerze gunicorna) unieważnia je przy następnym odczycie.
+# Dodatkowo proces, który wykonał zapis, czyści swoje wpisy zaraz po zatwierdzeniu transakcji.
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stale': 0, 'evictions': 0, 'invalidations': 0}
+
+    def configure(self, config):
+        self.max_entries = config.get('RESPONSE_CACHE_MAX_ENTRIES', self.max_entries)
+        self.max_bytes = config.get('RESPONSE_CACHE_MAX_BYTES', self.max_bytes)
+        self.ttl = config.get('RESPONSE_CACHE_TTL', self.ttl)
+
+    # Pobranie treści odpowiedzi, jeśli wpis istnieje, nie wygasł i odpowiada bieżącym wersjom tabel
+    def get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+
+            entry_generation, expires_at, _, body, mimetype, headers = entry
+            if entry_generation != generation or expires_at < time.monotonic():
+                self._stats['stale'] += 1
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return body, mimetype, headers
+
+    def set(self, key, generation, tables, body, mimetype, headers=()):
+        if self.max_entries <= 0 or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (generation, time.monotonic() + self.ttl, frozenset(tables), body, mimetype,
+                                  tuple(headers))
+            self._size += len(body)
+
+            # Usuwanie najdawniej używanych wpisów po przekroczeniu limitów
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+
+    # Usunięcie wpisów zależnych od podanych tabel (lub wszystkich, gdy nie podano tabel)
+    def invalidate(self, tables=None):
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if tables is None or entry[2] & set(tables)]
+            for key in keys:
+                self._remove(key)
+            self._stats['invalidations'] += len(keys)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._size,
+                        max_entries=self.max_entries, max_bytes=self.max_bytes, ttl=self.ttl)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size -= len(entry[3])
+
+
+response_cache = ResponseCache()
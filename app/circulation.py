@@ -0,0 +1,495 @@
+# Operacje wypożyczania egzemplarzy książek wykonywane zbiorczo, w jednej transakcji, oraz kolejki rezerwacji.
+# Każdy fizyczny egzemplarz ma własny wiersz w `copies` (kod kreskowy, status, lokalizacja); wypożyczenia, zwroty
+# i rezerwacje zmieniają wiersze egzemplarzy, a liczba dostępnych egzemplarzy książki wyznaczana jest zliczeniem.
+# Nie zwiększają też wersji `copies` w `table_versions` (zob. AVAILABILITY w app/versioning.py); wersja ta
+# zmienia się tylko przy dodawaniu, wycofywaniu i usuwaniu egzemplarzy.
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import case, func, tuple_
+
+from app import db
+from app.history import record_loans, record_returns
+from app.models import Book, Borrower, Copy, Loan, Reservation
+from app.versioning import bump_version
+
+# Liczba kolejek rezerwacji odczytywanych jednym zapytaniem (SQLite ogranicza liczbę członów UNION)
+QUEUE_CHUNK_SIZE = 200
+
+
+class CirculationError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+# Liczba dostępnych egzemplarzy książki jako podzapytanie skorelowane z zapytaniem o książki
+# (zliczenie zakresu indeksu `ix_copies_book_id_status`)
+def available_copies():
+    return db.select(func.count()) \
+        .where(Copy.book_id == Book.id, Copy.status == 'Dostępny') \
+        .correlate(Book) \
+        .scalar_subquery()
+
+
+# Status książki wyświetlany w katalogu, wyznaczany z liczby dostępnych egzemplarzy
+def book_status(available):
+    return 'Dostępna' if available else 'Wypożyczona'
+
+
+# Kolejne kody kreskowe egzemplarzy książki: <ID książki>-<numer egzemplarza>
+def copy_barcodes(book_id, count, numbered=0):
+    return [f'{book_id}-{number}' for number in range(numbered + 1, numbered + count + 1)]
+
+
+def _set_status(copy_ids, status, now):
+    db.session.execute(
+        db.update(Copy)
+        .where(Copy.id.in_(copy_ids))
+        .values(status=status, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# Blokada wierszy książek szeregująca operacje na kolejkach rezerwacji. FOR NO KEY UPDATE nie koliduje z blokadą
+# klucza zakładaną przy wstawianiu wypożyczeń i egzemplarzy, więc nie wstrzymuje wypożyczeń tych książek.
+def _lock_books(book_ids):
+    return db.session.query(Book.id) \
+        .filter(Book.id.in_(book_ids)) \
+        .order_by(Book.id) \
+        .with_for_update(key_share=True) \
+        .all()
+
+
+# Liczba prób wybrania brakujących egzemplarzy, gdy część kandydatów wydało w międzyczasie równoległe wypożyczenie
+TAKE_COPIES_ATTEMPTS = 5
+
+
+# Wybranie i oznaczenie podanym statusem `count` dostępnych egzemplarzy książki. Egzemplarze zablokowane
+# przez równoległe wypożyczenie są pomijane (SKIP LOCKED), więc wypożyczenia tej samej książki nie czekają
+# na siebie, a warunek na status gwarantuje, że żaden egzemplarz nie zostanie wydany dwa razy.
+# Kandydaci wybierani są osobnym zapytaniem - podzapytanie IN z LIMIT mogłoby zostać wykonane ponownie
+# i zwrócić więcej egzemplarzy, niż zażądano. Jeśli część kandydatów wydano w międzyczasie (np. w bazach
+# ignorujących SKIP LOCKED), brakujące egzemplarze wybierane są ponownie, najwyżej TAKE_COPIES_ATTEMPTS razy.
+def _take_copies(book_id, count, status, now):
+    taken = []
+    for _ in range(TAKE_COPIES_ATTEMPTS):
+        candidates = db.session.query(Copy.id) \
+            .filter(Copy.book_id == book_id, Copy.status == 'Dostępny') \
+            .order_by(Copy.id) \
+            .limit(count - len(taken)) \
+            .with_for_update(skip_locked=True) \
+            .all()
+        if not candidates:
+            break
+        taken += db.session.execute(
+            db.update(Copy)
+            .where(Copy.id.in_([copy_id for copy_id, in candidates]), Copy.status == 'Dostępny')
+            .values(status=status, updated_at=now)
+            .returning(Copy.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        if len(taken) == count:
+            break
+    return taken
+
+
+# Przydzielone rezerwacje czytelnika na podane książki: (ID rezerwacji, ID książki, ID odłożonego egzemplarza)
+def _held_copies(borrower_id, book_ids):
+    if borrower_id is None:
+        return []
+    return db.session.query(Reservation.id, Reservation.book_id, Reservation.copy_id) \
+        .filter(Reservation.borrower_id == borrower_id, Reservation.book_id.in_(book_ids),
+                Reservation.status == 'Przydzielona') \
+        .order_by(Reservation.id) \
+        .with_for_update() \
+        .all()
+
+
+# Zapis wypożyczeń wybranych egzemplarzy (lista par: ID książki, ID egzemplarza) i realizacja rezerwacji.
+# Zmieniane są wyłącznie wiersze egzemplarzy, więc ani wiersz książki, ani żaden wspólny wiersz nie jest blokowany.
+def _lend(copies, fulfilled, borrower_id, loan_date, return_date, now):
+    if fulfilled:
+        db.session.execute(
+            db.update(Reservation)
+            .where(Reservation.id.in_(fulfilled))
+            .values(status='Zrealizowana', updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+    loans_table = Loan.__table__
+    loan_ids = db.session.execute(
+        loans_table.insert().returning(loans_table.c.id, sort_by_parameter_order=True),
+        [{
+            'book_id': book_id,
+            'copy_id': copy_id,
+            'borrower_id': borrower_id,
+            'loan_date': loan_date,
+            'return_date': return_date,
+            'status': 'Wypożyczona'
+        } for book_id, copy_id in copies]
+    ).scalars().all()
+
+    record_loans(loan_ids)
+    return loan_ids
+
+
+# Wypożyczenie książek o podanych ID (ID może się powtarzać - wtedy wypożyczanych jest kilka egzemplarzy).
+# Egzemplarze odłożone dla czytelnika z kolejki rezerwacji wydawane są w pierwszej kolejności (rezerwacja
+# zostaje zrealizowana), a pozostałe wybierane są spośród dostępnych egzemplarzy każdej książki.
+# Przy braku dowolnej książki lub egzemplarza nic nie jest zapisywane.
+# Zwraca ID utworzonych wypożyczeń; transakcję zatwierdza wywołujący.
+def checkout(book_ids, borrower_id, loan_date, return_date):
+    requested = Counter(book_ids)
+
+    # Sprawdzenie istnienia wszystkich książek jednym zapytaniem
+    found = {book_id for book_id, in db.session.query(Book.id).filter(Book.id.in_(requested)).all()}
+    for book_id in book_ids:
+        if book_id not in found:
+            raise CirculationError(f'Nie znaleziono książki o ID: {book_id}', 404)
+
+    now = datetime.utcnow()
+    picked = {book_id: [] for book_id in requested}
+    fulfilled = []
+    for reservation_id, book_id, copy_id in _held_copies(borrower_id, requested):
+        if len(picked[book_id]) < requested[book_id]:
+            picked[book_id].append(copy_id)
+            fulfilled.append(reservation_id)
+    if fulfilled:
+        _set_status([copy_id for copies in picked.values() for copy_id in copies], 'Wypożyczony', now)
+
+    for book_id, count in requested.items():
+        missing = count - len(picked[book_id])
+        if missing:
+            taken = _take_copies(book_id, missing, 'Wypożyczony', now)
+            if len(taken) < missing:
+                db.session.rollback()
+                raise CirculationError(f'Brak dostępnych egzemplarzy książki o ID: {book_id}')
+            picked[book_id].extend(taken)
+
+    copies = [(book_id, picked[book_id].pop(0)) for book_id in book_ids]
+    return _lend(copies, fulfilled, borrower_id, loan_date, return_date, now)
+
+
+# Wypożyczenie egzemplarzy zeskanowanych przy stanowisku wypożyczeń (wyszukiwanie po unikalnym indeksie
+# kodów kreskowych). Egzemplarz odłożony dla czytelnika realizuje jego rezerwację; wypożyczenie innego
+# dostępnego egzemplarza książki, na którą czytelnik ma przydzieloną rezerwację, również ją realizuje,
+# a odłożony dotąd egzemplarz przechodzi na następną osobę w kolejce.
+# Zwraca ID utworzonych wypożyczeń; transakcję zatwierdza wywołujący.
+def checkout_copies(barcodes, borrower_id, loan_date, return_date):
+    if len(set(barcodes)) != len(barcodes):
+        raise CirculationError('Kody kreskowe egzemplarzy nie mogą się powtarzać')
+
+    rows = db.session.query(Copy.id, Copy.book_id, Copy.barcode, Copy.status) \
+        .filter(Copy.barcode.in_(barcodes)) \
+        .order_by(Copy.id) \
+        .with_for_update() \
+        .all()
+    copies = {row.barcode: row for row in rows}
+    for barcode in barcodes:
+        if barcode not in copies:
+            raise CirculationError(f'Nie znaleziono egzemplarza o kodzie: {barcode}', 404)
+
+    held = {}
+    for reservation_id, book_id, copy_id in _held_copies(borrower_id, {row.book_id for row in rows}):
+        held.setdefault(book_id, {})[copy_id] = reservation_id
+
+    fulfilled = []
+    for barcode in barcodes:
+        copy = copies[barcode]
+        if copy.status == 'Odłożony':
+            if copy.id not in held.get(copy.book_id, {}):
+                raise CirculationError(f'Egzemplarz o kodzie {barcode} jest odłożony dla innego czytelnika')
+            fulfilled.append(held[copy.book_id].pop(copy.id))
+        elif copy.status != 'Dostępny':
+            raise CirculationError(f'Egzemplarz o kodzie {barcode} nie jest dostępny')
+
+    released = []
+    for barcode in barcodes:
+        copy = copies[barcode]
+        if copy.status == 'Dostępny' and held.get(copy.book_id):
+            held_copy_id, reservation_id = held[copy.book_id].popitem()
+            fulfilled.append(reservation_id)
+            released.append((copy.book_id, held_copy_id))
+
+    # Warunek na status chroni przed wydaniem egzemplarza wypożyczonego w międzyczasie
+    # (w bazach bez blokad wierszy)
+    now = datetime.utcnow()
+    updated = db.session.execute(
+        db.update(Copy)
+        .where(Copy.id.in_([row.id for row in rows]), Copy.status.in_(('Dostępny', 'Odłożony')))
+        .values(status='Wypożyczony', updated_at=now)
+        .returning(Copy.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    if len(updated) != len(rows):
+        db.session.rollback()
+        unavailable = next(barcode for barcode in barcodes if copies[barcode].id not in set(updated))
+        raise CirculationError(f'Egzemplarz o kodzie {unavailable} nie jest dostępny')
+
+    if released:
+        release_copies(released, now)
+    return _lend([(copies[barcode].book_id, copies[barcode].id) for barcode in barcodes], fulfilled,
+                 borrower_id, loan_date, return_date, now)
+
+
+# Zwrot wielu wypożyczeń naraz. Status wypożyczeń, egzemplarzy i daty zwrotu w historii
+# aktualizowane są kilkoma zbiorczymi instrukcjami, niezależnie od liczby zwracanych pozycji.
+# Zwraca wynik dla każdego podanego ID (w kolejności podania); transakcję zatwierdza wywołujący.
+def return_loans(loan_ids):
+    if not loan_ids:
+        return []
+    returned_at = datetime.utcnow()
+
+    # Warunek na status gwarantuje, że równoległe zwroty tego samego wypożyczenia zaliczą się tylko raz
+    returned = db.session.execute(
+        db.update(Loan)
+        .where(Loan.id.in_(set(loan_ids)), Loan.status == 'Wypożyczona')
+        .values(status='Zwrócone', updated_at=returned_at)
+        .returning(Loan.id, Loan.book_id, Loan.copy_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    returned_ids = {row.id for row in returned}
+
+    if returned:
+        # Zwrócone egzemplarze trafiają do kolejek rezerwacji, a pozostałe do puli dostępnych
+        returned_copies = [(row.book_id, row.copy_id) for row in returned if row.copy_id is not None]
+        if returned_copies:
+            release_copies(returned_copies, returned_at)
+
+        # Aktualizacja historii wypożyczeń; brakujące wpisy historii są tworzone
+        record_returns(returned_ids, returned_at)
+
+    # Rozróżnienie wypożyczeń nieistniejących od już zwróconych
+    existing = {loan_id for loan_id, in db.session.query(Loan.id)
+                .filter(Loan.id.in_(set(loan_ids) - returned_ids)).all()}
+
+    results = []
+    reported = set()
+    for loan_id in loan_ids:
+        if loan_id in returned_ids and loan_id not in reported:
+            results.append({'loan_id': loan_id, 'returned': True})
+            reported.add(loan_id)
+        elif loan_id in existing or loan_id in returned_ids:
+            results.append({'loan_id': loan_id, 'returned': False, 'error': 'Wypożyczenie zostało już zwrócone'})
+        else:
+            results.append({'loan_id': loan_id, 'returned': False, 'error': 'Nie znaleziono wypożyczenia'})
+    return results
+
+
+# Zwrot egzemplarzy wskazanych przez ID książek (np. zeskanowanych ze zwrotnicy).
+# Dla każdego egzemplarza zamykane jest najstarsze aktywne wypożyczenie danej książki.
+def return_books(book_ids):
+    active = db.session.query(Loan.id, Loan.book_id) \
+        .filter(Loan.book_id.in_(set(book_ids)), Loan.status == 'Wypożyczona') \
+        .order_by(Loan.loan_date, Loan.id) \
+        .all()
+    queues = {}
+    for loan_id, book_id in active:
+        queues.setdefault(book_id, []).append(loan_id)
+
+    selected = []
+    for book_id in book_ids:
+        queue = queues.get(book_id)
+        selected.append((book_id, queue.pop(0) if queue else None))
+
+    loan_results = iter(return_loans([loan_id for _, loan_id in selected if loan_id is not None]))
+    results = []
+    for book_id, loan_id in selected:
+        if loan_id is None:
+            results.append({'book_id': book_id, 'returned': False, 'error': 'Brak aktywnego wypożyczenia książki'})
+        else:
+            results.append(dict(next(loan_results), book_id=book_id))
+    return results
+
+
+# Zwrot egzemplarzy zeskanowanych przy stanowisku zwrotów: zamykane jest aktywne wypożyczenie
+# każdego egzemplarza (wyszukiwanie po indeksie kodów kreskowych i `ix_loans_copy_id`).
+def return_copies(barcodes):
+    rows = db.session.query(Copy.barcode, Loan.id) \
+        .outerjoin(Loan, db.and_(Loan.copy_id == Copy.id, Loan.status == 'Wypożyczona')) \
+        .filter(Copy.barcode.in_(set(barcodes))) \
+        .all()
+    active = dict(rows)
+
+    loan_results = iter(return_loans([active[barcode] for barcode in barcodes if active.get(barcode) is not None]))
+    results = []
+    for barcode in barcodes:
+        if barcode not in active:
+            results.append({'barcode': barcode, 'returned': False, 'error': 'Nie znaleziono egzemplarza'})
+        elif active[barcode] is None:
+            results.append({'barcode': barcode, 'returned': False,
+                            'error': 'Brak aktywnego wypożyczenia egzemplarza'})
+        else:
+            results.append(dict(next(loan_results), barcode=barcode))
+    return results
+
+
+# Przekazanie zwolnionych egzemplarzy (lista par: ID książki, ID egzemplarza) rezerwacjom z początku kolejki
+# danej książki; pozostałe egzemplarze wracają do puli dostępnych.
+# Wiersze książek są blokowane przed odczytem kolejek, więc równoległe zwroty i rezerwacje tej samej książki
+# wykonują się po kolei. Początek kolejki odczytywany jest z indeksu kolejki (LIMIT dla każdej książki),
+# więc koszt nie zależy od jej długości. Zwraca liczbę przydzielonych egzemplarzy.
+def release_copies(copies, now):
+    by_book = {}
+    for book_id, copy_id in copies:
+        by_book.setdefault(book_id, []).append(copy_id)
+    _lock_books(by_book)
+
+    allocated = []
+    books = list(by_book.items())
+    for start in range(0, len(books), QUEUE_CHUNK_SIZE):
+        heads = [db.select(Reservation.id, Reservation.book_id)
+                 .where(Reservation.book_id == book_id, Reservation.status == 'Oczekująca')
+                 .order_by(Reservation.reservation_date, Reservation.id)
+                 .limit(len(copy_ids))
+                 .subquery()
+                 for book_id, copy_ids in books[start:start + QUEUE_CHUNK_SIZE]]
+        allocated.extend(db.session.execute(db.union_all(*[db.select(head.c.id, head.c.book_id)
+                                                            for head in heads])).all())
+
+    # Każda przydzielona rezerwacja otrzymuje jeden z egzemplarzy swojej książki
+    assigned = {row.id: by_book[row.book_id].pop() for row in allocated}
+    if assigned:
+        db.session.execute(
+            db.update(Reservation)
+            .where(Reservation.id.in_(assigned))
+            .values(status='Przydzielona', allocated_at=now, updated_at=now,
+                    copy_id=case(assigned, value=Reservation.id))
+            .execution_options(synchronize_session=False)
+        )
+        _set_status(list(assigned.values()), 'Odłożony', now)
+
+    free = [copy_id for copy_ids in by_book.values() for copy_id in copy_ids]
+    if free:
+        _set_status(free, 'Dostępny', now)
+    return len(assigned)
+
+
+# Rezerwacja książki przez czytelnika. Dostępny egzemplarz jest od razu odkładany dla czytelnika
+# (jak przy wypożyczeniu); w przeciwnym razie czytelnik trafia na koniec kolejki.
+# Transakcję zatwierdza wywołujący.
+def reserve(book_id, borrower_id):
+    if not _lock_books([book_id]):
+        raise CirculationError(f'Nie znaleziono książki o ID: {book_id}', 404)
+    if db.session.get(Borrower, borrower_id) is None:
+        raise CirculationError(f'Nie znaleziono czytelnika o ID: {borrower_id}', 404)
+
+    active = db.session.query(Reservation.id) \
+        .filter(Reservation.book_id == book_id, Reservation.borrower_id == borrower_id,
+                Reservation.status.in_(('Oczekująca', 'Przydzielona'))) \
+        .first()
+    if active is not None:
+        raise CirculationError('Czytelnik ma już aktywną rezerwację tej książki')
+
+    now = datetime.utcnow()
+    taken = _take_copies(book_id, 1, 'Odłożony', now)
+    copy_id = taken[0] if taken else None
+
+    reservation = Reservation(book_id=book_id, borrower_id=borrower_id, reservation_date=now,
+                              status='Przydzielona' if copy_id else 'Oczekująca', copy_id=copy_id,
+                              allocated_at=now if copy_id else None, created_at=now, updated_at=now)
+    db.session.add(reservation)
+    db.session.flush()
+    return reservation
+
+
+# Pozycja oczekującej rezerwacji w kolejce (1 - następna do przydziału) albo None dla pozostałych statusów.
+# Liczona zakresem indeksu kolejki przed rezerwacją.
+def queue_position(reservation):
+    if reservation.status != 'Oczekująca':
+        return None
+    ahead = db.session.query(func.count()) \
+        .select_from(Reservation) \
+        .filter(Reservation.book_id == reservation.book_id, Reservation.status == 'Oczekująca',
+                tuple_(Reservation.reservation_date, Reservation.id)
+                < tuple_(reservation.reservation_date, reservation.id)) \
+        .scalar()
+    return ahead + 1
+
+
+# Anulowanie rezerwacji; odłożony dla niej egzemplarz przechodzi na następną osobę w kolejce.
+# Transakcję zatwierdza wywołujący.
+def cancel_reservation(reservation_id):
+    reservation = Reservation.query.filter(Reservation.id == reservation_id).with_for_update().first()
+    if reservation is None:
+        raise CirculationError('Nie znaleziono rezerwacji', 404)
+    if reservation.status not in ('Oczekująca', 'Przydzielona'):
+        raise CirculationError('Rezerwacja nie jest aktywna')
+
+    now = datetime.utcnow()
+    held_copy_id = reservation.copy_id if reservation.status == 'Przydzielona' else None
+    reservation.status = 'Anulowana'
+    reservation.copy_id = None
+    reservation.updated_at = now
+    db.session.flush()
+    if held_copy_id is not None:
+        release_copies([(reservation.book_id, held_copy_id)], now)
+    return reservation
+
+
+# Dodanie egzemplarzy książki o podanych kodach kreskowych albo `count` egzemplarzy o kolejnych kodach.
+# Wiersz książki jest blokowany na czas numerowania, a nowe egzemplarze trafiają najpierw do oczekujących
+# w kolejce rezerwacji. Zwraca kody dodanych egzemplarzy; transakcję zatwierdza wywołujący.
+def add_copies(book_id, count=None, barcodes=None, location=None):
+    if not _lock_books([book_id]):
+        raise CirculationError(f'Nie znaleziono książki o ID: {book_id}', 404)
+
+    if barcodes is None:
+        numbered = db.session.query(func.count(Copy.id)).filter(Copy.book_id == book_id).scalar()
+        barcodes = copy_barcodes(book_id, count, numbered)
+    elif len(set(barcodes)) != len(barcodes):
+        raise CirculationError('Kody kreskowe egzemplarzy nie mogą się powtarzać')
+
+    existing = db.session.query(Copy.barcode).filter(Copy.barcode.in_(barcodes)).first()
+    if existing is not None:
+        raise CirculationError(f'Egzemplarz o kodzie {existing.barcode} już istnieje')
+
+    now = datetime.utcnow()
+    copies_table = Copy.__table__
+    copy_ids = db.session.execute(
+        copies_table.insert().returning(copies_table.c.id, sort_by_parameter_order=True),
+        [{'book_id': book_id, 'barcode': barcode, 'status': 'Dostępny', 'location': location,
+          'created_at': now, 'updated_at': now} for barcode in barcodes]
+    ).scalars().all()
+
+    release_copies([(book_id, copy_id) for copy_id in copy_ids], now)
+    bump_version('copies')
+    return barcodes
+
+
+# Wycofanie dostępnego egzemplarza z księgozbioru. Wiersz egzemplarza pozostaje, aby zachować
+# powiązania z historią wypożyczeń. Transakcję zatwierdza wywołujący.
+def withdraw_copy(barcode):
+    withdrawn = db.session.execute(
+        db.update(Copy)
+        .where(Copy.barcode == barcode, Copy.status == 'Dostępny')
+        .values(status='Wycofany', updated_at=datetime.utcnow())
+        .returning(Copy.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if withdrawn is None:
+        if db.session.query(Copy.id).filter(Copy.barcode == barcode).first() is None:
+            raise CirculationError('Nie znaleziono egzemplarza', 404)
+        raise CirculationError('Można wycofać tylko dostępny egzemplarz')
+    bump_version('copies')
+
+
+# Usunięcie egzemplarzy usuwanych książek; wypożyczenia i rezerwacje tracą powiązanie z egzemplarzem
+# tak jak z usuniętą książką
+def delete_copies(book_ids):
+    copy_ids = db.select(Copy.id).where(Copy.book_id.in_(book_ids))
+    for model in (Loan, Reservation):
+        db.session.execute(
+            db.update(model)
+            .where(model.copy_id.in_(copy_ids))
+            .values(copy_id=None)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.execute(
+        db.delete(Copy)
+        .where(Copy.book_id.in_(book_ids))
+        .execution_options(synchronize_session=False)
+    )
+    bump_version('copies')
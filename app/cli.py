@@ -0,0 +1,46 @@
+# Polecenia CLI aplikacji importowane przy pierwszym użyciu. Proces obsługujący żądania nie ładuje modułów
+# zadań w tle, benchmarków, generatora danych ani Flask-Migrate z Alembikiem, a `flask <polecenie>`
+# importuje tylko moduł wywołanego polecenia.
+import importlib
+
+import click
+from flask.cli import AppGroup
+
+from app import db
+
+# Nazwa polecenia -> (moduł, atrybut); atrybut to polecenie click albo funkcja tworząca je dla aplikacji
+COMMANDS = {
+    'benchmark': ('app.benchmarks', 'benchmark_cli'),
+    'db': ('app.cli', 'migrate_command'),
+    'import-books': ('app.importer', 'import_books_command'),
+    'mail-worker': ('app.mailer', 'mail_worker_command'),
+    'report-worker': ('app.reports', 'report_worker_command'),
+    'send-reminders': ('app.reminders', 'send_reminders_command'),
+    'seed': ('app.seeding', 'seed_command'),
+}
+
+
+# Polecenia migracji bazy danych (`flask db ...`)
+def migrate_command(app):
+    from flask_migrate import Migrate
+    from flask_migrate.cli import db as db_command
+    Migrate(app, db)
+    return db_command
+
+
+class LazyCommands(AppGroup):
+    def __init__(self, app, **kwargs):
+        super().__init__(**kwargs)
+        self.app = app
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(COMMANDS))
+
+    def get_command(self, ctx, name):
+        if name not in self.commands and name in COMMANDS:
+            module, attribute = COMMANDS[name]
+            command = getattr(importlib.import_module(module), attribute)
+            if not isinstance(command, click.Command):
+                command = command(self.app)
+            self.add_command(command, name)
+        return super().get_command(ctx, name)
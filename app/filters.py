@@ -0,0 +1,88 @@
+# Filtrowanie list wypożyczeń i historii wypożyczeń parametrami adresu zapytania:
+# `status`, `borrower_id`, `book_id` oraz zakres dat wypożyczenia `from`/`to` (RRRR-MM-DD, obie granice włącznie).
+# Przetrzymanie wyznaczane jest w SQL: aktywne wypożyczenie po terminie zwrotu (indeksy częściowe
+# aktywnych wypożyczeń po dacie zwrotu) albo zwrot zapisany w historii jako spóźniony (app/history.py).
+from datetime import datetime, time, timedelta
+
+from flask import request
+from sqlalchemy import and_, case, or_
+
+from app.models import Loan, LoanHistory
+
+STATUSES = ('Wypożyczona', 'Zwrócone', 'Przetrzymana')
+
+
+# Odczytanie filtrów z adresu zapytania (domyślnie bieżącego żądania Flaska).
+# Rzuca ValueError, jeśli któryś parametr jest nieprawidłowy.
+def get_loan_filters(args=None):
+    args = request.args if args is None else args
+    filters = {}
+    status = args.get('status')
+    if status is not None:
+        if status not in STATUSES:
+            raise ValueError('Nieznany status')
+        filters['status'] = status
+
+    for name in ('borrower_id', 'book_id'):
+        value = args.get(name)
+        if value is not None:
+            filters[name] = int(value)
+
+    for name in ('from', 'to'):
+        value = args.get(name)
+        if value is not None:
+            filters[name] = datetime.strptime(value, '%Y-%m-%d')
+    return filters
+
+
+# Początek bieżącego dnia - wypożyczenie jest przetrzymane od dnia następującego po terminie zwrotu
+def overdue_since():
+    return datetime.combine(datetime.utcnow().date(), time())
+
+
+def loans_overdue(since):
+    return and_(Loan.status == 'Wypożyczona', Loan.return_date < since)
+
+
+def history_overdue(since):
+    return and_(LoanHistory.status == 'Wypożyczona', LoanHistory.return_date < since)
+
+
+# Status wpisu historii: aktywne wypożyczenie po terminie zwrotu jest przetrzymane
+def loan_history_status(since):
+    return case((history_overdue(since), 'Przetrzymana'), else_=LoanHistory.status)
+
+
+def _apply(query, filters, status_condition, borrower_column, book_column, date_column):
+    if 'status' in filters:
+        query = query.filter(status_condition(filters['status']))
+    if 'borrower_id' in filters:
+        query = query.filter(borrower_column == filters['borrower_id'])
+    if 'book_id' in filters:
+        query = query.filter(book_column == filters['book_id'])
+    if 'from' in filters:
+        query = query.filter(date_column >= filters['from'])
+    if 'to' in filters:
+        query = query.filter(date_column < filters['to'] + timedelta(days=1))
+    return query
+
+
+# Na liście wypożyczeń `status=Przetrzymana` wybiera aktywne wypożyczenia po terminie zwrotu
+def filter_loans(query, filters, since):
+    def status_condition(status):
+        if status == 'Przetrzymana':
+            return loans_overdue(since)
+        return Loan.status == status
+    return _apply(query, filters, status_condition, Loan.borrower_id, Loan.book_id, Loan.loan_date)
+
+
+# W historii status odpowiada wartości zwracanej przez `loan_history_status`
+def filter_loan_history(query, filters, since):
+    def status_condition(status):
+        if status == 'Przetrzymana':
+            return or_(LoanHistory.status == 'Przetrzymana', history_overdue(since))
+        if status == 'Wypożyczona':
+            return and_(LoanHistory.status == 'Wypożyczona', LoanHistory.return_date >= since)
+        return LoanHistory.status == status
+    return _apply(query, filters, status_condition, LoanHistory.borrower_id, LoanHistory.book_id,
+                  LoanHistory.checkout_date)
@@ -0,0 +1,101 @@
+# Zdenormalizowana historia wypożyczeń (tabela `loan_history`).
+# Każdy wpis przechowuje kopię tytułu i autorów książki, danych czytelnika oraz status wypożyczenia
+# (spóźniony zwrot zapisywany jest jako 'Przetrzymana'), więc lista historii jest odczytem jednej tabeli po kluczu głównym, bez złączeń i agregacji.
+# Kopie wyliczane są zbiorczymi instrukcjami z tabel źródłowych przy wypożyczeniu i zwrocie
+# oraz odświeżane po zmianie danych książki lub czytelnika.
+from datetime import timedelta
+
+from sqlalchemy import and_, case, func, literal, select
+
+from app import db
+from app.models import Author, Book, Borrower, Loan, LoanHistory, book_author
+
+# Zwrot później niż po tylu dniach od wypożyczenia zapisywany jest w historii jako przetrzymanie
+LATE_RETURN_DAYS = 30
+
+
+# Czy zwrot `returned` nastąpił później niż LATE_RETURN_DAYS pełnych dni po wypożyczeniu `checkout` (wyrażenie SQL).
+# SQLite nie obsługuje arytmetyki na datach, więc różnica liczona jest tam funkcją julianday.
+def returned_late(returned, checkout):
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.julianday(returned) - func.julianday(checkout) >= LATE_RETURN_DAYS + 1
+    return returned >= checkout + timedelta(days=LATE_RETURN_DAYS + 1)
+
+
+# Tytuł i autorzy książek ("Imię Nazwisko, Imię Nazwisko") jako podzapytanie z kolumnami id, title, authors
+def _book_data(*criteria):
+    authors = func.aggregate_strings(Author.first_name + ' ' + Author.last_name, ', ')
+    return select(Book.id, Book.title, func.coalesce(authors, '').label('authors')) \
+        .outerjoin(book_author, book_author.c.book_id == Book.id) \
+        .outerjoin(Author, Author.id == book_author.c.author_id) \
+        .where(*criteria) \
+        .group_by(Book.id, Book.title) \
+        .subquery()
+
+
+# Utworzenie wpisów historii dla podanych wypożyczeń jedną instrukcją INSERT ... SELECT;
+# jako datę zwrotu wpis otrzymuje planowaną datę zwrotu z wypożyczenia
+def record_loans(loan_ids):
+    _insert_entries([Loan.id.in_(loan_ids)], Loan.return_date)
+
+
+# Utworzenie wpisów historii dla wszystkich wypożyczeń o ID od `first_loan_id` (np. po zbiorczym wstawieniu
+# wypożyczeń przez `flask seed`). Zwrócone wypożyczenie ma datę zwrotu zapisaną w `updated_at`, tak jak przy zwrocie.
+def record_loan_range(first_loan_id):
+    return _insert_entries([Loan.id >= first_loan_id],
+                           case((Loan.status == 'Zwrócone', Loan.updated_at), else_=Loan.return_date))
+
+
+def _insert_entries(criteria, return_date):
+    books = _book_data(Book.id.in_(select(Loan.book_id).where(*criteria)))
+    status = case((and_(Loan.status == 'Zwrócone', returned_late(return_date, Loan.loan_date)), 'Przetrzymana'),
+                  else_=Loan.status)
+    source = select(Loan.id, Loan.book_id, Loan.borrower_id, Loan.loan_date, return_date, status,
+                    books.c.title, books.c.authors, Borrower.first_name, Borrower.last_name, Borrower.pesel) \
+        .outerjoin(books, books.c.id == Loan.book_id) \
+        .outerjoin(Borrower, Borrower.id == Loan.borrower_id) \
+        .where(*criteria) \
+        .order_by(Loan.id)
+    return db.session.execute(LoanHistory.__table__.insert().from_select(
+        ['loan_id', 'book_id', 'borrower_id', 'checkout_date', 'return_date', 'status', 'book_title',
+         'book_authors', 'borrower_first_name', 'borrower_last_name', 'borrower_pesel'], source)).rowcount
+
+
+# Oznaczenie zwrotu w historii (spóźniony zwrot otrzymuje status 'Przetrzymana');
+# brakujące wpisy historii są tworzone z datą zwrotu `returned_at`
+def record_returns(loan_ids, returned_at):
+    returned = literal(returned_at, db.DateTime)
+    db.session.execute(
+        db.update(LoanHistory)
+        .where(LoanHistory.loan_id.in_(loan_ids))
+        .values(return_date=returned_at,
+                status=case((returned_late(returned, LoanHistory.checkout_date), 'Przetrzymana'), else_='Zwrócone'))
+        .execution_options(synchronize_session=False)
+    )
+    with_history = {loan_id for loan_id, in db.session.query(LoanHistory.loan_id)
+                    .filter(LoanHistory.loan_id.in_(loan_ids)).all()}
+    missing = set(loan_ids) - with_history
+    if missing:
+        _insert_entries([Loan.id.in_(missing)], returned)
+
+
+def _update(criteria, values):
+    db.session.execute(
+        db.update(LoanHistory)
+        .where(*criteria)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+# Odświeżenie tytułu i autorów we wpisach historii podanych książek (po edycji książki)
+def refresh_books(book_ids):
+    books = _book_data(Book.id.in_(book_ids))
+    _update([LoanHistory.book_id == books.c.id], {'book_title': books.c.title, 'book_authors': books.c.authors})
+
+
+# Odświeżenie danych czytelników we wpisach historii (po edycji czytelnika)
+def refresh_borrowers(borrower_ids):
+    _update([LoanHistory.borrower_id == Borrower.id, Borrower.id.in_(borrower_ids)],
+            {'borrower_first_name': Borrower.first_name, 'borrower_last_name': Borrower.last_name,
+             'borrower_pesel': Borrower.pesel})
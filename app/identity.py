@@ -0,0 +1,89 @@
+# Tożsamość zalogowanego użytkownika (użytkownik, rola, dane pracownika) z pamięcią podręczną procesu.
+# Wpisy oznaczone są wersjami tabel `users` i `employees`, więc zmiana danych w dowolnym procesie
+# unieważnia je przy następnym odczycie - uwierzytelnione żądanie kosztuje jedno zapytanie o wersje.
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+from flask_jwt_extended import get_jwt_identity
+
+from app import db
+from app.models import Employee, Role, User
+from app.versioning import get_versions
+
+IDENTITY_TABLES = ('users', 'employees')
+
+
+class IdentityCache:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, generation):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != generation:
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user_id, generation, identity):
+        max_entries = current_app.config.get('IDENTITY_CACHE_MAX_ENTRIES', self.max_entries)
+        with self._lock:
+            self._entries[user_id] = (generation, identity)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = IdentityCache()
+
+
+# ID użytkownika z tokena JWT; tokeny wydane przed dodaniem `user_id` zawierają jedynie nazwę użytkownika
+def current_user_id():
+    identity = get_jwt_identity() or {}
+    if identity.get('user_id') is not None:
+        return identity['user_id']
+    row = db.session.query(User.id).filter(User.username == identity.get('username')).first()
+    return row.id if row else None
+
+
+def _load_identity(user_id):
+    row = db.session.query(User.id, User.username, User.role_id, Role.id.label('role_exists'),
+                           Employee.first_name, Employee.last_name, Employee.email) \
+        .outerjoin(Role, Role.id == User.role_id) \
+        .outerjoin(Employee, Employee.user_id == User.id) \
+        .filter(User.id == user_id) \
+        .first()
+    if row is None:
+        return None
+    return {
+        'id': row.id,
+        'username': row.username,
+        'role_id': row.role_id if row.role_exists is not None else None,
+        'employee': {
+            'first_name': row.first_name,
+            'last_name': row.last_name,
+            'email': row.email
+        } if row.first_name is not None else None
+    }
+
+
+# Dane zalogowanego użytkownika jako słownik lub None, jeśli użytkownik nie istnieje
+def current_identity():
+    user_id = current_user_id()
+    if user_id is None:
+        return None
+
+    generation = get_versions(*IDENTITY_TABLES)
+    identity = identity_cache.get(user_id, generation)
+    if identity is None:
+        identity = _load_identity(user_id)
+        if identity is not None:
+            identity_cache.set(user_id, generation, identity)
+    return identity
@@ -0,0 +1,297 @@
+# Masowy import katalogu książek z plików CSV lub JSONL.
+# Rekordy przetwarzane są partiami: autorzy i kategorie deduplikowani są w pamięci,
+# a książki, autorzy i powiązania book_author wstawiane wielowierszowymi INSERT ... ON CONFLICT.
+# Błędne rekordy są pomijane i raportowane, nie przerywając importu pozostałych.
+import csv
+import io
+import json
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.circulation import copy_barcodes
+from app.models import Author, Book, Category, Copy, book_author
+from app.versioning import bump_version
+
+REQUIRED_FIELDS = ['title', 'isbn', 'publication_year', 'publisher']
+
+# Maksymalna liczba błędów zwracanych w podsumowaniu importu
+MAX_REPORTED_ERRORS = 1000
+
+
+# INSERT z obsługą ON CONFLICT właściwy dla używanej bazy danych
+def _insert(table):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+# Odczyt rekordów z pliku; zwraca pary (numer linii, słownik z danymi)
+def read_records(stream, fmt):
+    if fmt == 'csv':
+        # Autorzy w kolumnie `authors` rozdzieleni średnikami, np. "Adam Mickiewicz; Juliusz Słowacki"
+        for line_no, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_no, row
+    else:
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield line_no, record if isinstance(record, dict) else {'_error': 'Nieprawidłowy format JSON'}
+
+
+# Autorzy jako lista [(imię, nazwisko), ...]; akceptowany format z `add_book` lub tekst rozdzielony średnikami
+def _parse_authors(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = [part.strip() for part in value.split(';') if part.strip()]
+
+    authors = []
+    for author in value:
+        if isinstance(author, dict):
+            first_name, last_name = author.get('firstName'), author.get('lastName')
+        else:
+            first_name, _, last_name = str(author).rpartition(' ')
+        if not first_name or not last_name:
+            raise ValueError('Imię i nazwisko autora są wymagane')
+        authors.append((first_name.strip(), last_name.strip()))
+    return authors
+
+
+# Kategoria jako klucz ('id', ID) dla kolumny `category_id` (oraz liczby JSON w polu `category`, jak w `add_book`)
+# albo ('name', nazwa). Tekst w kolumnie `category` jest zawsze nazwą, także gdy składa się z cyfr (np. "1984").
+def _parse_category(record):
+    value = record.get('category_id')
+    if value in (None, '') and isinstance(record.get('category'), int) and not isinstance(record['category'], bool):
+        value = record['category']
+    if value in (None, ''):
+        return 'name', str(record['category']).strip()
+    try:
+        return 'id', int(value)
+    except (TypeError, ValueError):
+        raise ValueError('Nieprawidłowy identyfikator kategorii')
+
+
+# Walidacja rekordu i zamiana na dane książki; rzuca ValueError z opisem błędu
+def _parse_record(record):
+    if '_error' in record:
+        raise ValueError(record['_error'])
+    if any(not record.get(field) for field in REQUIRED_FIELDS) \
+            or record.get('category_id') in (None, '') and not str(record.get('category') or '').strip():
+        raise ValueError('Brakujące dane książki')
+
+    try:
+        publication_year = int(record['publication_year'])
+        quantity = int(record.get('quantity') or 1)
+    except (TypeError, ValueError):
+        raise ValueError('Nieprawidłowy rok wydania lub liczba egzemplarzy')
+    if quantity < 1:
+        raise ValueError('Nieprawidłowa liczba egzemplarzy')
+
+    return {
+        'title': str(record['title']).strip(),
+        'isbn': str(record['isbn']).strip(),
+        'category': _parse_category(record),
+        'publication_year': publication_year,
+        'publisher': str(record['publisher']).strip(),
+        'quantity': quantity,
+        'authors': _parse_authors(record.get('authors'))
+    }
+
+
+class CatalogImporter:
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or current_app.config.get('IMPORT_BATCH_SIZE', 1000)
+        self.imported = 0
+        self.errors = []
+        self.failed = 0
+        # Identyfikatory autorów i kategorii zapamiętywane między partiami
+        self._author_ids = {}
+        self._category_ids = {}
+
+    def run(self, records):
+        batch = []
+        for line_no, record in records:
+            batch.append((line_no, record))
+            if len(batch) >= self.batch_size:
+                self._process(batch)
+                batch = []
+        if batch:
+            self._process(batch)
+        return self.summary()
+
+    def summary(self):
+        errors = sorted(self.errors, key=lambda error: error['line'])[:MAX_REPORTED_ERRORS]
+        return {'imported': self.imported, 'failed': self.failed, 'errors': errors}
+
+    def _error(self, line_no, message):
+        self.failed += 1
+        self.errors.append({'line': line_no, 'error': message})
+
+    def _process(self, batch):
+        books = []
+        seen_isbns = set()
+        for line_no, record in batch:
+            try:
+                book = _parse_record(record)
+            except ValueError as e:
+                self._error(line_no, str(e))
+                continue
+            if book['isbn'] in seen_isbns:
+                self._error(line_no, 'Książka z tym ISBN występuje w pliku więcej niż raz')
+                continue
+            seen_isbns.add(book['isbn'])
+            books.append((line_no, book))
+
+        if not books:
+            return
+
+        try:
+            self._commit(books)
+        except SQLAlchemyError:
+            db.session.rollback()
+            self._author_ids.clear()
+            self._category_ids.clear()
+            # Partia zawiera rekord odrzucony przez bazę - ponowienie po jednym rekordzie wskaże błędny wiersz
+            for line_no, book in books:
+                try:
+                    self._commit([(line_no, book)])
+                except SQLAlchemyError:
+                    db.session.rollback()
+                    self._author_ids.clear()
+                    self._category_ids.clear()
+                    self._error(line_no, 'Błąd zapisu książki w bazie danych')
+
+    # Zapis partii w jednej transakcji; błędy rekordów raportowane są dopiero po zatwierdzeniu
+    def _commit(self, books):
+        written, row_errors = self._write(books)
+        db.session.commit()
+        self.imported += written
+        for line_no, message in row_errors:
+            self._error(line_no, message)
+
+    def _write(self, books):
+        row_errors = []
+
+        # Odrzucenie książek, których ISBN już istnieje w bazie (jedno zapytanie na partię)
+        existing = {isbn for isbn, in db.session.query(Book.isbn)
+                    .filter(Book.isbn.in_([book['isbn'] for _, book in books])).all()}
+        category_ids = self._resolve_categories({book['category'] for _, book in books
+                                                 if book['isbn'] not in existing})
+
+        accepted = []
+        for line_no, book in books:
+            if book['isbn'] in existing:
+                row_errors.append((line_no, 'Książka z tym ISBN już istnieje'))
+            elif book['category'] not in category_ids:
+                row_errors.append((line_no, 'Nie znaleziono kategorii'))
+            else:
+                accepted.append(book)
+        if not accepted:
+            return 0, row_errors
+
+        author_ids = self._resolve_authors({author for book in accepted for author in book['authors']})
+
+        book_rows = [{
+            'title': book['title'],
+            'isbn': book['isbn'],
+            'category_id': category_ids[book['category']],
+            'publication_year': book['publication_year'],
+            'publisher': book['publisher']
+        } for book in accepted]
+        result = db.session.execute(Book.__table__.insert().returning(Book.id, Book.isbn), book_rows)
+        book_ids = {isbn: book_id for book_id, isbn in result}
+
+        # Egzemplarze nowych książek otrzymują kolejne kody kreskowe <ID książki>-<numer>
+        now = datetime.utcnow()
+        db.session.execute(Copy.__table__.insert(), [
+            {'book_id': book_ids[book['isbn']], 'barcode': barcode, 'status': 'Dostępny', 'created_at': now,
+             'updated_at': now}
+            for book in accepted for barcode in copy_barcodes(book_ids[book['isbn']], book['quantity'])
+        ])
+
+        links = [{'book_id': book_ids[book['isbn']], 'author_id': author_ids[author]}
+                 for book in accepted for author in book['authors']]
+        if links:
+            db.session.execute(_insert(book_author).on_conflict_do_nothing(), links)
+
+        bump_version('books', 'copies')
+        return len(accepted), row_errors
+
+    # Kategorie podane identyfikatorem lub nazwą (klucze z `_parse_category`); brakujące kategorie podane nazwą
+    # są tworzone
+    def _resolve_categories(self, keys):
+        missing = [key for key in keys if key not in self._category_ids]
+        ids = {value for kind, value in missing if kind == 'id'}
+        names = {value for kind, value in missing if kind == 'name'}
+
+        if ids:
+            rows = db.session.query(Category.id).filter(Category.id.in_(ids)).all()
+            self._category_ids.update({('id', category_id): category_id for category_id, in rows})
+
+        if names:
+            rows = db.session.query(Category.name, Category.id).filter(Category.name.in_(names)).all()
+            self._category_ids.update({('name', name): category_id for name, category_id in rows})
+            new_names = [name for name in names if ('name', name) not in self._category_ids]
+            if new_names:
+                result = db.session.execute(Category.__table__.insert().returning(Category.id, Category.name),
+                                            [{'name': name} for name in new_names])
+                self._category_ids.update({('name', name): category_id for category_id, name in result})
+                bump_version('categories')
+
+        return self._category_ids
+
+    # Wstawienie brakujących autorów (ON CONFLICT DO NOTHING) i pobranie identyfikatorów wszystkich z partii
+    def _resolve_authors(self, names):
+        missing = [name for name in names if name not in self._author_ids]
+        if missing:
+            db.session.execute(_insert(Author.__table__).on_conflict_do_nothing(),
+                               [{'first_name': first_name, 'last_name': last_name} for first_name, last_name in missing])
+            rows = db.session.query(Author.first_name, Author.last_name, Author.id) \
+                .filter(tuple_(Author.first_name, Author.last_name).in_(missing)) \
+                .all()
+            self._author_ids.update({(first_name, last_name): author_id for first_name, last_name, author_id in rows})
+        return self._author_ids
+
+
+# Ustalenie formatu pliku na podstawie jawnie podanego formatu, nazwy pliku lub typu treści
+def detect_format(fmt=None, filename=None, mimetype=None):
+    if fmt:
+        fmt = fmt.lower()
+    elif (filename and filename.lower().endswith('.csv')) or mimetype == 'text/csv':
+        fmt = 'csv'
+    else:
+        fmt = 'jsonl'
+    if fmt not in ('csv', 'jsonl'):
+        raise ValueError('Nieobsługiwany format pliku')
+    return fmt
+
+
+def import_catalog(binary_stream, fmt, batch_size=None):
+    stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    return CatalogImporter(batch_size).run(read_records(stream, fmt))
+
+
+# Polecenie CLI: flask import-books katalog.csv
+@click.command('import-books')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Format pliku (domyślnie według rozszerzenia).')
+@click.option('--batch-size', type=int, help='Liczba rekordów w jednej partii.')
+@with_appcontext
+def import_books_command(path, fmt, batch_size):
+    fmt = detect_format(fmt, filename=path)
+    with open(path, 'rb') as f:
+        summary = import_catalog(f, fmt, batch_size)
+    for error in summary['errors']:
+        click.echo(f"Linia {error['line']}: {error['error']}", err=True)
+    click.echo(f"Zaimportowano: {summary['imported']}, odrzucono: {summary['failed']}")
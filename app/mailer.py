@@ -0,0 +1,263 @@
+# Wysyłka wiadomości e-mail przez kolejkę (outbox).
+# Endpointy zapisują wiadomość w tabeli `email_outbox` w tej samej transakcji co pozostałe zmiany,
+# a proces `flask mail-worker` pobiera oczekujące wiadomości partiami i wysyła je pulą wątków,
+# korzystając ze współdzielonych połączeń SMTP. Nieudane wysyłki są ponawiane z rosnącym opóźnieniem.
+import logging
+import queue
+import random
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+# Dodanie wiadomości do kolejki; transakcję zatwierdza wywołujący
+def enqueue_email(recipient, subject, body):
+    email = OutgoingEmail(recipient=recipient, subject=subject, body=body, status='pending',
+                          attempts=0, next_attempt_at=datetime.utcnow())
+    db.session.add(email)
+    return email
+
+
+# Sprawdzenie konfiguracji serwera SMTP przed rozpoczęciem wysyłki
+def require_smtp_config(config):
+    missing = [name for name in ('MAIL_SERVER', 'MAIL_PORT') if not config.get(name)]
+    if missing:
+        raise click.ClickException(f"Brak konfiguracji serwera SMTP: {', '.join(missing)}")
+
+
+# Pula połączeń SMTP. Połączenie jest logowane raz i używane do wysyłki wielu wiadomości,
+# dopóki serwer go nie zamknie lub nie przekroczy maksymalnego czasu życia.
+class SMTPConnectionPool:
+    def __init__(self, config, size):
+        self.server = config['MAIL_SERVER']
+        self.port = config['MAIL_PORT']
+        self.username = config.get('MAIL_USERNAME')
+        self.password = config.get('MAIL_PASSWORD')
+        self.use_ssl = config.get('MAIL_USE_SSL', True)
+        self.use_tls = config.get('MAIL_USE_TLS', False)
+        self.timeout = config.get('MAIL_SMTP_TIMEOUT', 30)
+        self.max_age = config.get('MAIL_SMTP_CONNECTION_MAX_AGE', 300)
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.server, self.port, timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+            if self.use_tls:
+                server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server, time.monotonic()
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    # Pobranie połączenia z puli (po sprawdzeniu, że nadal działa) lub utworzenie nowego
+    def acquire(self):
+        while True:
+            try:
+                server, created = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - created > self.max_age:
+                self._close(server)
+                continue
+            try:
+                if server.noop()[0] == 250:
+                    return server, created
+            except (smtplib.SMTPException, OSError):
+                pass
+            server.close()
+
+    def release(self, connection, broken=False):
+        server, _ = connection
+        if broken:
+            server.close()
+            return
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            self._close(server)
+
+    def close_all(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+
+def build_message(sender, email):
+    msg = MIMEText(email['body'])
+    msg['Subject'] = email['subject']
+    msg['From'] = sender
+    msg['To'] = email['recipient']
+    return msg
+
+
+# Błędy, których ponowienie nie pomoże (np. odrzucony adres odbiorcy)
+def _is_permanent(error):
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500 and not isinstance(error, smtplib.SMTPAuthenticationError)
+    return False
+
+
+class MailWorker:
+    def __init__(self, threads=None, batch_size=None, subjects=None):
+        config = current_app.config
+        self.sender = config.get('MAIL_USERNAME')
+        self.threads = threads or config.get('MAIL_WORKER_THREADS', 4)
+        self.batch_size = batch_size or config.get('MAIL_OUTBOX_BATCH_SIZE', 50)
+        self.max_attempts = config.get('MAIL_MAX_ATTEMPTS', 8)
+        self.backoff = config.get('MAIL_RETRY_BACKOFF', 30)
+        self.backoff_max = config.get('MAIL_RETRY_BACKOFF_MAX', 3600)
+        self.claim_timeout = config.get('MAIL_CLAIM_TIMEOUT', 300)
+        self.poll_interval = config.get('MAIL_WORKER_POLL_INTERVAL', 2)
+        # Opcjonalne ograniczenie wysyłki do wiadomości o podanych tematach (np. tylko przypomnienia)
+        self.subjects = list(subjects) if subjects else None
+        self.pool = SMTPConnectionPool(config, self.threads)
+        self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='mail-worker')
+
+    # Zarezerwowanie partii wiadomości do wysyłki. Wiadomości zarezerwowane przez proces, który przestał
+    # działać, wracają do kolejki po upływie MAIL_CLAIM_TIMEOUT. W PostgreSQL kilka procesów może działać
+    # równolegle - wiersze zablokowane przez inny proces są pomijane (SKIP LOCKED).
+    def claim_batch(self):
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=self.claim_timeout)
+        query = OutgoingEmail.query \
+            .filter(db.or_(db.and_(OutgoingEmail.status == 'pending', OutgoingEmail.next_attempt_at <= now),
+                           db.and_(OutgoingEmail.status == 'sending', OutgoingEmail.claimed_at < stale)))
+        if self.subjects:
+            query = query.filter(OutgoingEmail.subject.in_(self.subjects))
+        emails = query \
+            .order_by(OutgoingEmail.next_attempt_at, OutgoingEmail.id) \
+            .limit(self.batch_size) \
+            .with_for_update(skip_locked=True) \
+            .all()
+        batch = []
+        for email in emails:
+            email.status = 'sending'
+            email.claimed_at = now
+            batch.append({'id': email.id, 'recipient': email.recipient, 'subject': email.subject,
+                          'body': email.body, 'attempts': email.attempts})
+        db.session.commit()
+        return batch
+
+    # Wysyłka części partii jednym połączeniem z puli; zwraca listę (id, błąd lub None).
+    # Wątki nie korzystają z sesji bazy danych - wyniki zapisuje wątek główny.
+    def _send_chunk(self, chunk):
+        results = []
+        connection = None
+        for index, email in enumerate(chunk):
+            if connection is None:
+                try:
+                    connection = self.pool.acquire()
+                except (smtplib.SMTPException, OSError) as e:
+                    # Serwer niedostępny - pozostałe wiadomości tej części czekają na kolejną próbę
+                    results.extend((remaining['id'], e) for remaining in chunk[index:])
+                    return results
+            try:
+                connection[0].send_message(build_message(self.sender, email))
+                results.append((email['id'], None))
+            except (smtplib.SMTPException, OSError) as e:
+                results.append((email['id'], e))
+                # Po błędzie połączenia kolejna wiadomość zostanie wysłana nowym połączeniem
+                if not isinstance(e, (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError,
+                                      smtplib.SMTPSenderRefused)):
+                    self.pool.release(connection, broken=True)
+                    connection = None
+        if connection is not None:
+            self.pool.release(connection)
+        return results
+
+    def _retry_delay(self, attempts):
+        delay = min(self.backoff * 2 ** (attempts - 1), self.backoff_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _record(self, batch, results):
+        attempts = {email['id']: email['attempts'] + 1 for email in batch}
+        now = datetime.utcnow()
+        sent_ids = [email_id for email_id, error in results if error is None]
+        if sent_ids:
+            db.session.execute(
+                db.update(OutgoingEmail)
+                .where(OutgoingEmail.id.in_(sent_ids))
+                .values(status='sent', sent_at=now, claimed_at=None, last_error=None,
+                        attempts=OutgoingEmail.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+        for email_id, error in results:
+            if error is None:
+                continue
+            failed = _is_permanent(error) or attempts[email_id] >= self.max_attempts
+            db.session.execute(
+                db.update(OutgoingEmail)
+                .where(OutgoingEmail.id == email_id)
+                .values(status='failed' if failed else 'pending', attempts=attempts[email_id], claimed_at=None,
+                        last_error=str(error)[:1000],
+                        next_attempt_at=now + timedelta(seconds=self._retry_delay(attempts[email_id])))
+                .execution_options(synchronize_session=False)
+            )
+            logger.warning('Nie udało się wysłać wiadomości %s (próba %s): %s', email_id, attempts[email_id], error)
+        db.session.commit()
+        return len(sent_ids), len(results) - len(sent_ids)
+
+    # Wysłanie jednej partii; zwraca (liczba wysłanych, liczba nieudanych) lub None, gdy kolejka jest pusta
+    def process_batch(self):
+        batch = self.claim_batch()
+        if not batch:
+            return None
+        chunk_size = -(-len(batch) // self.threads)
+        chunks = [batch[i:i + chunk_size] for i in range(0, len(batch), chunk_size)]
+        results = [result for chunk_results in self.executor.map(self._send_chunk, chunks)
+                   for result in chunk_results]
+        return self._record(batch, results)
+
+    def run(self, once=False):
+        sent = failed = 0
+        try:
+            while True:
+                counts = self.process_batch()
+                if counts is None:
+                    if once:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                sent += counts[0]
+                failed += counts[1]
+        finally:
+            self.executor.shutdown(wait=True)
+            self.pool.close_all()
+        return sent, failed
+
+
+# Polecenie CLI: flask mail-worker (z --once wysyła oczekujące wiadomości i kończy działanie)
+@click.command('mail-worker')
+@click.option('--threads', type=int, help='Liczba wątków wysyłających (domyślnie MAIL_WORKER_THREADS).')
+@click.option('--batch-size', type=int, help='Liczba wiadomości pobieranych w jednej partii.')
+@click.option('--once', is_flag=True, help='Wyślij oczekujące wiadomości i zakończ.')
+@with_appcontext
+def mail_worker_command(threads, batch_size, once):
+    require_smtp_config(current_app.config)
+    logging.basicConfig(level=logging.INFO)
+    sent, failed = MailWorker(threads, batch_size).run(once=once)
+    click.echo(f"Wysłano: {sent}, nieudane próby: {failed}")
@@ -1,7 +1,8 @@
 # Modele definiują strukturę tabel w bazie danych oraz relacje między nimi
 from datetime import datetime
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.passwords import password_hasher
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 
 class Role(db.Model):
@@ -16,7 +17,7 @@ class Role(db.Model):
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(255), nullable=False)
+    username = db.Column(db.String(255), nullable=False, unique=True, index=True)
     password = db.Column(db.String(255), nullable=False)
     role_id = db.Column(db.Integer, db.ForeignKey('roles.id'))
 
@@ -25,18 +26,22 @@ class User(db.Model):
     notifications = db.relationship('Notification', backref='user', lazy=True)
     reports = db.relationship('Report', backref='user', lazy=True)
 
-    # Metody
+    # Metody (obliczenia skrótów wykonywane są w puli wątków `password_hasher`)
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
+
+    # Czy hasło zapisano inną metodą lub słabszym współczynnikiem pracy niż PASSWORD_HASH_METHOD
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password)
 
 
 class Employee(db.Model):
     __tablename__ = 'employees'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
     first_name = db.Column(db.String(255), nullable=False, index=True)
     last_name = db.Column(db.String(255), nullable=False, index=True)
     email = db.Column(db.String(255))
@@ -46,9 +51,6 @@ class Employee(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    # Relacje
-    loans = db.relationship('Loan', backref='employee', lazy=True)
-
 
 class Category(db.Model):
     __tablename__ = 'categories'
@@ -61,6 +63,8 @@ class Category(db.Model):
 
 class Author(db.Model):
     __tablename__ = 'authors'
+    # Unikalność imienia i nazwiska pozwala na wstawianie autorów przez INSERT ... ON CONFLICT
+    __table_args__ = (db.UniqueConstraint('first_name', 'last_name', name='uq_authors_name'),)
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(255), nullable=False)
     last_name = db.Column(db.String(255), nullable=False)
@@ -79,20 +83,37 @@ class Book(db.Model):
     title = db.Column(db.String(255), nullable=False, index=True)
     isbn = db.Column(db.String(20), index=True)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'))
-    status = db.Column(db.String(50), default='Dostępna')
     publication_year = db.Column(db.Integer)
     publisher = db.Column(db.String(255))
-    quantity = db.Column(db.Integer, default=1)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Dokument wyszukiwania pełnotekstowego, utrzymywany przez wyzwalacze w PostgreSQL
+    search_vector = db.deferred(db.Column(db.Text().with_variant(TSVECTOR(), 'postgresql')))
 
     # Relacje
     loans = db.relationship('Loan', backref='book', lazy=True)
     reservations = db.relationship('Reservation', backref='book', lazy=True)
+    copies = db.relationship('Copy', backref='book', lazy=True)
     # Relacja wielu-do-wielu z Author
     authors = db.relationship('Author', secondary=book_author, backref=db.backref('books', lazy='dynamic'))
 
 
+# Egzemplarze książek: jeden wiersz na fizyczny egzemplarz z kodem kreskowym (app/circulation.py).
+# Liczba dostępnych egzemplarzy wyznaczana jest zliczeniem po indeksie (book_id, status), więc wypożyczenia
+# i zwroty zmieniają wyłącznie wiersze egzemplarzy, a nie wspólny wiersz książki.
+class Copy(db.Model):
+    __tablename__ = 'copies'
+    __table_args__ = (db.Index('ix_copies_book_id_status', 'book_id', 'status'),)
+    id = db.Column(db.Integer, primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False)
+    barcode = db.Column(db.String(64), nullable=False, unique=True, index=True)
+    # Dostępny, Wypożyczony, Odłożony (dla rezerwacji) albo Wycofany
+    status = db.Column(db.String(50), nullable=False, default='Dostępny')
+    location = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Borrower(db.Model):
     __tablename__ = 'borrowers'
     id = db.Column(db.Integer, primary_key=True)
@@ -114,19 +135,125 @@ class Borrower(db.Model):
 
 class Loan(db.Model):
     __tablename__ = 'loans'
+    # Indeks częściowy aktywnych wypożyczeń po terminie zwrotu - wyszukiwanie przetrzymanych książek
+    __table_args__ = (db.Index('ix_loans_active_return_date', 'return_date',
+                               postgresql_where=db.text("status = 'Wypożyczona'"),
+                               sqlite_where=db.text("status = 'Wypożyczona'")),)
     id = db.Column(db.Integer, primary_key=True)
-    book_id = db.Column(db.Integer, db.ForeignKey('books.id'))
-    borrower_id = db.Column(db.Integer, db.ForeignKey('borrowers.id'))
-    loan_date = db.Column(db.DateTime, nullable=False)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id'), index=True)
+    copy_id = db.Column(db.Integer, db.ForeignKey('copies.id'), index=True)
+    borrower_id = db.Column(db.Integer, db.ForeignKey('borrowers.id'), index=True)
+    loan_date = db.Column(db.DateTime, nullable=False, index=True)
     return_date = db.Column(db.DateTime)
     status = db.Column(db.String(50), default='Wypożyczona')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+# Rezerwacje: kolejka FIFO czytelników oczekujących na egzemplarz danej książki (app/circulation.py).
+# Indeks kolejki pozwala odczytać jej początek i pozycję rezerwacji zakresem indeksu, bez sortowania.
+class Reservation(db.Model):
+    __tablename__ = 'reservations'
+    __table_args__ = (db.Index('ix_reservations_queue', 'book_id', 'status', 'reservation_date', 'id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id'))
+    borrower_id = db.Column(db.Integer, db.ForeignKey('borrowers.id'), index=True)
+    reservation_date = db.Column(db.DateTime, nullable=False)
+    # Oczekująca -> Przydzielona (egzemplarz odłożony dla czytelnika) -> Zrealizowana; albo Anulowana
+    status = db.Column(db.String(50), default='Oczekująca')
+    allocated_at = db.Column(db.DateTime)
+    # Egzemplarz odłożony dla przydzielonej rezerwacji
+    copy_id = db.Column(db.Integer, db.ForeignKey('copies.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class LoanHistory(db.Model):
     __tablename__ = 'loan_history'
+    # Filtrowanie po statusie ze stronicowaniem po ID oraz wyszukiwanie aktywnych wypożyczeń po terminie zwrotu
+    __table_args__ = (db.Index('ix_loan_history_status_id', 'status', 'id'),
+                      db.Index('ix_loan_history_active_return_date', 'return_date',
+                               postgresql_where=db.text("status = 'Wypożyczona'"),
+                               sqlite_where=db.text("status = 'Wypożyczona'")))
     id = db.Column(db.Integer, primary_key=True)
-    loan_id = db.Column(db.Integer, db.ForeignKey('loans.id'))
-    checkout_date = db.Column(db.DateTime, nullable=False)
+    loan_id = db.Column(db.Integer, db.ForeignKey('loans.id'), index=True)
+    checkout_date = db.Column(db.DateTime, nullable=False, index=True)
     return_date = db.Column(db.DateTime, nullable=False)
+    # Kopia danych książki, czytelnika i statusu wypożyczenia (spóźniony zwrot ma status 'Przetrzymana'),
+    # dzięki której lista historii nie wymaga złączeń.
+    # Utrzymywana przy wypożyczeniu, zwrocie oraz edycji książki lub czytelnika (app/history.py).
+    book_id = db.Column(db.Integer, index=True)
+    borrower_id = db.Column(db.Integer, index=True)
+    book_title = db.Column(db.String(255))
+    book_authors = db.Column(db.Text)
+    borrower_first_name = db.Column(db.String(255))
+    borrower_last_name = db.Column(db.String(255))
+    borrower_pesel = db.Column(db.String(11))
+    status = db.Column(db.String(50))
+
+
+# Liczniki wersji tabel, zwiększane przy każdym zapisie.
+# Służą do wyznaczania nagłówków ETag i unieważniania pamięci podręcznej odpowiedzi.
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+# Raporty analityczne generowane w tle (flask report-worker). Wynik raportu o tym samym typie
+# i parametrach (`params_key`) jest zwracany ponownie, dopóki nie jest starszy niż REPORT_MAX_AGE.
+class Report(db.Model):
+    __tablename__ = 'reports'
+    __table_args__ = (db.Index('ix_reports_type_params_key', 'type', 'params_key', 'created_at'),
+                      db.Index('ix_reports_status_created_at', 'status', 'created_at'))
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(255), nullable=False)
+    generated_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    params = db.Column(db.JSON, nullable=False)
+    # Skrót parametrów zapisanych w postaci kanonicznej (app/reports.py)
+    params_key = db.Column(db.String(64), nullable=False)
+    # pending -> running -> done albo failed
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    result = db.deferred(db.Column(db.JSON))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+
+# Powiadomienia o zbliżającym się lub minionym terminie zwrotu (flask send-reminders).
+# Unikalność (wypożyczenie, rodzaj, termin zwrotu) sprawia, że ponowne uruchomienie zadania
+# nie tworzy powiadomienia ani wiadomości e-mail po raz drugi.
+class Notification(db.Model):
+    __tablename__ = 'notifications'
+    __table_args__ = (db.UniqueConstraint('loan_id', 'type', 'due_date', name='uq_notifications_loan_type_due_date'),)
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    loan_id = db.Column(db.Integer, db.ForeignKey('loans.id'))
+    # due_soon albo overdue
+    type = db.Column(db.String(20), nullable=False)
+    due_date = db.Column(db.DateTime, nullable=False)
+    recipient = db.Column(db.String(255))
+    message = db.Column(db.Text)
+    status = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+# Kolejka wiadomości e-mail do wysłania (outbox).
+# Endpointy jedynie zapisują wiadomość w tej tabeli; wysyłką zajmuje się proces `flask mail-worker`.
+class OutgoingEmail(db.Model):
+    __tablename__ = 'email_outbox'
+    __table_args__ = (db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),)
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    # pending -> sending -> sent; po wyczerpaniu prób: failed
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
@@ -0,0 +1,107 @@
+# Stronicowanie kursorowe (keyset) dla endpointów zwracających listy.
+# Zamiast OFFSET każda strona zaczyna się za kluczem ostatniego rekordu poprzedniej strony,
+# dzięki czemu pobranie strony N kosztuje tyle samo co pobranie pierwszej. Kluczem jest zindeksowana
+# kolumna (np. ID) albo krotka kolumn, gdy lista uporządkowana jest inaczej niż po ID (np. data, ID).
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import DateTime, tuple_
+
+
+def _key_columns(key_column):
+    return key_column if isinstance(key_column, tuple) else (key_column,)
+
+
+# Klucz rekordu: wartość kolumny klucza albo krotka wartości kolumn klucza
+def row_key(row, key_column):
+    if isinstance(key_column, tuple):
+        return tuple(getattr(row, column.key) for column in key_column)
+    return getattr(row, key_column.key)
+
+
+# Zamiana klucza na nieprzezroczysty kursor przekazywany klientowi
+def encode_cursor(key):
+    if isinstance(key, tuple):
+        key = [value.isoformat() if isinstance(value, datetime) else value for value in key]
+    raw = json.dumps({'k': key}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+# Odczytanie klucza z kursora (liczba albo krotka wartości klucza złożonego).
+# Rzuca ValueError, jeśli kursor jest nieprawidłowy.
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key = json.loads(raw)['k']
+        return tuple(key) if isinstance(key, list) else int(key)
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError('Nieprawidłowy kursor') from e
+
+
+# Warunek "za kluczem `after`"; dla klucza złożonego porównanie wierszy (kolumny...) > (wartości...).
+# Rzuca ValueError, jeśli kursor nie pasuje do klucza endpointu.
+def after_key(key_column, after):
+    columns = _key_columns(key_column)
+    values = after if isinstance(after, tuple) else (after,)
+    if len(values) != len(columns):
+        raise ValueError('Nieprawidłowy kursor')
+    try:
+        values = tuple(datetime.fromisoformat(value) if isinstance(column.type, DateTime) else int(value)
+                       for column, value in zip(columns, values))
+    except (TypeError, ValueError) as e:
+        raise ValueError('Nieprawidłowy kursor') from e
+
+    if len(columns) == 1:
+        return columns[0] > values[0]
+    return tuple_(*columns) > tuple_(*values)
+
+
+# Odczytanie parametrów `limit` i `after` z adresu zapytania (domyślnie bieżącego żądania Flaska)
+def get_page_args(args=None):
+    args = request.args if args is None else args
+    limit = args.get('limit')
+    if limit is None:
+        limit = current_app.config.get('PAGINATION_DEFAULT_LIMIT')
+    else:
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError('Limit musi być dodatni')
+
+    if limit is not None:
+        limit = min(limit, current_app.config.get('PAGINATION_MAX_LIMIT', 1000))
+
+    after = args.get('after')
+    return limit, decode_cursor(after) if after else None
+
+
+# Zapytanie o rekordy strony: za kluczem `after`, o jeden więcej niż `limit` - dodatkowy rekord pozwala
+# stwierdzić, czy istnieje następna strona
+def page_query(query, key_column, limit, after):
+    if after is not None:
+        query = query.filter(after_key(key_column, after))
+    query = query.order_by(*_key_columns(key_column))
+    return query if limit is None else query.limit(limit + 1)
+
+
+# Podział pobranych rekordów na bieżącą stronę i kursor następnej strony (albo None, jeśli to ostatnia strona)
+def split_page(rows, key_column, limit):
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(row_key(rows[-1], key_column))
+
+
+# Nałożenie stronicowania na zapytanie uporządkowane po zindeksowanym kluczu `key_column` (kolumnie lub krotce kolumn).
+# Zwraca rekordy bieżącej strony oraz kursor następnej strony (albo None, jeśli to ostatnia strona).
+def paginate(query, key_column):
+    limit, after = get_page_args()
+    return split_page(page_query(query, key_column, limit, after).all(), key_column, limit)
+
+
+# Dołączenie kursora następnej strony do odpowiedzi
+def with_next_cursor(response, next_cursor):
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
@@ -0,0 +1,66 @@
+# Haszowanie i weryfikacja haseł w osobnej, ograniczonej puli wątków.
+# Funkcje skrótu z hashlib (scrypt, PBKDF2) zwalniają GIL, więc obliczenia wykonywane są równolegle,
+# a limit wątków i kolejki sprawia, że fala logowań nie zajmuje całego procesora kosztem pozostałych zapytań.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._method = None
+        self._normalized_method = None
+        self._wait_timeout = None
+
+    def configure(self, config):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            workers = config.get('PASSWORD_HASH_WORKERS', 2)
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hasher')
+            # Liczba operacji wykonywanych i oczekujących naraz; kolejne żądania dostają odpowiedź 503
+            self._slots = threading.BoundedSemaphore(workers + config.get('PASSWORD_HASH_QUEUE_SIZE', 32))
+            self._wait_timeout = config.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5)
+            self._method = config.get('PASSWORD_HASH_METHOD', 'scrypt')
+            self._normalized_method = None
+
+    def _submit(self, func, *args):
+        if self._executor is None:
+            self.configure(current_app.config)
+        if not self._slots.acquire(timeout=self._wait_timeout):
+            raise PasswordHasherBusy()
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._submit(generate_password_hash, password, self._method)
+
+    def verify(self, pwhash, password):
+        return self._submit(check_password_hash, pwhash, password)
+
+    # Pełna nazwa metody z parametrami, np. "scrypt:32768:8:1" lub "pbkdf2:sha256:600000"
+    @property
+    def method(self):
+        if self._normalized_method is None:
+            if self._executor is None:
+                self.configure(current_app.config)
+            self._normalized_method = generate_password_hash('', self._method).split('$', 1)[0]
+        return self._normalized_method
+
+    # Czy skrót został utworzony inną metodą lub innym współczynnikiem pracy niż obecnie skonfigurowany
+    def needs_rehash(self, pwhash):
+        return pwhash.split('$', 1)[0] != self.method
+
+
+password_hasher = PasswordHasher()
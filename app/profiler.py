@@ -0,0 +1,133 @@
+# Profilowanie zapytań SQL wykonywanych w trakcie żądania.
+# Zdarzenia silnika SQLAlchemy zliczają instrukcje, łączny czas bazy danych i powtórzenia tej samej
+# instrukcji (różniącej się tylko parametrami), co pozwala wykryć wzorzec N+1.
+# Włączane ustawieniem SQL_PROFILER_ENABLED; w testach dostępny menedżer kontekstu `query_budget`.
+import contextvars
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Aktywne liczniki bieżącego wątku (żądanie i ewentualne limity zapytań z testów mogą się zagnieżdżać)
+_active = contextvars.ContextVar('sql_profiler_active', default=())
+
+_IN_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+# Postać instrukcji bez zmiennej długości list IN, aby zapytania różniące się tylko parametrami były równe
+def statement_shape(statement):
+    return _IN_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    def __init__(self):
+        self.statements = 0
+        self.total_ms = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, elapsed_ms):
+        self.statements += 1
+        self.total_ms += elapsed_ms
+        self.shapes[statement_shape(statement)] += 1
+
+    # Instrukcje SELECT wykonane więcej niż `threshold` razy: lista (liczba wykonań, instrukcja)
+    def repeated_selects(self, threshold):
+        return [(count, shape) for shape, count in self.shapes.most_common()
+                if count > threshold and shape.upper().startswith(('SELECT', 'WITH'))]
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.shapes.values() if count > 1)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info.setdefault('sql_profiler_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _active.get()
+    if not collectors:
+        return
+    starts = conn.info.get('sql_profiler_start')
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000 if starts else 0.0
+    for stats in collectors:
+        stats.record(statement, elapsed_ms)
+
+
+@contextmanager
+def collect_queries():
+    stats = QueryStats()
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+
+# Limit zapytań dla fragmentu kodu, np. w testach:
+#     with query_budget(2):
+#         client.get('/api/books')
+# Po przekroczeniu limitu zgłaszany jest QueryBudgetExceeded (podklasa AssertionError).
+@contextmanager
+def query_budget(max_queries, max_repeated=None):
+    with collect_queries() as stats:
+        yield stats
+    if stats.statements > max_queries:
+        raise QueryBudgetExceeded(f'Wykonano {stats.statements} zapytań SQL, limit: {max_queries}')
+    if max_repeated is not None:
+        repeated = stats.repeated_selects(max_repeated)
+        if repeated:
+            count, shape = repeated[0]
+            raise QueryBudgetExceeded(f'Zapytanie wykonane {count} razy (limit: {max_repeated}): {shape}')
+
+
+# Rejestracja profilowania żądań: nagłówki X-DB-* w odpowiedzi, wpis w logu
+# i ostrzeżenie, gdy endpoint wielokrotnie wykonuje to samo zapytanie SELECT
+def init_profiler(app):
+    if not app.config.get('SQL_PROFILER_ENABLED'):
+        return
+
+    threshold = app.config.get('SQL_PROFILER_REPEAT_THRESHOLD', 5)
+    add_headers = app.config.get('SQL_PROFILER_HEADERS', True)
+
+    @app.before_request
+    def _start_profiling():
+        g.sql_profiler = collect_queries()
+        g.sql_stats = g.sql_profiler.__enter__()
+
+    @app.after_request
+    def _report_profiling(response):
+        stats = g.get('sql_stats')
+        if stats is None:
+            return response
+
+        if add_headers:
+            response.headers['X-DB-Query-Count'] = str(stats.statements)
+            response.headers['X-DB-Time-Ms'] = f'{stats.total_ms:.2f}'
+            response.headers['X-DB-Duplicate-Queries'] = str(stats.duplicates)
+
+        endpoint = request.url_rule.rule if request.url_rule else request.path
+        app.logger.info('%s %s: %d zapytań SQL, %.2f ms, powtórzeń: %d', request.method, endpoint,
+                        stats.statements, stats.total_ms, stats.duplicates)
+        for count, shape in stats.repeated_selects(threshold):
+            app.logger.warning('Możliwe N+1 w %s %s: zapytanie wykonane %d razy: %s', request.method, endpoint,
+                               count, shape)
+        return response
+
+    @app.teardown_request
+    def _stop_profiling(exc):
+        profiler = g.pop('sql_profiler', None)
+        if profiler is not None:
+            profiler.__exit__(None, None, None)
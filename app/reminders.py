@@ -0,0 +1,115 @@
+# Przypomnienia o terminie zwrotu (flask send-reminders, uruchamiane np. raz dziennie z crona).
+# Aktywne wypożyczenia z terminem zwrotu w ciągu REMINDER_DAYS_BEFORE dni oraz przetrzymane wyszukiwane są
+# jednym zapytaniem zakresowym po indeksie częściowym `ix_loans_active_return_date`, z pominięciem tych,
+# dla których powiadomienie już zapisano. Powiadomienia zapisywane są partiami przez INSERT ... ON CONFLICT DO NOTHING,
+# a wiadomości dla nowo zapisanych powiadomień trafiają w tej samej transakcji do kolejki e-mail (app/mailer.py).
+import logging
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import case, exists, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+from app.filters import overdue_since
+from app.mailer import MailWorker, require_smtp_config
+from app.models import Book, Borrower, Loan, Notification, OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+SUBJECTS = {
+    'due_soon': 'Przypomnienie o terminie zwrotu książki',
+    'overdue': 'Minął termin zwrotu książki',
+}
+
+
+def _insert(table):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def build_message(kind, first_name, title, due_date):
+    if kind == 'overdue':
+        text = f"termin zwrotu książki \"{title}\" minął {due_date:%d.%m.%Y}. Prosimy o jak najszybszy zwrot."
+    else:
+        text = f"przypominamy, że termin zwrotu książki \"{title}\" mija {due_date:%d.%m.%Y}."
+    return f"Dzień dobry {first_name},\n\n{text}\n\nBiblioteka"
+
+
+# Wypożyczenia wymagające przypomnienia: (ID, termin zwrotu, rodzaj, e-mail, imię, tytuł)
+def pending_reminders(since, horizon):
+    kind = case((Loan.return_date < since, 'overdue'), else_='due_soon')
+    notified = exists().where(Notification.loan_id == Loan.id, Notification.type == kind,
+                              Notification.due_date == Loan.return_date)
+    return db.session.query(Loan.id, Loan.return_date, kind, Borrower.email, Borrower.first_name,
+                            func.coalesce(Book.title, 'wypożyczonej książki')) \
+        .join(Borrower, Borrower.id == Loan.borrower_id) \
+        .outerjoin(Book, Book.id == Loan.book_id) \
+        .filter(Loan.status == 'Wypożyczona', Loan.return_date < horizon,
+                Borrower.email.isnot(None), Borrower.email != '', ~notified) \
+        .order_by(Loan.return_date, Loan.id) \
+        .all()
+
+
+# Zapisanie partii powiadomień i wiadomości; zwraca liczbę nowych powiadomień.
+# Wiadomości dodawane są tylko dla wierszy faktycznie wstawionych (RETURNING), więc równoległe
+# uruchomienie zadania nie wyśle przypomnienia dwa razy.
+def _record_batch(batch, now):
+    notifications = [{'loan_id': loan_id, 'type': kind, 'due_date': due_date, 'recipient': email,
+                      'message': build_message(kind, first_name, title, due_date), 'status': 'queued',
+                      'created_at': now, 'updated_at': now}
+                     for loan_id, due_date, kind, email, first_name, title in batch]
+    inserted = db.session.execute(
+        _insert(Notification.__table__)
+        .on_conflict_do_nothing(index_elements=['loan_id', 'type', 'due_date'])
+        .returning(Notification.recipient, Notification.type, Notification.message),
+        notifications
+    ).all()
+    if inserted:
+        db.session.execute(db.insert(OutgoingEmail), [
+            {'recipient': recipient, 'subject': SUBJECTS[kind], 'body': message, 'status': 'pending',
+             'attempts': 0, 'next_attempt_at': now, 'created_at': now}
+            for recipient, kind, message in inserted
+        ])
+    db.session.commit()
+    return len(inserted)
+
+
+def send_reminders(days_before=None, batch_size=None):
+    config = current_app.config
+    days_before = config.get('REMINDER_DAYS_BEFORE', 3) if days_before is None else days_before
+    batch_size = batch_size or config.get('REMINDER_BATCH_SIZE', 1000)
+    since = overdue_since()
+    horizon = since + timedelta(days=days_before + 1)
+
+    start = time.perf_counter()
+    rows = pending_reminders(since, horizon)
+    now = datetime.utcnow()
+    created = 0
+    for offset in range(0, len(rows), batch_size):
+        created += _record_batch(rows[offset:offset + batch_size], now)
+    logger.info('Przypomnienia: %d nowych z %d wypożyczeń w %.2f s', created, len(rows), time.perf_counter() - start)
+    return created
+
+
+# Polecenie CLI: flask send-reminders (z --send od razu wysyła oczekujące przypomnienia jednym połączeniem SMTP;
+# pozostałe wiadomości z kolejki wysyła flask mail-worker)
+@click.command('send-reminders')
+@click.option('--days-before', type=int, help='Ile dni przed terminem zwrotu wysłać przypomnienie '
+                                               '(domyślnie REMINDER_DAYS_BEFORE).')
+@click.option('--batch-size', type=int, help='Liczba powiadomień zapisywanych w jednej transakcji.')
+@click.option('--send', is_flag=True, help='Wyślij oczekujące przypomnienia po zapisaniu powiadomień.')
+@with_appcontext
+def send_reminders_command(days_before, batch_size, send):
+    if send:
+        require_smtp_config(current_app.config)
+    logging.basicConfig(level=logging.INFO)
+    created = send_reminders(days_before, batch_size)
+    click.echo(f"Zapisano przypomnień: {created}")
+    if send:
+        sent, failed = MailWorker(threads=1, subjects=SUBJECTS.values()).run(once=True)
+        click.echo(f"Wysłano: {sent}, nieudane próby: {failed}")
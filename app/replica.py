@@ -0,0 +1,28 @@
+# Kierowanie odczytów do repliki bazy danych (bind `replica`, ustawienie DATABASE_REPLICA_URL).
+# Zapytania SELECT wykonywane w żądaniach GET trafiają do repliki; zapisy, odczyty z blokadą (FOR UPDATE)
+# oraz wszystkie zapytania sesji po pierwszym zapisie trafiają do bazy głównej, więc żądanie zawsze widzi
+# własne zmiany. Sesja kończy się razem z kontekstem aplikacji, a kolejne żądanie znowu czyta z repliki.
+# Bez skonfigurowanej repliki wszystkie zapytania trafiają do bazy głównej.
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+READ_METHODS = ('GET', 'HEAD')
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        # Wywołanie bez zapytania (np. sprawdzenie dialektu) nie zmienia kierowania sesji
+        if bind is None and (mapper is not None or clause is not None):
+            if self._reads_from_replica(clause):
+                return self._db.engines[REPLICA_BIND]
+            self.info['primary'] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self, clause):
+        return (not self.info.get('primary')
+                and getattr(clause, 'is_select', False)
+                and getattr(clause, '_for_update_arg', None) is None
+                and has_request_context()
+                and request.method in READ_METHODS
+                and REPLICA_BIND in self._db.engines)
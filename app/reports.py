@@ -0,0 +1,320 @@
+# Raporty analityczne: wypożyczenia w kolejnych miesiącach, najczęściej wypożyczane tytuły,
+# wykorzystanie kategorii i aktywność czytelników.
+# Endpoint jedynie zapisuje zamówienie raportu w tabeli `reports`. Raport budowany jest w puli procesów
+# przez `flask report-worker` jednym zapytaniem agregującym po stronie bazy, a zapisany wynik zwracany jest
+# kolejnym zamówieniom o tych samych parametrach, dopóki nie jest starszy niż REPORT_MAX_AGE.
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import case, distinct, func
+
+from app import create_app, db
+from app.models import Book, Category, Copy, Loan, LoanHistory, Report
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 1000
+
+
+def _period(column, params):
+    criteria = []
+    if 'from' in params:
+        criteria.append(column >= datetime.strptime(params['from'], '%Y-%m-%d'))
+    if 'to' in params:
+        criteria.append(column < datetime.strptime(params['to'], '%Y-%m-%d') + timedelta(days=1))
+    return criteria
+
+
+# Miesiąc daty w postaci RRRR-MM (SQLite nie ma funkcji date_trunc)
+def _month(column):
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.strftime('%Y-%m', column)
+    return func.to_char(func.date_trunc('month', column), 'YYYY-MM')
+
+
+# Zamiana wierszy wyniku na słowniki zapisywane jako JSON
+def _rows(query):
+    rows = []
+    for row in query:
+        item = {}
+        for key, value in row._mapping.items():
+            if isinstance(value, Decimal):
+                value = int(value) if value == value.to_integral_value() else float(value)
+            elif isinstance(value, datetime):
+                value = value.strftime('%Y-%m-%d')
+            item[key] = value
+        rows.append(item)
+    return rows
+
+
+def loans_per_month(params):
+    month = _month(LoanHistory.checkout_date).label('month')
+    return _rows(db.session.query(
+        month,
+        func.count().label('loans'),
+        func.count(distinct(LoanHistory.borrower_id)).label('readers'),
+        func.sum(case((LoanHistory.status == 'Przetrzymana', 1), else_=0)).label('late_returns')
+    ).filter(*_period(LoanHistory.checkout_date, params))
+        .group_by(month)
+        .order_by(month))
+
+
+def most_borrowed(params):
+    loans = func.count().label('loans')
+    return _rows(db.session.query(
+        LoanHistory.book_id,
+        func.max(LoanHistory.book_title).label('title'),
+        func.max(LoanHistory.book_authors).label('authors'),
+        loans,
+        func.count(distinct(LoanHistory.borrower_id)).label('readers')
+    ).filter(LoanHistory.book_id.isnot(None), *_period(LoanHistory.checkout_date, params))
+        .group_by(LoanHistory.book_id)
+        .order_by(loans.desc(), LoanHistory.book_id)
+        .limit(params['limit']))
+
+
+# Wykorzystanie kategorii: liczba tytułów, dostępne egzemplarze, aktywne wypożyczenia
+# oraz wypożyczenia w wybranym okresie. Pole `utilization` to udział wypożyczonych egzemplarzy.
+def category_utilization(params):
+    books = db.session.query(
+        Book.category_id.label('category_id'),
+        func.count(distinct(Book.id)).label('titles'),
+        func.count(Copy.id).label('available')
+    ).outerjoin(Copy, db.and_(Copy.book_id == Book.id, Copy.status == 'Dostępny')) \
+        .group_by(Book.category_id).subquery()
+
+    period = _period(Loan.loan_date, params)
+    loans = db.session.query(
+        Book.category_id.label('category_id'),
+        func.count(case((db.and_(*period), Loan.id)) if period else Loan.id).label('loans'),
+        func.sum(case((Loan.status == 'Wypożyczona', 1), else_=0)).label('active')
+    ).join(Book, Book.id == Loan.book_id).group_by(Book.category_id).subquery()
+
+    rows = _rows(db.session.query(
+        books.c.category_id,
+        Category.name.label('category'),
+        books.c.titles,
+        books.c.available,
+        func.coalesce(loans.c.active, 0).label('active'),
+        func.coalesce(loans.c.loans, 0).label('loans')
+    ).outerjoin(Category, Category.id == books.c.category_id)
+        .outerjoin(loans, func.coalesce(loans.c.category_id, 0) == func.coalesce(books.c.category_id, 0))
+        .order_by(books.c.category_id))
+
+    for row in rows:
+        if row['category'] is None:
+            row['category'] = 'Brak kategorii'
+        copies = row['available'] + row['active']
+        row['utilization'] = round(row['active'] / copies, 4) if copies else 0.0
+    return rows
+
+
+def reader_activity(params):
+    loans = func.count().label('loans')
+    return _rows(db.session.query(
+        LoanHistory.borrower_id,
+        func.max(LoanHistory.borrower_first_name).label('first_name'),
+        func.max(LoanHistory.borrower_last_name).label('last_name'),
+        loans,
+        func.sum(case((LoanHistory.status == 'Wypożyczona', 1), else_=0)).label('active'),
+        func.sum(case((LoanHistory.status == 'Przetrzymana', 1), else_=0)).label('late_returns'),
+        func.max(LoanHistory.checkout_date).label('last_loan_date')
+    ).filter(LoanHistory.borrower_id.isnot(None), *_period(LoanHistory.checkout_date, params))
+        .group_by(LoanHistory.borrower_id)
+        .order_by(loans.desc(), LoanHistory.borrower_id)
+        .limit(params['limit']))
+
+
+# Typ raportu: (funkcja budująca, dozwolone parametry)
+REPORT_TYPES = {
+    'loans_per_month': (loans_per_month, ('from', 'to')),
+    'most_borrowed': (most_borrowed, ('from', 'to', 'limit')),
+    'category_utilization': (category_utilization, ('from', 'to')),
+    'reader_activity': (reader_activity, ('from', 'to', 'limit')),
+}
+
+
+# Sprawdzenie parametrów i zapisanie ich w postaci kanonicznej. Rzuca ValueError z opisem błędu.
+def normalize_params(report_type, params):
+    if report_type not in REPORT_TYPES:
+        raise ValueError('Nieznany typ raportu')
+    if not isinstance(params, dict):
+        raise ValueError('Parametry raportu muszą być obiektem')
+    allowed = REPORT_TYPES[report_type][1]
+    unknown = sorted(set(params) - set(allowed))
+    if unknown:
+        raise ValueError(f"Nieobsługiwane parametry raportu: {', '.join(unknown)}")
+
+    normalized = {}
+    for name in ('from', 'to'):
+        if params.get(name) is not None:
+            try:
+                normalized[name] = datetime.strptime(params[name], '%Y-%m-%d').strftime('%Y-%m-%d')
+            except (TypeError, ValueError):
+                raise ValueError(f'Nieprawidłowa data w parametrze {name}')
+    if 'limit' in allowed:
+        limit = params.get('limit', DEFAULT_LIMIT)
+        if not isinstance(limit, int) or isinstance(limit, bool) or not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f'Parametr limit musi być liczbą od 1 do {MAX_LIMIT}')
+        normalized['limit'] = limit
+    return normalized
+
+
+def params_key(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+# Zamówienie raportu: zwraca (raport, czy utworzono nowe zamówienie). Aktualny wynik albo raport
+# oczekujący na wygenerowanie o tych samych parametrach jest używany ponownie; transakcję zatwierdza wywołujący.
+def request_report(report_type, params, user_id):
+    params = normalize_params(report_type, params)
+    key = params_key(params)
+    fresh_since = datetime.utcnow() - timedelta(seconds=current_app.config.get('REPORT_MAX_AGE', 3600))
+    report = Report.query \
+        .filter(Report.type == report_type, Report.params_key == key,
+                db.or_(Report.status.in_(('pending', 'running')),
+                       db.and_(Report.status == 'done', Report.finished_at >= fresh_since))) \
+        .order_by(Report.created_at.desc()) \
+        .first()
+    if report is not None:
+        return report, False
+
+    report = Report(type=report_type, params=params, params_key=key, status='pending', generated_by=user_id,
+                    created_at=datetime.utcnow())
+    db.session.add(report)
+    return report, True
+
+
+def serialize_report(report):
+    data = {
+        'id': report.id,
+        'type': report.type,
+        'params': report.params,
+        'status': report.status,
+        'created_at': report.created_at.strftime('%Y-%m-%d %H:%M:%S') if report.created_at else None,
+        'finished_at': report.finished_at.strftime('%Y-%m-%d %H:%M:%S') if report.finished_at else None
+    }
+    if report.status == 'done':
+        data['rows'] = report.result['rows']
+    elif report.status == 'failed':
+        data['error'] = report.error
+    return data
+
+
+# Aplikacja procesu puli
+_app = None
+
+
+# Inicjalizacja procesu puli: własna aplikacja z konfiguracją procesu nadrzędnego, a więc i własne połączenia
+# (połączeń odziedziczonych po procesie nadrzędnym nie wolno używać w procesie potomnym)
+def _init_process(config):
+    global _app
+    _app = create_app(config)
+
+
+# Zbudowanie raportu w procesie puli; zwraca (ID raportu, czy się udało)
+def _generate(report_id):
+    with _app.app_context():
+        try:
+            report = db.session.get(Report, report_id)
+            build = REPORT_TYPES[report.type][0]
+            start = time.perf_counter()
+            try:
+                rows = build(report.params)
+            except Exception as e:
+                db.session.rollback()
+                logger.exception('Nie udało się wygenerować raportu %s', report_id)
+                db.session.execute(
+                    db.update(Report)
+                    .where(Report.id == report_id)
+                    .values(status='failed', error=str(e)[:1000], finished_at=datetime.utcnow())
+                )
+                db.session.commit()
+                return report_id, False
+
+            report.result = {'rows': rows}
+            report.status = 'done'
+            report.error = None
+            report.finished_at = datetime.utcnow()
+            db.session.commit()
+            logger.info('Raport %s (%s): %d wierszy w %.2f s', report_id, report.type, len(rows),
+                        time.perf_counter() - start)
+            return report_id, True
+        finally:
+            db.session.remove()
+
+
+class ReportWorker:
+    def __init__(self, processes=None):
+        config = current_app.config
+        self.processes = processes or config.get('REPORT_WORKER_PROCESSES', 2)
+        self.claim_timeout = config.get('REPORT_CLAIM_TIMEOUT', 1800)
+        self.poll_interval = config.get('REPORT_WORKER_POLL_INTERVAL', 2)
+        self.executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_process,
+                                            initargs=(dict(config),))
+
+    # Zarezerwowanie raportów do wygenerowania (po jednym na proces puli). Raporty zarezerwowane przez proces,
+    # który przestał działać, wracają do kolejki po upływie REPORT_CLAIM_TIMEOUT; w PostgreSQL wiersze
+    # zablokowane przez inny proces są pomijane (SKIP LOCKED).
+    def claim_batch(self):
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=self.claim_timeout)
+        reports = Report.query \
+            .filter(db.or_(Report.status == 'pending',
+                           db.and_(Report.status == 'running', Report.started_at < stale))) \
+            .order_by(Report.created_at, Report.id) \
+            .limit(self.processes) \
+            .with_for_update(skip_locked=True) \
+            .all()
+        report_ids = []
+        for report in reports:
+            report.status = 'running'
+            report.started_at = now
+            report_ids.append(report.id)
+        db.session.commit()
+        return report_ids
+
+    # Wygenerowanie jednej partii; zwraca (liczba gotowych, liczba nieudanych) lub None, gdy kolejka jest pusta
+    def process_batch(self):
+        report_ids = self.claim_batch()
+        if not report_ids:
+            return None
+        results = list(self.executor.map(_generate, report_ids))
+        done = sum(1 for _, ok in results if ok)
+        return done, len(results) - done
+
+    def run(self, once=False):
+        done = failed = 0
+        try:
+            while True:
+                counts = self.process_batch()
+                if counts is None:
+                    if once:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                done += counts[0]
+                failed += counts[1]
+        finally:
+            self.executor.shutdown(wait=True)
+        return done, failed
+
+
+# Polecenie CLI: flask report-worker (z --once generuje oczekujące raporty i kończy działanie)
+@click.command('report-worker')
+@click.option('--processes', type=int, help='Liczba procesów generujących (domyślnie REPORT_WORKER_PROCESSES).')
+@click.option('--once', is_flag=True, help='Wygeneruj oczekujące raporty i zakończ.')
+@with_appcontext
+def report_worker_command(processes, once):
+    logging.basicConfig(level=logging.INFO)
+    done, failed = ReportWorker(processes).run(once=once)
+    click.echo(f"Wygenerowano: {done}, nieudane: {failed}")
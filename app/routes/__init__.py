@@ -0,0 +1,5 @@
+# Endpointy aplikacji podzielone na blueprinty według obszarów.
+# To tutaj definiowane jest, co ma się stać, gdy użytkownik odwiedzi określony adres URL.
+from app.routes import auth, catalog, circulation, employees, readers
+
+BLUEPRINTS = (auth.bp, employees.bp, catalog.bp, readers.bp, circulation.bp)
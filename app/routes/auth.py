@@ -0,0 +1,201 @@
+# Endpointy logowania i konta użytkownika: token JWT, zmiana nazwy i hasła, resetowanie hasła.
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import create_access_token, jwt_required
+from itsdangerous import URLSafeTimedSerializer
+
+from app import db
+from app.models import User
+from app.versioning import bump_version
+from app.passwords import PasswordHasherBusy
+from app.identity import current_identity, current_user_id
+
+bp = Blueprint('auth', __name__)
+
+
+# Pula haszowania haseł jest przepełniona - klient powinien ponowić próbę
+@bp.app_errorhandler(PasswordHasherBusy)
+def password_hasher_busy(e):
+    return jsonify({'message': 'Serwer jest przeciążony, spróbuj ponownie za chwilę'}), 503, {'Retry-After': '1'}
+
+
+# Endpoint do logowania użytkownika. Sprawdza, czy dane logowania są poprawne i zwraca token JWT.
+@bp.route('/users/login', methods=['POST'])
+def login():
+    data = request.get_json()
+    username = data.get('username')
+    password = data.get('password')
+
+    # Sprawdzenie, czy użytkownik istnieje
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        return jsonify({'message': 'Nie znaleziono użytkownika z podanym adresem e-mail'}), 404
+
+    # Weryfikacja hasła
+    if not user.check_password(password):
+        return jsonify({'message': 'Nieprawidłowe hasło'}), 401
+
+    # Aktualizacja skrótu hasła zapisanego według wcześniejszych ustawień (np. niższego współczynnika pracy)
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
+
+    # Generowanie tokena JWT
+    access_token = generate_jwt_token(user)
+    return jsonify(access_token=access_token), 200
+
+
+# Endpoint do pobierania danych o konkretnym użytkowniku na podstawie jego ID.
+@bp.route('/users/<int:user_id>', methods=['GET'])
+@jwt_required()
+def get_user(user_id):
+    user = User.query.get_or_404(user_id)
+    return jsonify({'username': user.username}), 200
+
+
+# Endpoint do aktualizacji danych konkretnego użytkownika. Umożliwia zmianę nazwy użytkownika i hasła.
+@bp.route('/users/<int:user_id>', methods=['PUT'])
+@jwt_required()
+def update_user(user_id):
+    user = User.query.get_or_404(user_id)
+    data = request.get_json()
+
+    user.username = data.get('username', user.username)
+    if 'password' in data:
+        user.set_password(data['password'])
+
+    bump_version('users')
+    db.session.commit()
+    return jsonify({'message': 'Dane użytkownika zaktualizowane'}), 200
+
+
+# Endpoint do zmiany hasła przez użytkownika.
+@bp.route('/api/change-password', methods=['POST'])
+@jwt_required()
+def change_password():
+    user_id = current_user_id()
+    user = db.session.get(User, user_id) if user_id is not None else None
+
+    if not user:
+        return jsonify({'message': 'Użytkownik nie znaleziony'}), 404
+
+    data = request.get_json()
+    old_password = data.get('oldPassword')
+    new_password = data.get('newPassword')
+
+    if not user.check_password(old_password):
+        return jsonify({'message': 'Stare hasło jest nieprawidłowe'}), 401
+
+    if not new_password:
+        return jsonify({'message': 'Nowe hasło nie może być puste'}), 400
+
+    user.set_password(new_password)
+    db.session.commit()
+
+    return jsonify({'message': 'Hasło zostało zmienione'}), 200
+
+
+# Funkcja do generowania tokena JWT
+def generate_jwt_token(user):
+    return create_access_token(identity={'user_id': user.id, 'username': user.username, 'role_id': user.role_id})
+
+
+# Endpoint do aktualizacji nazwy użytkownika przez użytkownika.
+@bp.route('/api/update-username', methods=['PUT'])
+@jwt_required()
+def update_username():
+    user_id = current_user_id()
+    user = db.session.get(User, user_id) if user_id is not None else None
+
+    if not user:
+        return jsonify({'message': 'Użytkownik nie znaleziony'}), 404
+
+    data = request.get_json()
+    new_username = data.get('newUsername')
+
+    if not new_username:
+        return jsonify({'message': 'Nowa nazwa użytkownika nie może być pusta'}), 400
+
+    # Sprawdzenie, czy nowa nazwa użytkownika już istnieje
+    if User.query.filter_by(username=new_username).first():
+        return jsonify({'message': 'Nazwa użytkownika jest już zajęta'}), 400
+
+    user.username = new_username
+    bump_version('users')
+    db.session.commit()
+
+    new_token = generate_jwt_token(user)
+
+    return jsonify({'newToken': new_token}), 200
+
+
+@bp.route('/reset-password', methods=['POST'])
+def reset_password():
+    data = request.get_json()
+    username = data.get('email')
+
+    # Znajdowanie użytkownika po 'username', który faktycznie jest adresem email
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        return jsonify({'error': 'Nie znaleziono użytkownika z tym adresem email'}), 404
+
+    # Generowanie bezpiecznego tokenu
+    serializer = URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+    token = serializer.dumps(username, salt=current_app.config['SECURITY_PASSWORD_SALT'])
+
+    # Tworzenie linku do resetowania hasła
+    reset_link = f"http://localhost:3000/reset/{token}"
+
+    # Dodanie e-maila do kolejki; wysyła go proces `flask mail-worker` (moduł poczty importowany
+    # dopiero przy pierwszym resetowaniu hasła)
+    from app.mailer import enqueue_email
+    email_subject = "Resetowanie Hasła"
+    email_body = f"Twój link do resetowania hasła: {reset_link}"
+    enqueue_email(username, email_subject, email_body)
+    db.session.commit()
+
+    return jsonify({'message': 'Link do resetowania hasła został wysłany na e-mail'}), 200
+
+
+@bp.route('/reset/<token>', methods=['POST'])
+def reset_with_token(token):
+    try:
+        serializer = URLSafeTimedSerializer(current_app.config['SECRET_KEY'])
+        username = serializer.loads(token, salt=current_app.config['SECURITY_PASSWORD_SALT'], max_age=3600)
+    except:
+        return jsonify({'error': 'Nieprawidłowy lub przeterminowany link'}), 400
+
+    data = request.get_json()
+    new_password = data.get('password')
+
+    # Tutaj powinieneś zaktualizować hasło w bazie danych
+    user = User.query.filter_by(username=username).first()
+    if user:
+        user.set_password(new_password)
+        db.session.commit()
+        return jsonify({'message': 'Hasło zostało zresetowane'}), 200
+
+    return jsonify({'error': 'Nie znaleziono użytkownika'}), 404
+
+
+# Endpoint do pobierania szczegółów aktualnie zalogowanego użytkownika
+@bp.route('/api/user-details', methods=['GET'])
+@jwt_required()
+def get_user_details():
+    # Użytkownik, rola i dane pracownika z pamięci podręcznej tożsamości (jedno zapytanie o wersje tabel)
+    identity = current_identity()
+
+    if not identity:
+        return jsonify({'error': 'Użytkownik nie znaleziony'}), 404
+
+    if identity['role_id'] is None:
+        return jsonify({'error': 'Rola nie znaleziona'}), 404
+
+    user_details = {
+        'username': identity['username'],
+        'role': 'Admin' if identity['role_id'] == 1 else 'Pracownik'
+    }
+
+    if identity['role_id'] != 1 and identity['employee']:  # Dodatkowe informacje dla pracowników
+        user_details.update(identity['employee'])
+
+    return jsonify(user_details), 200
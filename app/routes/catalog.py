@@ -0,0 +1,358 @@
+# Endpointy katalogu: kategorie, książki, egzemplarze, import i wyszukiwanie.
+from flask import Blueprint, jsonify, request
+from sqlalchemy.exc import IntegrityError
+
+from app import db, importer, search, serializers
+from app.models import Category, Book, Author, book_author, Copy, Reservation
+from app.pagination import paginate, with_next_cursor
+from app.versioning import AVAILABILITY, bump_version, versioned
+from app.cache import response_cache
+from app.circulation import CirculationError, add_copies, delete_copies, withdraw_copy
+from app.history import refresh_books
+
+bp = Blueprint('catalog', __name__)
+
+
+# Endpoint do dodawania nowej kategorii.
+@bp.route('/api/categories', methods=['POST'])
+def add_category():
+    data = request.json
+    name = data.get('name')
+
+    if not name:
+        return jsonify({'error': 'Nazwa kategorii jest wymagana'}), 400
+
+    new_category = Category(name=name)
+    db.session.add(new_category)
+    bump_version('categories')
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({'message': 'Kategoria została pomyślnie dodana', 'category_id': new_category.id}), 201
+
+
+# Endpoint do pobierania listy wszystkich kategorii.
+@bp.route('/api/categories', methods=['GET'])
+@versioned('categories', cache=True)
+def get_categories():
+    categories = serializers.categories_query().all()
+    categories_data = serializers.serialize_categories(categories)
+
+    return jsonify(categories_data)
+
+
+# Endpoint do dodawania nowej książki do bazy.
+@bp.route('/api/books', methods=['POST'])
+def add_book():
+    data = request.json
+    title = data.get('title')
+    isbn = data.get('isbn')
+    category_id = data.get('category')
+    publication_year = data.get('publication_year')
+    publisher = data.get('publisher')
+    quantity = data.get('quantity', 1)
+    authors = data.get('authors')
+
+    if not title or not isbn or not category_id or not publication_year or not publisher or not quantity:
+        return jsonify({'error': 'Brakujące dane książki'}), 400
+    try:
+        quantity = int(quantity)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Nieprawidłowa liczba egzemplarzy'}), 400
+    if quantity < 1:
+        return jsonify({'error': 'Nieprawidłowa liczba egzemplarzy'}), 400
+
+    # Sprawdzenie, czy książka o tym samym ISBN już istnieje
+    existing_book = Book.query.filter_by(isbn=isbn).first()
+    if existing_book:
+        return jsonify({'error': 'Książka z tym ISBN już istnieje'}), 400
+
+    new_book = Book(
+        title=title,
+        isbn=isbn,
+        category_id=category_id,
+        publication_year=publication_year,
+        publisher=publisher
+    )
+
+    db.session.add(new_book)
+    db.session.flush()
+
+    for author in authors:
+        first_name = author.get('firstName')
+        last_name = author.get('lastName')
+        existing_author = Author.query.filter_by(first_name=first_name, last_name=last_name).first()
+        if not existing_author:
+            existing_author = Author(first_name=first_name, last_name=last_name)
+            db.session.add(existing_author)
+            db.session.flush()
+        association = book_author.insert().values(book_id=new_book.id, author_id=existing_author.id)
+        db.session.execute(association)
+
+    # Egzemplarze książki otrzymują kolejne kody kreskowe <ID książki>-<numer>
+    add_copies(new_book.id, quantity)
+
+    bump_version('books')
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({'message': 'Książka dodana pomyślnie', 'book_id': new_book.id}), 201
+
+
+@bp.route('/api/books', methods=['GET'])
+@versioned('books', 'categories', 'copies', AVAILABILITY, cache=True)
+def get_books():
+    # Pobieranie strony książek wraz z nazwami kategorii; autorzy pobierani są jednym zapytaniem dla całej strony
+    try:
+        books, next_cursor = paginate(serializers.books_query(), Book.id)
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowe parametry stronicowania'}), 400
+    books_data = serializers.serialize_books(books)
+    return with_next_cursor(jsonify(books_data), next_cursor), 200
+
+
+# Endpoint do masowego importu książek z pliku CSV lub JSONL (przesłanego jako pole `file` lub treść zapytania).
+@bp.route('/api/books/import', methods=['POST'])
+def import_books():
+    upload = request.files.get('file')
+    try:
+        if upload:
+            fmt = importer.detect_format(request.args.get('format'), upload.filename, upload.mimetype)
+            stream = upload.stream
+        else:
+            fmt = importer.detect_format(request.args.get('format'), mimetype=request.mimetype)
+            stream = request.stream
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    summary = importer.import_catalog(stream, fmt)
+    return jsonify(summary), 200
+
+
+# Endpoint do wyszukiwania książek po tytule, autorach, wydawnictwie i ISBN (od najlepiej dopasowanych).
+@bp.route('/api/books/search', methods=['GET'])
+@versioned('books', 'categories', 'copies', AVAILABILITY, cache=True)
+def search_books():
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'Fraza wyszukiwania jest wymagana'}), 400
+
+    try:
+        limit = min(int(request.args.get('limit', 20)), 100)
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowy limit'}), 400
+    if limit < 1:
+        return jsonify({'error': 'Nieprawidłowy limit'}), 400
+
+    return jsonify(search.search_books(q, limit)), 200
+
+
+# Usunięcie egzemplarza książki: dostępny egzemplarz jest wycofywany, a ostatni egzemplarz usuwany jest
+# razem z książką. Książki nie można usunąć, dopóki jej egzemplarz jest wypożyczony lub odłożony albo
+# czeka na nią rezerwacja. Egzemplarze są blokowane, więc równoległe wypożyczenie je pominie (SKIP LOCKED).
+@bp.route('/api/books/<int:book_id>', methods=['DELETE'])
+def delete_book(book_id):
+    book = Book.query.get_or_404(book_id)
+
+    statuses = [status for status, in db.session.query(Copy.status)
+                .filter(Copy.book_id == book_id)
+                .order_by(Copy.id)
+                .with_for_update()
+                .all()]
+    in_collection = sum(status != 'Wycofany' for status in statuses)
+    if in_collection > 1:
+        barcode = db.session.query(Copy.barcode) \
+            .filter(Copy.book_id == book_id, Copy.status == 'Dostępny') \
+            .order_by(Copy.id.desc()) \
+            .limit(1) \
+            .scalar()
+        if barcode is None:
+            return jsonify({'error': 'Brak dostępnych egzemplarzy do wycofania'}), 400
+        try:
+            withdraw_copy(barcode)
+        except CirculationError as e:
+            db.session.rollback()
+            return jsonify({'error': e.message}), e.status_code
+    else:
+        reserved = db.session.query(Reservation.id) \
+            .filter(Reservation.book_id == book_id, Reservation.status.in_(('Oczekująca', 'Przydzielona'))) \
+            .first()
+        if reserved is not None or any(status in ('Wypożyczony', 'Odłożony') for status in statuses):
+            db.session.rollback()
+            return jsonify({'error': 'Nie można usunąć książki, która jest wypożyczona lub zarezerwowana'}), 400
+        delete_copies([book_id])
+        # Usunięcie powiązań książki z autorami
+        for author in book.authors:
+            book.authors.remove(author)
+        db.session.delete(book)
+        bump_version('books')
+
+    try:
+        db.session.commit()
+        return jsonify({'message': 'Książka została usunięta'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/books/<int:book_id>', methods=['PUT'])
+def update_book(book_id):
+    book = Book.query.get_or_404(book_id)
+    data = request.json
+
+    title = data.get('title')
+    isbn = data.get('isbn')
+    category_id = data.get('category')
+    publication_year = data.get('publication_year')
+    publisher = data.get('publisher')
+    authors = data.get('authors')
+
+    if not title or not isbn or not category_id or not publication_year or not publisher:
+        return jsonify({'error': 'Brakujące dane książki'}), 400
+
+    # Sprawdzenie unikalności numeru ISBN (pomijając aktualnie edytowaną książkę)
+    existing_book_with_isbn = Book.query.filter(Book.isbn == isbn, Book.id != book_id).first()
+    if existing_book_with_isbn:
+        return jsonify({'error': 'Książka z tym numerem ISBN już istnieje'}), 400
+
+    book.title = title
+    book.isbn = isbn
+    book.category_id = category_id
+    book.publication_year = publication_year
+    book.publisher = publisher
+
+    # Usunięcie obecnych autorów książki
+    for author in book.authors:
+        book.authors.remove(author)
+
+    # Dodanie nowych autorów książki
+    for author_data in authors:
+        first_name = author_data.get('firstName')
+        last_name = author_data.get('lastName')
+
+        if not first_name or not last_name:
+            return jsonify({'error': 'Imię i nazwisko autora są wymagane'}), 400
+
+        author = Author.query.filter_by(first_name=first_name, last_name=last_name).first()
+        if not author:
+            author = Author(first_name=first_name, last_name=last_name)
+            db.session.add(author)
+            db.session.flush()
+
+        association = book_author.insert().values(book_id=book.id, author_id=author.id)
+        db.session.execute(association)
+
+    # Tytuł i autorzy są kopiowani do historii wypożyczeń
+    refresh_books([book.id])
+    bump_version('books')
+    try:
+        db.session.commit()
+        return jsonify({'message': 'Książka zaktualizowana pomyślnie', 'book_id': book.id}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+# Egzemplarze książki w kolejności dodania
+@bp.route('/api/books/<int:book_id>/copies', methods=['GET'])
+def get_book_copies(book_id):
+    try:
+        copies, next_cursor = paginate(serializers.copies_query().filter(Copy.book_id == book_id), Copy.id)
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowe parametry stronicowania'}), 400
+
+    return with_next_cursor(jsonify(serializers.serialize_copies(copies)), next_cursor), 200
+
+
+# Dodanie egzemplarzy książki: `count` egzemplarzy o kolejnych kodach albo lista własnych kodów `barcodes`
+@bp.route('/api/books/<int:book_id>/copies', methods=['POST'])
+def create_book_copies(book_id):
+    data = request.get_json() or {}
+    count = data.get('count')
+    barcodes = data.get('barcodes')
+    location = data.get('location')
+
+    if barcodes is not None:
+        if count is not None or not isinstance(barcodes, list) or not barcodes \
+                or not all(isinstance(barcode, str) and barcode.strip() for barcode in barcodes):
+            return jsonify({'error': 'Nieprawidłowy format barcodes'}), 400
+        barcodes = [barcode.strip() for barcode in barcodes]
+    elif not isinstance(count, int) or count < 1:
+        return jsonify({'error': 'Nieprawidłowa liczba egzemplarzy'}), 400
+
+    try:
+        barcodes = add_copies(book_id, count, barcodes, location)
+    except CirculationError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), e.status_code
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Egzemplarz o podanym kodzie już istnieje'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'message': 'Egzemplarze zostały dodane', 'barcodes': barcodes}), 201
+
+
+# Egzemplarz o zeskanowanym kodzie kreskowym wraz z aktywnym wypożyczeniem
+@bp.route('/api/copies/<barcode>', methods=['GET'])
+def get_copy(barcode):
+    copy = serializers.copies_query().filter(Copy.barcode == barcode).first_or_404()
+    return jsonify(serializers.serialize_copies([copy])[0]), 200
+
+
+# Wycofanie dostępnego egzemplarza z księgozbioru
+@bp.route('/api/copies/<barcode>', methods=['DELETE'])
+def delete_copy(barcode):
+    try:
+        withdraw_copy(barcode)
+    except CirculationError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), e.status_code
+
+    try:
+        db.session.commit()
+        return jsonify({'message': 'Egzemplarz został wycofany'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+# Endpoint do usuwania kategorii na podstawie jej ID.
+@bp.route('/api/categories/<int:category_id>', methods=['DELETE'])
+def delete_category(category_id):
+    category = Category.query.get_or_404(category_id)
+
+    # Sprawdzenie, czy kategoria jest powiązana z jakimiś książkami
+    if category.books:
+        # Dodatkowe sprawdzenie, czy kategoria jest powiązana tylko z książką, która jest aktualnie edytowana
+        current_book_id = request.args.get('current_book_id')
+        if current_book_id and len(category.books) == 1 and category.books[0].id == int(current_book_id):
+            # Można usunąć kategorię, jeśli jest powiązana tylko z aktualnie edytowaną książką
+            pass
+        else:
+            return jsonify({'error': 'Kategoria jest powiązana z książkami i nie może zostać usunięta'}), 400
+
+    db.session.delete(category)
+    bump_version('categories')
+    try:
+        db.session.commit()
+        return jsonify({'message': 'Kategoria usunięta pomyślnie'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+# Endpoint zwracający statystyki pamięci podręcznej odpowiedzi bieżącego procesu.
+@bp.route('/api/cache/metrics', methods=['GET'])
+def get_cache_metrics():
+    return jsonify(response_cache.stats()), 200
@@ -0,0 +1,285 @@
+# Endpointy obiegu książek: wypożyczenia, zwroty, historia wypożyczeń, rezerwacje i raporty.
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import joinedload
+
+from app import db, serializers
+from app.models import Book, Loan, LoanHistory, Report, Reservation
+from app.pagination import paginate, with_next_cursor
+from app.streaming import stream_format, stream_response
+from app.circulation import (CirculationError, cancel_reservation, checkout, checkout_copies, queue_position, reserve,
+                             return_books, return_copies, return_loans)
+from app.filters import filter_loan_history, filter_loans, get_loan_filters, overdue_since
+from app.reports import request_report, serialize_report
+from app.identity import current_user_id
+
+bp = Blueprint('circulation', __name__)
+
+
+# Wypożyczenie książek wskazanych przez `book_ids` albo egzemplarzy zeskanowanych przy stanowisku (`barcodes`)
+@bp.route('/api/loans', methods=['POST'])
+def create_loan():
+    data = request.get_json()
+
+    # Walidacja danych
+    required_fields = ['borrower_id', 'loan_date', 'return_date']
+    if any(field not in data for field in required_fields) or ('book_ids' in data) == ('barcodes' in data):
+        return jsonify({'error': 'Brak wymaganych danych'}), 400
+
+    book_ids = data.get('book_ids')
+    barcodes = data.get('barcodes')
+    borrower_id = data['borrower_id']
+    loan_date = data['loan_date']
+    return_date = data['return_date']
+
+    if book_ids is not None and (not isinstance(book_ids, list) or not book_ids
+                                 or not all(isinstance(book_id, int) for book_id in book_ids)):
+        return jsonify({'error': 'Nieprawidłowy format book_ids'}), 400
+    if barcodes is not None and (not isinstance(barcodes, list) or not barcodes
+                                 or not all(isinstance(barcode, str) for barcode in barcodes)):
+        return jsonify({'error': 'Nieprawidłowy format barcodes'}), 400
+
+    try:
+        loan_date = datetime.strptime(loan_date, '%Y-%m-%d')
+        return_date = datetime.strptime(return_date, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Nieprawidłowy format daty'}), 400
+
+    # Wypożyczenie wszystkich książek w jednej transakcji - brak którejkolwiek anuluje całość
+    try:
+        if barcodes is not None:
+            loan_ids = checkout_copies(barcodes, borrower_id, loan_date, return_date)
+        else:
+            loan_ids = checkout(book_ids, borrower_id, loan_date, return_date)
+    except CirculationError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), e.status_code
+
+    try:
+        db.session.commit()
+        return jsonify({'message': 'Książki wypożyczone pomyślnie', 'loan_ids': loan_ids}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/loans', methods=['GET'])
+def get_loans():
+    try:
+        query = filter_loans(serializers.loans_query(), get_loan_filters(), overdue_since())
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowe parametry filtrowania'}), 400
+
+    fmt = stream_format()
+    try:
+        if fmt:
+            return stream_response(query, Loan.id, serializers.serialize_loans, fmt)
+        loans, next_cursor = paginate(query, Loan.id)
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowe parametry stronicowania'}), 400
+
+    # Tytuł książki łączony jest z autorami pobranymi jednym zapytaniem dla całej strony
+    loans_data = serializers.serialize_loans(loans)
+
+    return with_next_cursor(jsonify(loans_data), next_cursor), 200
+
+
+@bp.route('/api/loans/return/<int:loan_id>', methods=['POST'])
+def return_loan(loan_id):
+    # Zwrot pojedynczego wypożyczenia: aktualizacja wypożyczenia, liczby egzemplarzy i historii
+    result = return_loans([loan_id])[0]
+    if not result['returned']:
+        db.session.rollback()
+        status_code = 404 if result['error'] == 'Nie znaleziono wypożyczenia' else 400
+        return jsonify({'error': result['error']}), status_code
+
+    try:
+        db.session.commit()
+        return jsonify({'message': 'Książka zwrócona pomyślnie'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+# Endpoint do zbiorczego zwrotu wypożyczeń (np. przy rozładowaniu zwrotnicy).
+# Przyjmuje listę `loan_ids`, `book_ids` albo kodów kreskowych egzemplarzy (`barcodes`)
+# i zwraca wynik dla każdej pozycji.
+@bp.route('/api/loans/return', methods=['POST'])
+def return_loans_batch():
+    data = request.get_json(silent=True) or {}
+    lists = {key: data[key] for key in ('loan_ids', 'book_ids', 'barcodes')
+             if isinstance(data, dict) and data.get(key) is not None}
+    item_type = str if 'barcodes' in lists else int
+    if len(lists) != 1 or not all(isinstance(ids, list) and ids and all(isinstance(item, item_type) for item in ids)
+                                  for ids in lists.values()):
+        return jsonify({'error': 'Wymagana jest niepusta lista loan_ids, book_ids albo barcodes'}), 400
+
+    if 'loan_ids' in lists:
+        results = return_loans(lists['loan_ids'])
+    elif 'book_ids' in lists:
+        results = return_books(lists['book_ids'])
+    else:
+        results = return_copies(lists['barcodes'])
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    returned = sum(1 for result in results if result['returned'])
+    return jsonify({'returned': returned, 'failed': len(results) - returned, 'results': results}), 200
+
+
+@bp.route('/api/loan-history', methods=['GET'])
+def get_loan_history():
+    # Filtry (status, czytelnik, książka, zakres dat) i status przetrzymania wyznaczane są w SQL
+    since = overdue_since()
+    try:
+        query = filter_loan_history(serializers.loan_history_query(since), get_loan_filters(), since)
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowe parametry filtrowania'}), 400
+
+    fmt = stream_format()
+    try:
+        if fmt:
+            return stream_response(query, LoanHistory.id, serializers.serialize_loan_history, fmt)
+        loan_histories, next_cursor = paginate(query, LoanHistory.id)
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowe parametry stronicowania'}), 400
+
+    loan_history_data = serializers.serialize_loan_history(loan_histories)
+
+    return with_next_cursor(jsonify(loan_history_data), next_cursor), 200
+
+
+@bp.route('/api/loans/details/<int:loan_history_id>', methods=['GET'])
+def get_loan_details(loan_history_id):
+    loan_history = LoanHistory.query.get_or_404(loan_history_id)
+    loan = Loan.query \
+        .options(joinedload(Loan.book).joinedload(Book.category),
+                 joinedload(Loan.book).selectinload(Book.authors),
+                 joinedload(Loan.borrower)) \
+        .get_or_404(loan_history.loan_id)
+
+    if loan.book:
+        book_authors = ', '.join([f"{author.first_name} {author.last_name}" for author in loan.book.authors])
+        book_details = {
+            'title': loan.book.title,
+            'isbn': loan.book.isbn,
+            'publisher': loan.book.publisher,
+            'publication_year': loan.book.publication_year,
+            'category': loan.book.category.name if loan.book.category else None,
+            'authors': book_authors
+        }
+    else:
+        book_details = {'title': 'Brak informacji o książce'}
+
+    if loan.borrower:
+        borrower_details = {
+            'name': f"{loan.borrower.first_name} {loan.borrower.last_name}",
+            'pesel': loan.borrower.pesel,
+            'address': loan.borrower.address,
+            'postal_code': loan.borrower.postal_code,
+            'city': loan.borrower.city,
+            'email': loan.borrower.email,
+            'phone': loan.borrower.phone_number
+        }
+    else:
+        borrower_details = {'name': 'Brak informacji o czytelniku'}
+
+    return jsonify({'book': book_details, 'borrower': borrower_details})
+
+
+# Rezerwacja książki: dostępny egzemplarz jest od razu odkładany dla czytelnika, w przeciwnym razie
+# czytelnik trafia na koniec kolejki i otrzymuje pierwszy zwrócony egzemplarz
+@bp.route('/api/reservations', methods=['POST'])
+def create_reservation():
+    data = request.get_json() or {}
+    book_id = data.get('book_id')
+    borrower_id = data.get('borrower_id')
+    if not isinstance(book_id, int) or not isinstance(borrower_id, int):
+        return jsonify({'error': 'Brak wymaganych danych'}), 400
+
+    try:
+        reservation = reserve(book_id, borrower_id)
+    except CirculationError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), e.status_code
+
+    position = queue_position(reservation)
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'message': 'Rezerwacja została utworzona', 'reservation_id': reservation.id,
+                    'status': reservation.status, 'position': position}), 201
+
+
+@bp.route('/api/reservations/<int:reservation_id>', methods=['GET'])
+def get_reservation(reservation_id):
+    reservation = serializers.reservations_query().filter(Reservation.id == reservation_id).first_or_404()
+    reservation_data = serializers.serialize_reservations([reservation])[0]
+    reservation_data['position'] = queue_position(reservation)
+    return jsonify(reservation_data), 200
+
+
+@bp.route('/api/reservations/<int:reservation_id>', methods=['DELETE'])
+def delete_reservation(reservation_id):
+    try:
+        cancel_reservation(reservation_id)
+    except CirculationError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), e.status_code
+
+    try:
+        db.session.commit()
+        return jsonify({'message': 'Rezerwacja została anulowana'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+# Kolejka rezerwacji książki: rezerwacje oczekujące i przydzielone w kolejności złożenia.
+# Kursor stronicowania obejmuje datę rezerwacji i ID - ten sam klucz co kolejność kolejki.
+@bp.route('/api/books/<int:book_id>/reservations', methods=['GET'])
+def get_book_reservations(book_id):
+    query = serializers.reservations_query() \
+        .filter(Reservation.book_id == book_id, Reservation.status.in_(('Oczekująca', 'Przydzielona')))
+    try:
+        reservations, next_cursor = paginate(query, (Reservation.reservation_date, Reservation.id))
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowe parametry stronicowania'}), 400
+
+    return with_next_cursor(jsonify(serializers.serialize_reservations(reservations)), next_cursor), 200
+
+
+# Zamówienie raportu. Aktualny raport o tych samych parametrach zwracany jest od razu (200),
+# pozostałe generowane są w tle przez `flask report-worker` (202 - stan sprawdza się pod /api/reports/<id>).
+@bp.route('/api/reports', methods=['POST'])
+@jwt_required()
+def create_report():
+    data = request.get_json() or {}
+    try:
+        report, created = request_report(data.get('type'), data.get('params') or {}, current_user_id())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if created:
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
+
+    return jsonify(serialize_report(report)), 200 if report.status == 'done' else 202
+
+
+@bp.route('/api/reports/<int:report_id>', methods=['GET'])
+@jwt_required()
+def get_report(report_id):
+    report = Report.query.get_or_404(report_id)
+    return jsonify(serialize_report(report)), 200
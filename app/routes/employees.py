@@ -0,0 +1,123 @@
+# Endpointy zarządzania pracownikami (wraz z powiązanymi kontami użytkowników).
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy.exc import IntegrityError
+
+from app import db, serializers
+from app.models import User, Employee
+from app.pagination import paginate, with_next_cursor
+from app.versioning import bump_version
+
+bp = Blueprint('employees', __name__)
+
+
+# Endpoint do dodawania nowego pracownika. Tworzy zarówno rekord pracownika, jak i powiązany rekord użytkownika.
+@bp.route('/add-employee', methods=['POST'])
+def add_employee():
+    data = request.json
+
+    # Walidacja danych
+    required_fields = ['first_name', 'last_name', 'pesel', 'email', 'password']
+    if any(field not in data for field in required_fields):
+        return jsonify({'error': 'Brak wymaganych danych'}), 400
+
+    # Sprawdzanie, czy użytkownik z tym adresem e-mail już istnieje
+    if User.query.filter_by(username=data['email']).first():
+        return jsonify({'error': 'Użytkownik z tym adresem e-mail już istnieje'}), 400
+
+    # Tworzenie użytkownika
+    new_user = User(
+        username=data['email'],
+        role_id=2  # Stałe role_id dla pracownika
+    )
+    new_user.set_password(data['password'])
+
+    # Tworzenie pracownika
+    new_employee = Employee(
+        first_name=data['first_name'],
+        last_name=data['last_name'],
+        email=data['email'],
+        phone_number=data.get('phone_number'),
+        pesel=data['pesel'],
+        hired_date=datetime.strptime(data.get('hired_date'), '%Y-%m-%d') if data.get('hired_date') else None,
+        user=new_user  # Powiązanie pracownika z użytkownikiem
+    )
+
+    db.session.add(new_employee)
+    try:
+        bump_version('users', 'employees')
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({'message': 'Pracownik dodany pomyślnie', 'employee_id': new_employee.id}), 201
+
+
+# Endpoint do pobierania listy wszystkich pracowników.
+@bp.route('/api/employees', methods=['GET'])
+def get_employees():
+    try:
+        employees, next_cursor = paginate(serializers.employees_query(), Employee.id)
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowe parametry stronicowania'}), 400
+    employees_data = serializers.serialize_employees(employees)
+
+    return with_next_cursor(jsonify(employees_data), next_cursor)
+
+
+# Endpoint do aktualizacji danych konkretnego pracownika na podstawie jego ID.
+@bp.route('/api/employees/<int:employee_id>', methods=['PUT'])
+def update_employee(employee_id):
+    employee = Employee.query.get_or_404(employee_id)
+    user = User.query.get_or_404(employee.user_id)
+    data = request.json
+
+    # Sprawdzenie unikatowości PESEL
+    if Employee.query.filter(Employee.pesel == data['pesel'], Employee.id != employee_id).first():
+        return jsonify({'error': 'Pracownik o podanym PESEL jest już w systemie'}), 400
+
+    # Sprawdzenie unikatowości numeru telefonu
+    if Employee.query.filter(Employee.phone_number == data['phone_number'], Employee.id != employee_id).first():
+        return jsonify({'error': 'Pracownik o podanym numerze telefonu jest już w systemie'}), 400
+
+    # Sprawdzenie unikatowości emaila
+    if User.query.filter(User.username == data['email'], User.id != user.id).first():
+        return jsonify({'error': 'Pracownik o podanym emailu jest już w systemie'}), 400
+
+    try:
+        # Aktualizacja danych pracownika
+        employee.first_name = data.get('first_name', employee.first_name)
+        employee.last_name = data.get('last_name', employee.last_name)
+        employee.pesel = data.get('pesel', employee.pesel)
+        employee.phone_number = data.get('phone_number', employee.phone_number)
+        user.username = data.get('email', user.username)
+
+        # Opcjonalnie, aktualizacja daty zatrudnienia
+        if 'hired_date' in data:
+            employee.hired_date = datetime.strptime(data['hired_date'], '%Y-%m-%d')
+
+        bump_version('users', 'employees')
+        db.session.commit()
+        return jsonify({'message': 'Dane pracownika zaktualizowane'}), 200
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Błąd podczas aktualizacji danych pracownika'}), 400
+
+
+# Endpoint do usuwania konkretnego pracownika (i powiązanego użytkownika) na podstawie jego ID.
+@bp.route('/api/employees/<int:employee_id>', methods=['DELETE'])
+def delete_employee(employee_id):
+    employee = Employee.query.get_or_404(employee_id)
+
+    # Usuwanie powiązanego użytkownika
+    if employee.user_id:
+        user = User.query.get(employee.user_id)
+        if user:
+            db.session.delete(user)
+
+    db.session.delete(employee)
+    bump_version('users', 'employees')
+    db.session.commit()
+    return jsonify({'message': 'Pracownik usunięty z bazy danych'}), 200
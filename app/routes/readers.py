@@ -0,0 +1,159 @@
+# Endpointy zarządzania czytelnikami.
+from flask import Blueprint, jsonify, request
+
+from app import db, serializers
+from app.models import Borrower, Loan, Reservation
+from app.pagination import paginate, with_next_cursor
+from app.circulation import cancel_reservation
+from app.history import refresh_borrowers
+
+bp = Blueprint('readers', __name__)
+
+
+# Endpoint do dodawania książki
+@bp.route('/add-reader', methods=['POST'])
+def add_reader():
+    data = request.json
+    print("Otrzymane dane:", data)
+
+    # Walidacja danych
+    required_fields = ['first_name', 'last_name', 'email', 'phone_number', 'pesel', 'address', 'postalCodeAndCity']
+    if any(field not in data for field in required_fields):
+        return jsonify({'error': 'Brak wymaganych danych'}), 400
+
+    # Sprawdzanie, czy czytelnik z tym adresem e-mail lub numerem telefonu już istnieje
+    if Borrower.query.filter_by(pesel=data['pesel']).first():
+        return jsonify({'error': 'Czytelnik z tym peslem już istnieje'}), 400
+
+    if Borrower.query.filter_by(email=data['email']).first():
+        return jsonify({'error': 'Czytelnik z tym adresem e-mail już istnieje'}), 400
+
+    if Borrower.query.filter_by(phone_number=data['phone_number']).first():
+        return jsonify({'error': 'Czytelnik z tym numerem telefonu już istnieje'}), 400
+
+    postal_code_and_city = data['postalCodeAndCity'].split(maxsplit=1)
+    if len(postal_code_and_city) != 2:
+        return jsonify({'error': 'Nieprawidłowy format kodu pocztowego i miejscowości'}), 400
+
+    postal_code, city = postal_code_and_city
+
+    # Tworzenie nowego czytelnika
+    new_reader = Borrower(
+        first_name=data['first_name'],
+        last_name=data['last_name'],
+        email=data['email'],
+        phone_number=data['phone_number'],
+        pesel=data['pesel'],
+        address=data['address'],
+        postal_code=postal_code,
+        city=city
+    )
+
+    db.session.add(new_reader)
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({'message': 'Czytelnik dodany pomyślnie', 'reader_id': new_reader.id}), 201
+
+
+@bp.route('/api/readers', methods=['GET'])
+def get_all_readers():
+    # Pobranie strony czytelników z bazy danych
+    try:
+        all_readers, next_cursor = paginate(serializers.readers_query(), Borrower.id)
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowe parametry stronicowania'}), 400
+
+    # Przygotowanie listy danych czytelników do odpowiedzi
+    readers_data = serializers.serialize_readers(all_readers)
+
+    return with_next_cursor(jsonify(readers_data), next_cursor), 200
+
+
+@bp.route('/api/readers/<int:reader_id>', methods=['DELETE'])
+def delete_reader(reader_id):
+    reader = Borrower.query.get_or_404(reader_id)
+
+    # Sprawdzenie, czy czytelnik ma aktywne wypożyczenia
+    active_loans = Loan.query.filter_by(borrower_id=reader_id, status='Wypożyczona').all()
+    if active_loans:
+        # Zwrócenie błędu, jeśli istnieją aktywne wypożyczenia
+        return jsonify({'error': 'Nie można usunąć czytelnika, który ma wypożyczone książki'}), 400
+
+    # Aktywne rezerwacje czytelnika są anulowane, a odłożone dla niego egzemplarze przechodzą na kolejne osoby
+    active_reservations = db.session.query(Reservation.id) \
+        .filter(Reservation.borrower_id == reader_id, Reservation.status.in_(('Oczekująca', 'Przydzielona'))) \
+        .all()
+    for reservation_id, in active_reservations:
+        cancel_reservation(reservation_id)
+
+    # Brak aktywnych wypożyczeń - można bezpiecznie usunąć czytelnika
+    db.session.delete(reader)
+    try:
+        db.session.commit()
+        return jsonify({'message': 'Czytelnik został usunięty'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/readers/<int:reader_id>', methods=['PUT'])
+def update_reader(reader_id):
+    reader = Borrower.query.get_or_404(reader_id)
+    data = request.get_json()
+
+    # Walidacja danych
+    required_fields = ['first_name', 'last_name', 'email', 'phone_number', 'pesel', 'address', 'postalCodeAndCity']
+    if any(field not in data for field in required_fields):
+        return jsonify({'error': 'Brak wymaganych danych'}), 400
+
+    # Sprawdzanie, czy podane dane już istnieją dla innego czytelnika
+    if data['email'] != reader.email and Borrower.query.filter_by(email=data['email']).first():
+        return jsonify({'error': 'Czytelnik z tym adresem e-mail już istnieje'}), 400
+
+    if data['phone_number'] != reader.phone_number and Borrower.query.filter_by(
+            phone_number=data['phone_number']).first():
+        return jsonify({'error': 'Czytelnik z tym numerem telefonu już istnieje'}), 400
+
+    if data['pesel'] != reader.pesel and Borrower.query.filter_by(pesel=data['pesel']).first():
+        return jsonify({'error': 'Czytelnik z tym peselem już istnieje'}), 400
+
+    # Rozdzielenie `postalCodeAndCity` na `postal_code` i `city`
+    postal_code_and_city = data['postalCodeAndCity'].split(maxsplit=1)
+    if len(postal_code_and_city) != 2:
+        return jsonify({'error': 'Nieprawidłowy format kodu pocztowego i miejscowości'}), 400
+    postal_code, city = postal_code_and_city
+
+    # Updating reader details
+    reader.first_name = data.get('first_name', reader.first_name)
+    reader.last_name = data.get('last_name', reader.last_name)
+    reader.email = data['email']
+    reader.phone_number = data['phone_number']
+    reader.pesel = data.get('pesel', reader.pesel)
+    reader.address = data.get('address', reader.address)
+    reader.postal_code = postal_code
+    reader.city = city
+
+    try:
+        # Imię, nazwisko i PESEL są kopiowane do historii wypożyczeń
+        refresh_borrowers([reader.id])
+        db.session.commit()
+        return jsonify({'message': 'Dane czytelnika zaktualizowane'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/api/borrowers', methods=['GET'])
+def get_borrowers():
+    try:
+        borrowers, next_cursor = paginate(serializers.borrowers_query(), Borrower.id)
+    except ValueError:
+        return jsonify({'error': 'Nieprawidłowe parametry stronicowania'}), 400
+
+    borrowers_data = serializers.serialize_borrowers(borrowers)
+
+    return with_next_cursor(jsonify(borrowers_data), next_cursor), 200
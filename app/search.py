@@ -0,0 +1,122 @@
+# Wyszukiwanie książek w katalogu po tytule, autorach, wydawnictwie i numerze ISBN.
+# W PostgreSQL korzysta z kolumny `search_vector` (tsvector) oraz indeksów trigramowych (pg_trgm),
+# dzięki czemu znajduje książki także przy literówkach i przy zapytaniach bez polskich znaków.
+# Na innych bazach (np. SQLite) używany jest przenośny, wolniejszy wariant oparty na LIKE, porównujący teksty
+# bez wielkich liter i znaków diakrytycznych (funkcja `search_normalize` rejestrowana w połączeniach SQLite).
+import re
+import sqlite3
+import unicodedata
+
+from sqlalchemy import case, event, func, or_
+from sqlalchemy.pool import Pool
+
+from app import db, serializers
+from app.models import Author, Book, book_author
+
+SEARCH_SQL = db.text("""
+    WITH query AS (
+        SELECT websearch_to_tsquery('polish_unaccent', :q) AS tsq, f_unaccent(lower(:q)) AS term
+    ),
+    matches AS (
+        SELECT b.id,
+               ts_rank(b.search_vector, query.tsq) AS text_rank,
+               greatest(word_similarity(query.term, f_unaccent(lower(b.title))),
+                        word_similarity(query.term, f_unaccent(lower(coalesce(b.publisher, ''))))) AS fuzzy_rank
+        FROM books b, query
+        WHERE b.search_vector @@ query.tsq
+           OR query.term <% f_unaccent(lower(b.title))
+           OR query.term <% f_unaccent(lower(b.publisher))
+           OR (CAST(:isbn AS text) IS NOT NULL AND b.isbn LIKE :isbn)
+        UNION ALL
+        SELECT ba.book_id,
+               0,
+               word_similarity(query.term, f_unaccent(lower(a.first_name || ' ' || a.last_name)))
+        FROM authors a
+        JOIN book_author ba ON ba.author_id = a.id, query
+        WHERE query.term <% f_unaccent(lower(a.first_name || ' ' || a.last_name))
+    )
+    SELECT id, max(text_rank) + max(fuzzy_rank) AS rank
+    FROM matches
+    GROUP BY id
+    ORDER BY rank DESC, id
+    LIMIT :limit
+""")
+
+
+# Litery, które nie rozkładają się na literę bazową i znak diakrytyczny
+_BASE_LETTERS = str.maketrans({'ł': 'l'})
+
+
+# Tekst do porównania w wyszukiwaniu: małe litery bez znaków diakrytycznych ("Wiedźmin" -> "wiedzmin"),
+# odpowiednik f_unaccent(lower(...)) z PostgreSQL
+def normalize(text):
+    if text is None:
+        return None
+    decomposed = unicodedata.normalize('NFKD', text.casefold().translate(_BASE_LETTERS))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+@event.listens_for(Pool, 'connect')
+def _register_search_normalize(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function('search_normalize', 1, normalize, deterministic=True)
+
+
+# Zapytanie wyglądające na numer ISBN (cyfry, myślniki, spacje, X) szukane jest również jako fragment ISBN
+def _isbn_pattern(q):
+    digits = re.sub(r'[\s-]', '', q)
+    if re.fullmatch(r'\d{3,12}[\dXx]?', digits):
+        return f'%{digits}%'
+    return None
+
+
+def _like_pattern(q):
+    escaped = q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _search_ids_postgresql(q, limit):
+    rows = db.session.execute(SEARCH_SQL, {'q': q, 'isbn': _isbn_pattern(q), 'limit': limit})
+    return [row.id for row in rows]
+
+
+# Przenośny wariant wyszukiwania: dopasowanie fragmentu tekstu bez wielkich liter i znaków diakrytycznych,
+# z prostymi wagami pól
+def _search_ids_fallback(q, limit):
+    pattern = _like_pattern(normalize(q))
+
+    def matches(column):
+        return func.search_normalize(column).like(pattern, escape='\\')
+
+    author_match = db.session.query(book_author.c.book_id) \
+        .join(Author, Author.id == book_author.c.author_id) \
+        .filter(matches(Author.first_name + ' ' + Author.last_name))
+
+    title_match = matches(Book.title)
+    isbn_match = Book.isbn.ilike(_like_pattern(q), escape='\\')
+    publisher_match = matches(Book.publisher)
+    authors_match = Book.id.in_(author_match)
+    rank = case((title_match, 3), else_=0) + case((isbn_match, 3), else_=0) \
+        + case((authors_match, 2), else_=0) + case((publisher_match, 1), else_=0)
+
+    rows = db.session.query(Book.id) \
+        .filter(or_(title_match, isbn_match, publisher_match, authors_match)) \
+        .order_by(rank.desc(), Book.id) \
+        .limit(limit) \
+        .all()
+    return [row.id for row in rows]
+
+
+# Wyszukanie książek; zwraca listę w formacie `GET /api/books`, od najlepiej dopasowanej
+def search_books(q, limit):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        book_ids = _search_ids_postgresql(q, limit)
+    else:
+        book_ids = _search_ids_fallback(q, limit)
+
+    if not book_ids:
+        return []
+
+    rows = serializers.books_query().filter(Book.id.in_(book_ids)).all()
+    books_data = {book['id']: book for book in serializers.serialize_books(rows)}
+    return [books_data[book_id] for book_id in book_ids if book_id in books_data]
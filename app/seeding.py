@@ -0,0 +1,341 @@
+# Szybkie wypełnianie bazy spójnymi danymi testowymi (`flask seed`).
+# Wiersze generowane są deterministycznie (ziarno losowania) jako krotki i zapisywane z pominięciem ORM:
+# w PostgreSQL strumieniowo przez COPY FROM STDIN, w pozostałych bazach partiami executemany.
+# Identyfikatory nadawane są jawnie, zaczynając za największym istniejącym, więc powiązania
+# (book_author, wypożyczenia) nie wymagają odczytywania danych z bazy. Historia wypożyczeń
+# tworzona jest na końcu jedną instrukcją INSERT ... SELECT (app/history.py).
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+
+from app import db
+from app.history import record_loan_range
+from app.models import Role
+from app.passwords import password_hasher
+from app.versioning import bump_version
+
+FIRST_NAMES = ['Anna', 'Piotr', 'Katarzyna', 'Tomasz', 'Magdalena', 'Jan', 'Agnieszka', 'Paweł', 'Zofia', 'Łukasz',
+               'Małgorzata', 'Michał', 'Ewa', 'Krzysztof', 'Joanna', 'Andrzej', 'Barbara', 'Wojciech']
+LAST_NAMES = ['Nowak', 'Kowalski', 'Wiśniewski', 'Wójcik', 'Kowalczyk', 'Kamiński', 'Lewandowski', 'Zieliński',
+              'Szymański', 'Woźniak', 'Dąbrowski', 'Kozłowski', 'Jankowski', 'Mazur', 'Kwiatkowski', 'Krawczyk']
+WORDS = ['pan', 'tadeusz', 'lalka', 'ogniem', 'mieczem', 'potop', 'wesele', 'dziady', 'chłopi', 'ferdydurke',
+         'solaris', 'wiedźmin', 'przedwiośnie', 'noce', 'dnie', 'zbrodnia', 'kara', 'dom', 'ogród', 'miasto',
+         'rzeka', 'góry', 'morze', 'historia', 'kroniki', 'opowieści', 'świat', 'czas', 'droga', 'zamek']
+PUBLISHERS = ['Znak', 'Wydawnictwo Literackie', 'PWN', 'Czytelnik', 'Prószyński', 'Rebis', 'Albatros', 'Marginesy']
+CITIES = ['Warszawa', 'Kraków', 'Łódź', 'Wrocław', 'Poznań', 'Gdańsk', 'Szczecin', 'Lublin']
+
+# Okres, z którego losowane są daty wypożyczeń (w dniach wstecz od dziś), termin zwrotu
+# oraz najdłuższy czas do faktycznego zwrotu (dłuższy od terminu - część zwrotów jest spóźniona)
+LOAN_PERIOD_DAYS = 730
+LOAN_DURATION_DAYS = 30
+LOAN_RETURN_MAX_DAYS = 45
+
+# Wyzwalacze utrzymujące `books.search_vector` - wyłączane na czas wstawiania, dokument liczony raz na końcu
+SEARCH_TRIGGER_TABLES = ('books', 'book_author', 'authors')
+
+
+# Domyślne liczności tabel wyznaczane z liczby książek; jawnie podane wartości mają pierwszeństwo
+def default_counts(books, **overrides):
+    counts = {
+        'books': books,
+        'authors': max(books // 4, 10),
+        'categories': 50,
+        'borrowers': max(books // 10, 10),
+        'employees': 20,
+        'loans': books // 2,
+    }
+    counts.update({name: value for name, value in overrides.items() if value is not None})
+    return counts
+
+
+class _Writer:
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.connection = db.session.connection()
+        self.postgresql = self.connection.dialect.name == 'postgresql'
+
+    def write(self, table, columns, rows):
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._flush(table, columns, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._flush(table, columns, batch)
+            count += len(batch)
+        return count
+
+    def _flush(self, table, columns, batch):
+        if self.postgresql:
+            # Format CSV: pusta, niecytowana wartość oznacza NULL
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator='\n').writerows(batch)
+            buffer.seek(0)
+            cursor = self.connection.connection.dbapi_connection.cursor()
+            try:
+                cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            finally:
+                cursor.close()
+        else:
+            placeholders = ', '.join('?' if self.connection.dialect.paramstyle == 'qmark' else '%s' for _ in columns)
+            self.connection.exec_driver_sql(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                                            batch)
+
+    def next_id(self, table):
+        return (self.connection.exec_driver_sql(f"SELECT max(id) FROM {table}").scalar() or 0) + 1
+
+    # Sekwencje PostgreSQL nie uwzględniają jawnie podanych identyfikatorów
+    def reset_sequence(self, table):
+        if self.postgresql:
+            self.connection.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))")
+
+    def search_triggers_installed(self):
+        if not self.postgresql:
+            return False
+        return self.connection.exec_driver_sql(
+            "SELECT 1 FROM pg_trigger WHERE tgname = 'books_search_vector_update'").first() is not None
+
+    def set_search_triggers(self, enabled):
+        action = 'ENABLE' if enabled else 'DISABLE'
+        for table in SEARCH_TRIGGER_TABLES:
+            self.connection.exec_driver_sql(f"ALTER TABLE {table} {action} TRIGGER USER")
+
+
+class Seeder:
+    def __init__(self, counts, seed=42, batch_size=50_000, password='haslo123', log=None):
+        self.counts = counts
+        self.seed = seed
+        self.batch_size = batch_size
+        self.password = password
+        self.log = log or (lambda message: None)
+        self.now = datetime.utcnow().replace(microsecond=0)
+        # Daty jako tekst wyliczone raz - formatowanie milionów dat byłoby najwolniejszą częścią generowania
+        self.days = [str(self.now - timedelta(days=day)) for day in range(LOAN_PERIOD_DAYS + 1)]
+        self.future = [str(self.now + timedelta(days=day)) for day in range(LOAN_DURATION_DAYS + 1)]
+        self.first_ids = {}
+
+    # Osobny generator liczb losowych dla każdej tabeli - zmiana liczności jednej tabeli nie zmienia pozostałych
+    def _rng(self, table):
+        return random.Random(f'{self.seed}:{table}')
+
+    def run(self):
+        writer = _Writer(self.batch_size)
+        search_triggers = writer.search_triggers_installed()
+        if search_triggers:
+            writer.set_search_triggers(False)
+
+        if not db.session.get(Role, 1):
+            db.session.add_all([Role(id=1, role_name='Admin'), Role(id=2, role_name='Pracownik')])
+            db.session.flush()
+
+        for table in ('users', 'employees', 'categories', 'authors', 'books', 'copies', 'borrowers', 'loans'):
+            self.first_ids[table] = writer.next_id(table)
+
+        steps = [
+            ('users', self._users),
+            ('employees', self._employees),
+            ('categories', self._categories),
+            ('authors', self._authors),
+            ('books', self._books),
+            ('copies', self._copies),
+            ('book_author', self._book_authors),
+            ('borrowers', self._borrowers),
+            ('loans', self._loans),
+        ]
+        summary = {}
+        for table, generate in steps:
+            start = time.perf_counter()
+            columns, rows = generate()
+            count = writer.write(table, columns, rows)
+            elapsed = time.perf_counter() - start
+            summary[table] = count
+            self.log(f"{table}: {count} wierszy w {elapsed:.1f} s ({count / elapsed if elapsed else 0:.0f} wierszy/s)")
+            if table != 'book_author':
+                writer.reset_sequence(table)
+
+        start = time.perf_counter()
+        count = self._loan_copies(writer)
+        summary['copies'] += count
+        self.log(f"copies (wypożyczone): {count} wierszy w {time.perf_counter() - start:.1f} s")
+
+        # Historia wraz z kopiami tytułów, autorów i danych czytelników tworzona jest w bazie z zapisanych wypożyczeń
+        start = time.perf_counter()
+        summary['loan_history'] = record_loan_range(self.first_ids['loans'])
+        self.log(f"loan_history: {summary['loan_history']} wierszy w {time.perf_counter() - start:.1f} s")
+
+        if search_triggers:
+            start = time.perf_counter()
+            writer.set_search_triggers(True)
+            writer.connection.exec_driver_sql(
+                "UPDATE books SET search_vector = books_search_document(id, title, isbn, publisher) WHERE id >= %s",
+                (self.first_ids['books'],))
+            self.log(f"search_vector: {time.perf_counter() - start:.1f} s")
+
+        # Wersje tabel zmieniają się, aby unieważnić ETagi i pamięć podręczną odpowiedzi
+        bump_version('books', 'copies', 'categories', 'users', 'employees')
+        db.session.commit()
+        return summary
+
+    def _users(self):
+        first = self.first_ids['users']
+        pwhash = password_hasher.hash(self.password)
+        columns = ('id', 'username', 'password', 'role_id')
+        return columns, ((first + i, f'pracownik{first + i}@example.com', pwhash, 2)
+                         for i in range(self.counts['employees']))
+
+    def _employees(self):
+        rng = self._rng('employees')
+        first, first_user = self.first_ids['employees'], self.first_ids['users']
+        columns = ('id', 'user_id', 'first_name', 'last_name', 'email', 'phone_number', 'pesel', 'hired_date',
+                   'created_at', 'updated_at')
+        return columns, ((first + i, first_user + i, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                          f'pracownik{first_user + i}@example.com', f'5{first + i:08d}', f'9{first + i:010d}',
+                          self.days[rng.randrange(LOAN_PERIOD_DAYS)][:10], self.now, self.now)
+                         for i in range(self.counts['employees']))
+
+    def _categories(self):
+        first = self.first_ids['categories']
+        return ('id', 'name'), ((first + i, f'Kategoria {first + i}') for i in range(self.counts['categories']))
+
+    def _authors(self):
+        rng = self._rng('authors')
+        first = self.first_ids['authors']
+        # Numer w imieniu zapewnia unikalność pary (imię, nazwisko) wymaganą przez uq_authors_name
+        return ('id', 'first_name', 'last_name'), ((first + i, f'{rng.choice(FIRST_NAMES)}{first + i}',
+                                                     rng.choice(LAST_NAMES)) for i in range(self.counts['authors']))
+
+    def _books(self):
+        rng = self._rng('books')
+        first, first_category = self.first_ids['books'], self.first_ids['categories']
+        categories = self.counts['categories']
+        columns = ('id', 'title', 'isbn', 'category_id', 'publication_year', 'publisher', 'created_at', 'updated_at')
+
+        def rows():
+            choice, randint, randrange = rng.choice, rng.randint, rng.randrange
+            for i in range(self.counts['books']):
+                title = ' '.join(choice(WORDS) for _ in range(randint(1, 4))).capitalize()
+                yield (first + i, title, f'978{first + i:010d}', first_category + randrange(categories),
+                       randint(1900, 2024), choice(PUBLISHERS), self.now, self.now)
+        return columns, rows()
+
+    # Od 1 do 5 dostępnych egzemplarzy każdej książki, o kodach kreskowych <ID książki>-<numer>
+    def _copies(self):
+        rng = self._rng('copies')
+        first, first_book = self.first_ids['copies'], self.first_ids['books']
+        columns = ('id', 'book_id', 'barcode', 'status', 'created_at', 'updated_at')
+
+        def rows():
+            copy_id, randint = first, rng.randint
+            for book_id in range(first_book, first_book + self.counts['books']):
+                for number in range(1, randint(1, 5) + 1):
+                    yield copy_id, book_id, f'{book_id}-{number}', 'Dostępny', self.now, self.now
+                    copy_id += 1
+        return columns, rows()
+
+    # Egzemplarze aktywnych wypożyczeń tworzone są w bazie z zapisanych wypożyczeń (numery w obrębie książki
+    # następują po egzemplarzach dostępnych), a wypożyczenia wiązane są z nimi przez jawnie nadane ID
+    def _loan_copies(self, writer):
+        params = {'first_loan': self.first_ids['loans'], 'first_copy': writer.next_id('copies')}
+        active = """
+            SELECT id, book_id, loan_date, :first_copy - 1 + ROW_NUMBER() OVER (ORDER BY id) AS copy_id,
+                   ROW_NUMBER() OVER (PARTITION BY book_id ORDER BY id) AS number
+            FROM loans WHERE id >= :first_loan AND status = 'Wypożyczona'
+        """
+        count = writer.connection.execute(db.text(f"""
+            INSERT INTO copies (id, book_id, barcode, status, created_at, updated_at)
+            SELECT active.copy_id, active.book_id,
+                   CAST(active.book_id AS VARCHAR(20)) || '-' || CAST(active.number + (
+                       SELECT count(*) FROM copies WHERE copies.book_id = active.book_id) AS VARCHAR(20)),
+                   'Wypożyczony', active.loan_date, active.loan_date
+            FROM ({active}) active
+        """), params).rowcount
+        writer.connection.execute(db.text(f"""
+            UPDATE loans SET copy_id = active.copy_id FROM ({active}) active WHERE loans.id = active.id
+        """), params)
+        writer.reset_sequence('copies')
+        return count
+
+    def _book_authors(self):
+        rng = self._rng('book_author')
+        first_book, first_author = self.first_ids['books'], self.first_ids['authors']
+        authors = self.counts['authors']
+
+        def rows():
+            sample, randint = rng.sample, rng.randint
+            for i in range(self.counts['books']):
+                for author in sample(range(authors), min(randint(1, 3), authors)):
+                    yield first_book + i, first_author + author
+        return ('book_id', 'author_id'), rows()
+
+    def _borrowers(self):
+        rng = self._rng('borrowers')
+        first = self.first_ids['borrowers']
+        columns = ('id', 'first_name', 'last_name', 'email', 'phone_number', 'pesel', 'address', 'postal_code',
+                   'city', 'created_at', 'updated_at')
+
+        def rows():
+            choice, randrange = rng.choice, rng.randrange
+            for i in range(self.counts['borrowers']):
+                borrower_id = first + i
+                yield (borrower_id, choice(FIRST_NAMES), choice(LAST_NAMES), f'czytelnik{borrower_id}@example.com',
+                       f'6{borrower_id:08d}', f'{borrower_id:011d}', f'ul. {choice(LAST_NAMES)}a {randrange(1, 200)}',
+                       f'{randrange(100):02d}-{randrange(1000):03d}', choice(CITIES), self.now, self.now)
+        return columns, rows()
+
+    # Data sprzed podanej liczby dni (wartość ujemna oznacza datę w przyszłości)
+    def _date(self, days_ago):
+        return self.days[days_ago] if days_ago >= 0 else self.future[-days_ago]
+
+    # Wypożyczenie, którego zwrot przypadałby w przyszłości, jest nadal aktywne
+    # (część z nich jest przetrzymana, bo czas zwrotu może przekroczyć termin)
+    def _loans(self):
+        rng, targets = self._rng('loans'), self._rng('loan_targets')
+        first, first_book, first_borrower = self.first_ids['loans'], self.first_ids['books'], self.first_ids['borrowers']
+        books, borrowers = self.counts['books'], self.counts['borrowers']
+        columns = ('id', 'book_id', 'borrower_id', 'loan_date', 'return_date', 'status', 'created_at', 'updated_at')
+
+        def rows():
+            random_value, target, date = rng.random, targets.random, self._date
+            for i in range(self.counts['loans']):
+                loan_day = int(random_value() * LOAN_PERIOD_DAYS)
+                returned_after = 1 + int(random_value() * LOAN_RETURN_MAX_DAYS)
+                active = returned_after > loan_day
+                loan_date = date(loan_day)
+                # Data zwrotu zwróconego wypożyczenia zapisywana jest w `updated_at`, tak jak przy zwrocie przez API
+                yield (first + i, first_book + int(target() * books), first_borrower + int(target() * borrowers),
+                       loan_date, date(loan_day - LOAN_DURATION_DAYS), 'Wypożyczona' if active else 'Zwrócone',
+                       loan_date, loan_date if active else date(loan_day - returned_after))
+        return columns, rows()
+
+
+def seed_database(counts, seed=42, batch_size=50_000, password='haslo123', log=None):
+    return Seeder(counts, seed, batch_size, password, log).run()
+
+
+# Polecenie CLI, np.: flask seed --books 1000000 --loans 10000000
+@click.command('seed')
+@click.option('--books', default=10_000, show_default=True, help='Liczba książek.')
+@click.option('--authors', type=int, help='Liczba autorów (domyślnie 1/4 liczby książek).')
+@click.option('--categories', type=int, help='Liczba kategorii (domyślnie 50).')
+@click.option('--borrowers', type=int, help='Liczba czytelników (domyślnie 1/10 liczby książek).')
+@click.option('--employees', type=int, help='Liczba pracowników (domyślnie 20).')
+@click.option('--loans', type=int, help='Liczba wypożyczeń wraz z wpisami historii (domyślnie 1/2 liczby książek).')
+@click.option('--seed', 'seed', default=42, show_default=True, help='Ziarno generatora danych.')
+@click.option('--batch-size', default=50_000, show_default=True, help='Liczba wierszy w jednej partii zapisu.')
+@click.option('--password', default='haslo123', show_default=True, help='Hasło kont pracowników.')
+@with_appcontext
+def seed_command(books, authors, categories, borrowers, employees, loans, seed, batch_size, password):
+    counts = default_counts(books, authors=authors, categories=categories, borrowers=borrowers,
+                            employees=employees, loans=loans)
+    start = time.perf_counter()
+    summary = seed_database(counts, seed, batch_size, password, log=click.echo)
+    click.echo(f"Zapisano {sum(summary.values())} wierszy w {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,251 @@
+# Serializacja list bez tworzenia obiektów ORM.
+# Zapytania wybierają tylko potrzebne kolumny, a otrzymane wiersze (zwykłe krotki)
+# zamieniane są bezpośrednio na słowniki gotowe do zakodowania jako JSON.
+from app import db
+from app.circulation import available_copies, book_status
+from app.filters import loan_history_status
+from app.models import Author, Book, Borrower, Category, Copy, Employee, Loan, LoanHistory, Reservation, book_author
+
+# Maksymalna liczba identyfikatorów w jednym zapytaniu IN
+IN_CHUNK_SIZE = 1000
+
+
+def categories_query():
+    return db.session.query(Category.id, Category.name)
+
+
+def books_query():
+    return db.session.query(
+        Book.id,
+        Book.title,
+        Book.isbn,
+        Category.name.label('category'),
+        Book.publication_year,
+        Book.publisher,
+        available_copies().label('quantity')
+    ).outerjoin(Category, Book.category_id == Category.id)
+
+
+def readers_query():
+    return db.session.query(
+        Borrower.id,
+        Borrower.first_name,
+        Borrower.last_name,
+        Borrower.email,
+        Borrower.phone_number,
+        Borrower.pesel,
+        Borrower.address,
+        Borrower.postal_code,
+        Borrower.city
+    )
+
+
+def borrowers_query():
+    return db.session.query(Borrower.id, Borrower.first_name, Borrower.last_name, Borrower.pesel)
+
+
+def employees_query():
+    return db.session.query(
+        Employee.id,
+        Employee.first_name,
+        Employee.last_name,
+        Employee.email,
+        Employee.phone_number,
+        Employee.pesel,
+        Employee.hired_date
+    )
+
+
+def loans_query():
+    return db.session.query(
+        Loan.id,
+        Loan.book_id,
+        Book.title,
+        Borrower.first_name,
+        Borrower.last_name,
+        Borrower.pesel,
+        Loan.loan_date,
+        Loan.return_date,
+        Loan.status
+    ).join(Book, Loan.book_id == Book.id) \
+        .join(Borrower, Loan.borrower_id == Borrower.id)
+
+
+# Historia wypożyczeń przechowuje kopie danych książki i czytelnika (app/history.py),
+# więc lista nie wymaga złączeń ani grupowania. Status (w tym przetrzymanie) wyznaczany jest w SQL.
+def loan_history_query(overdue_since):
+    return db.session.query(
+        LoanHistory.id,
+        LoanHistory.book_title,
+        LoanHistory.book_authors,
+        LoanHistory.borrower_first_name,
+        LoanHistory.borrower_last_name,
+        LoanHistory.borrower_pesel,
+        LoanHistory.checkout_date,
+        LoanHistory.return_date,
+        loan_history_status(overdue_since)
+    )
+
+
+def reservations_query():
+    return db.session.query(
+        Reservation.id,
+        Reservation.book_id,
+        Reservation.borrower_id,
+        Borrower.first_name,
+        Borrower.last_name,
+        Reservation.reservation_date,
+        Reservation.allocated_at,
+        Reservation.status
+    ).outerjoin(Borrower, Reservation.borrower_id == Borrower.id)
+
+
+# Egzemplarz z tytułem książki i ID aktywnego wypożyczenia (wyszukiwanie po indeksie `ix_loans_copy_id`)
+def copies_query():
+    return db.session.query(
+        Copy.id,
+        Copy.barcode,
+        Copy.book_id,
+        Book.title,
+        Copy.status,
+        Copy.location,
+        Loan.id.label('loan_id')
+    ).join(Book, Copy.book_id == Book.id) \
+        .outerjoin(Loan, db.and_(Loan.copy_id == Copy.id, Loan.status == 'Wypożyczona'))
+
+
+# Autorzy podanych książek: wiersze (ID książki, imię, nazwisko)
+def book_authors_query(book_ids):
+    return db.select(book_author.c.book_id, Author.first_name, Author.last_name) \
+        .join(Author, Author.id == book_author.c.author_id) \
+        .where(book_author.c.book_id.in_(book_ids))
+
+
+# Podział ID książek (bez powtórzeń) na części o rozmiarze IN_CHUNK_SIZE
+def book_id_chunks(book_ids):
+    book_ids = list(set(book_ids))
+    return [book_ids[start:start + IN_CHUNK_SIZE] for start in range(0, len(book_ids), IN_CHUNK_SIZE)]
+
+
+# Dopisanie autorów z wierszy `book_authors_query` do słownika {book_id: [(imię, nazwisko), ...]}
+def group_authors(rows, authors):
+    for book_id, first_name, last_name in rows:
+        authors.setdefault(book_id, []).append((first_name, last_name))
+    return authors
+
+
+# Pobranie autorów dla wielu książek naraz. Zwraca słownik {book_id: [(imię, nazwisko), ...]}.
+def authors_by_book(book_ids):
+    authors = {}
+    for chunk in book_id_chunks(book_ids):
+        group_authors(db.session.execute(book_authors_query(chunk)).all(), authors)
+    return authors
+
+
+def serialize_categories(rows):
+    return [{'id': row.id, 'name': row.name} for row in rows]
+
+
+def serialize_books(rows, authors=None):
+    if authors is None:
+        authors = authors_by_book([row.id for row in rows])
+    return [{
+        'id': row.id,
+        'title': row.title,
+        'isbn': row.isbn,
+        'category': row.category if row.category is not None else 'Brak kategorii',
+        'publication_year': row.publication_year,
+        'publisher': row.publisher,
+        'quantity': row.quantity,
+        'status': book_status(row.quantity),
+        'authors': [{'firstName': first_name, 'lastName': last_name}
+                    for first_name, last_name in authors.get(row.id, [])]
+    } for row in rows]
+
+
+def serialize_readers(rows):
+    return [{
+        'id': row.id,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'email': row.email,
+        'phone_number': row.phone_number,
+        'pesel': row.pesel,
+        'address': row.address,
+        'postal_code': row.postal_code,
+        'city': row.city
+    } for row in rows]
+
+
+def serialize_borrowers(rows):
+    return [{
+        'id': row.id,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'pesel': row.pesel
+    } for row in rows]
+
+
+def serialize_employees(rows):
+    return [{
+        'id': row.id,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'email': row.email,
+        'phone_number': row.phone_number,
+        'pesel': row.pesel,
+        'hired_date': row.hired_date.strftime("%Y-%m-%d") if row.hired_date else None
+    } for row in rows]
+
+
+def serialize_loans(rows, authors=None):
+    if authors is None:
+        authors = authors_by_book([row.book_id for row in rows])
+    loans_data = []
+    for row in rows:
+        book_authors = ', '.join(f"{first_name} {last_name}" for first_name, last_name in authors.get(row.book_id, []))
+        loans_data.append({
+            'id': row.id,
+            'book_title_with_authors': f"{row.title}-{book_authors}",
+            'borrower_name': f"{row.first_name} {row.last_name}",
+            'borrower_pesel': row.pesel,
+            'loan_date': row.loan_date.strftime('%Y-%m-%d'),
+            'return_date': row.return_date.strftime('%Y-%m-%d') if row.return_date else None,
+            'status': row.status
+        })
+    return loans_data
+
+
+def serialize_loan_history(rows):
+    return [{
+        'id': history[0],
+        'book_title_with_authors': f"{history[1]} - {history[2]}",
+        'borrower_info': f"{history[3]} {history[4]} ({history[5]})",
+        'loan_date': history[6].strftime('%Y-%m-%d'),
+        'return_date': history[7].strftime('%Y-%m-%d') if history[7] else '---',
+        'status': history[8]
+    } for history in rows]
+
+
+def serialize_reservations(rows):
+    return [{
+        'id': row.id,
+        'book_id': row.book_id,
+        'borrower_id': row.borrower_id,
+        'borrower_name': f"{row.first_name} {row.last_name}" if row.borrower_id else None,
+        'reservation_date': row.reservation_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'allocated_at': row.allocated_at.strftime('%Y-%m-%d %H:%M:%S') if row.allocated_at else None,
+        'status': row.status
+    } for row in rows]
+
+
+def serialize_copies(rows):
+    return [{
+        'id': row.id,
+        'barcode': row.barcode,
+        'book_id': row.book_id,
+        'title': row.title,
+        'status': row.status,
+        'location': row.location,
+        'loan_id': row.loan_id
+    } for row in rows]
@@ -0,0 +1,60 @@
+# Strumieniowe odpowiedzi JSON dla dużych zbiorów wyników.
+# Wiersze czytane są kursorem po stronie serwera (yield_per) i wysyłane klientowi partiami,
+# więc zużycie pamięci nie zależy od rozmiaru tabeli, a pierwsze bajty trafiają do klienta od razu.
+from itertools import islice
+
+from flask import Response, current_app, request, stream_with_context
+
+from app.pagination import after_key, get_page_args
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+# Ustalenie formatu strumienia na podstawie parametru `stream` lub nagłówka Accept.
+# Zwraca 'json' (tablica JSON), 'ndjson' (jeden obiekt w linii) albo None dla zwykłej odpowiedzi.
+def stream_format():
+    stream = request.args.get('stream')
+    if stream == 'ndjson' or request.accept_mimetypes.best == NDJSON_MIMETYPE:
+        return 'ndjson'
+    if stream in ('1', 'true', 'json'):
+        return 'json'
+    return None
+
+
+# Strumieniowanie wyników zapytania uporządkowanego po kolumnie `key_column`.
+# `serialize_batch` zamienia partię wierszy na listę słowników (może wykonać jedno dodatkowe zapytanie na partię).
+# Parametry `limit` i `after` są respektowane tak samo jak przy stronicowaniu.
+def stream_response(query, key_column, serialize_batch, fmt):
+    limit, after = get_page_args()
+    if after is not None:
+        query = query.filter(after_key(key_column, after))
+    query = query.order_by(key_column)
+    if limit is not None:
+        query = query.limit(limit)
+
+    batch_size = current_app.config.get('STREAM_BATCH_SIZE', 1000)
+    dumps = current_app.json.dumps
+
+    def generate():
+        rows = iter(query.yield_per(batch_size))
+        first = True
+        if fmt == 'json':
+            yield '['
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            items = [dumps(item, separators=(',', ':')) for item in serialize_batch(batch)]
+            if fmt == 'ndjson':
+                yield '\n'.join(items) + '\n'
+            else:
+                yield ('' if first else ',') + ','.join(items)
+            first = False
+        if fmt == 'json':
+            yield ']\n'
+
+    response = Response(stream_with_context(generate()),
+                        mimetype=NDJSON_MIMETYPE if fmt == 'ndjson' else 'application/json')
+    # Wyłączenie buforowania odpowiedzi przez serwer proxy (np. nginx)
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,125 @@
+# Wersjonowanie tabel i warunkowe odpowiedzi HTTP (ETag / If-None-Match).
+# Każdy zapis do tabeli zwiększa jej licznik w `table_versions` w tej samej transakcji,
+# a endpointy odczytu porównują ETag wyliczony z liczników z nagłówkiem If-None-Match
+# i zwracają 304 bez wykonywania właściwego zapytania.
+import hashlib
+import time
+from functools import wraps
+
+from flask import make_response, request
+from sqlalchemy import event
+
+from app import db
+from app.cache import response_cache
+from app.models import TableVersion
+
+
+# Dostępność egzemplarzy zmienia się przy każdym wypożyczeniu, zwrocie i rezerwacji, więc nie jest
+# wersjonowana w `table_versions` - jeden wspólny wiersz blokowany do końca transakcji szeregowałby
+# wypożyczenia wszystkich książek. Wersją pseudo-tabeli AVAILABILITY jest numer bieżącego okresu
+# AVAILABILITY_TTL sekund, więc odpowiedzi zawierające stan egzemplarzy są nieaktualne najwyżej przez ten czas.
+AVAILABILITY = 'availability'
+
+
+class AvailabilityClock:
+    def __init__(self, ttl=5):
+        self.ttl = ttl
+
+    def configure(self, config):
+        self.ttl = config.get('AVAILABILITY_TTL', self.ttl)
+
+    # Numer bieżącego okresu; przy AVAILABILITY_TTL=0 każde wywołanie daje nową wersję
+    def version(self):
+        if self.ttl <= 0:
+            return time.time_ns()
+        return int(time.time() // self.ttl)
+
+
+availability = AvailabilityClock()
+
+
+# Zwiększenie wersji podanych tabel. Wywoływane przed zatwierdzeniem transakcji zapisu.
+def bump_version(*names):
+    for name in names:
+        result = db.session.execute(
+            db.update(TableVersion)
+            .where(TableVersion.name == name)
+            .values(version=TableVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            db.session.add(TableVersion(name=name, version=1))
+        db.session.info.setdefault('bumped_tables', set()).add(name)
+
+
+# Po zatwierdzeniu zapisu proces od razu usuwa własne nieaktualne wpisy z pamięci podręcznej
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_after_commit(session):
+    tables = session.info.pop('bumped_tables', None)
+    if tables:
+        response_cache.invalidate(tables)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('bumped_tables', None)
+
+
+# Zapytanie o wersje podanych tabel
+def versions_query(names):
+    return db.select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(names))
+
+
+# Wersje tabel z wierszy `versions_query` w kolejności podanych nazw
+def versions_from_rows(names, rows):
+    versions = dict(rows)
+    return tuple(availability.version() if name == AVAILABILITY else versions.get(name, 0) for name in names)
+
+
+# Pobranie aktualnych wersji tabel jednym zapytaniem (w kolejności podanych nazw)
+def get_versions(*names):
+    return versions_from_rows(names, db.session.execute(versions_query(names)).all())
+
+
+# Wyznaczenie ETagu z wersji tabel, ścieżki i parametrów zapytania
+def make_etag(path, query_string, names, versions):
+    parts = [path, query_string.decode()]
+    parts += [f"{name}:{version}" for name, version in zip(names, versions)]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+# Dekorator dla endpointów GET, których odpowiedź zależy wyłącznie od zawartości podanych tabel.
+# Przy `cache=True` treść odpowiedzi przechowywana jest w pamięci procesu do czasu zmiany wersji tabel.
+def versioned(*names, cache=False):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = get_versions(*names)
+            etag = make_etag(request.path, request.query_string, names, versions)
+
+            # Klient ma aktualną wersję - odpowiedź 304 bez wykonywania zapytania
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                return response
+
+            cache_key = (request.path, request.query_string)
+            cached = response_cache.get(cache_key, versions) if cache else None
+            if cached:
+                body, mimetype, headers = cached
+                response = make_response(body, 200)
+                response.mimetype = mimetype
+                response.headers.extend(headers)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if cache and response.status_code == 200 and not response.is_streamed:
+                    # Zapamiętywane są tylko nagłówki specyficzne dla endpointu (np. kursor następnej strony)
+                    headers = [(key, value) for key, value in response.headers.items()
+                               if key.lower() not in ('content-type', 'content-length', 'set-cookie')]
+                    response_cache.set(cache_key, versions, names, response.get_data(), response.mimetype, headers)
+
+            if response.status_code == 200:
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
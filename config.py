@@ -7,19 +7,110 @@ from datetime import timedelta
 # Wczytuje dane z pliku .env
 load_dotenv()
 
+
+# Ustawienia puli połączeń dla bazy o podanym adresie: rozmiar puli, dodatkowe połączenia ponad pulę,
+# czas oczekiwania na wolne połączenie (s), sprawdzanie połączenia przed użyciem i czas, po którym
+# połączenie jest odnawiane (s). Limit czasu pojedynczej instrukcji (ms, 0 wyłącza) ustawiany jest
+# przy nawiązaniu połączenia z PostgreSQL; SQLite korzysta tylko z ustawień sprawdzania i odnawiania.
+def engine_options(url):
+    options = {
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'True') == 'True',
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'connect_args': {},
+    }
+    if url and url.startswith('postgresql'):
+        options['pool_size'] = int(os.getenv('DB_POOL_SIZE', 5))
+        options['max_overflow'] = int(os.getenv('DB_MAX_OVERFLOW', 10))
+        options['pool_timeout'] = float(os.getenv('DB_POOL_TIMEOUT', 30))
+        statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT', 0))
+        if statement_timeout:
+            options['connect_args']['options'] = f'-c statement_timeout={statement_timeout}'
+    return options
+
+
 class Config:
     # Konfiguracja bazy danych
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Opcjonalna replika tylko do odczytu, z której czytają żądania GET (app/replica.py)
+    SQLALCHEMY_BINDS = {
+        'replica': {'url': os.getenv('DATABASE_REPLICA_URL'), **engine_options(os.getenv('DATABASE_REPLICA_URL'))},
+    } if os.getenv('DATABASE_REPLICA_URL') else {}
+    DB_STATEMENT_TIMEOUT = int(os.getenv('DB_STATEMENT_TIMEOUT', 0))
+
+    # Asynchroniczna ścieżka odczytu (app/asgi.py): włączenie asynchronicznych endpointów odczytu, adres bazy
+    # dla asyncpg (domyślnie wyznaczany z adresu repliki albo bazy głównej) oraz liczba wątków obsługujących
+    # pozostałe żądania przez aplikację Flask
+    ASGI_ASYNC_READS = os.getenv('ASGI_ASYNC_READS', 'True') == 'True'
+    ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL')
+    ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 10))
     SECRET_KEY = os.getenv('SECRET_KEY')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=8)
     SECURITY_PASSWORD_SALT = os.getenv('SECURITY_PASSWORD_SALT')
 
+    # Haszowanie haseł: metoda z współczynnikiem pracy w formacie Werkzeug (np. "scrypt:32768:8:1",
+    # "pbkdf2:sha256:600000"), liczba wątków puli oraz liczba operacji oczekujących w kolejce.
+    # Hasła zapisane według innych ustawień są aktualizowane przy logowaniu.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', 32))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+
+    # Stronicowanie list (brak domyślnego limitu oznacza zwracanie całej listy)
+    PAGINATION_DEFAULT_LIMIT = int(os.getenv('PAGINATION_DEFAULT_LIMIT')) if os.getenv('PAGINATION_DEFAULT_LIMIT') else None
+    PAGINATION_MAX_LIMIT = int(os.getenv('PAGINATION_MAX_LIMIT', 1000))
+
+    # Liczba wierszy odczytywanych z kursora i wysyłanych w jednej partii odpowiedzi strumieniowej
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 1000))
+
+    # Pamięć podręczna odpowiedzi katalogu (liczba wpisów, łączny rozmiar w bajtach, czas życia w sekundach)
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 256))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))
+    # Czas (s), przez który katalog może pokazywać nieaktualną liczbę dostępnych egzemplarzy
+    # (wypożyczenia i zwroty nie unieważniają pamięci podręcznej ani ETagów)
+    AVAILABILITY_TTL = int(os.getenv('AVAILABILITY_TTL', 5))
+
+    # Liczba rekordów zapisywanych w jednej transakcji podczas masowego importu katalogu
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+
+    # Profilowanie zapytań SQL w żądaniach (nagłówki X-DB-*, log) oraz próg ostrzeżenia o powtarzanym zapytaniu (N+1)
+    SQL_PROFILER_ENABLED = os.getenv('SQL_PROFILER_ENABLED') == 'True'
+    SQL_PROFILER_HEADERS = os.getenv('SQL_PROFILER_HEADERS', 'True') == 'True'
+    SQL_PROFILER_REPEAT_THRESHOLD = int(os.getenv('SQL_PROFILER_REPEAT_THRESHOLD', 5))
+
+    # Maksymalna liczba tożsamości zalogowanych użytkowników przechowywanych w pamięci procesu
+    IDENTITY_CACHE_MAX_ENTRIES = int(os.getenv('IDENTITY_CACHE_MAX_ENTRIES', 1024))
+
     # Konfiguracja SMTP dla Gmaila
     MAIL_SERVER = os.getenv('MAIL_SERVER')
-    MAIL_PORT = int(os.getenv('MAIL_PORT'))
+    # Bez wartości domyślnej - port zależy od serwera i trybu (SSL/STARTTLS); wysyłka wymaga ustawienia MAIL_PORT
+    MAIL_PORT = int(os.getenv('MAIL_PORT')) if os.getenv('MAIL_PORT') else None
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
-    MAIL_USE_TLS = os.getenv('MAIL_USE_TLS') == 'False'
-    MAIL_USE_SSL = os.getenv('MAIL_USE_SSL') == 'True'
\ No newline at end of file
+    MAIL_USE_TLS = os.getenv('MAIL_USE_TLS') == 'True'
+    # Domyślnie połączenie SSL (jak dotychczas); MAIL_USE_SSL=False pozwala użyć np. lokalnego serwera SMTP
+    MAIL_USE_SSL = os.getenv('MAIL_USE_SSL', 'True') == 'True'
+
+    # Wysyłka wiadomości z kolejki (flask mail-worker): liczba wątków, rozmiar partii,
+    # limit prób, opóźnienie kolejnych prób w sekundach (podwajane po każdej nieudanej próbie)
+    MAIL_WORKER_THREADS = int(os.getenv('MAIL_WORKER_THREADS', 4))
+    MAIL_OUTBOX_BATCH_SIZE = int(os.getenv('MAIL_OUTBOX_BATCH_SIZE', 50))
+    MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', 8))
+    MAIL_RETRY_BACKOFF = int(os.getenv('MAIL_RETRY_BACKOFF', 30))
+    MAIL_RETRY_BACKOFF_MAX = int(os.getenv('MAIL_RETRY_BACKOFF_MAX', 3600))
+    MAIL_WORKER_POLL_INTERVAL = float(os.getenv('MAIL_WORKER_POLL_INTERVAL', 2))
+
+    # Generowanie raportów w tle (flask report-worker): liczba procesów, czas ważności gotowego raportu
+    # w sekundach, czas, po którym raport przerwanego procesu wraca do kolejki, oraz odstęp sprawdzania kolejki
+    REPORT_WORKER_PROCESSES = int(os.getenv('REPORT_WORKER_PROCESSES', 2))
+    REPORT_MAX_AGE = int(os.getenv('REPORT_MAX_AGE', 3600))
+    REPORT_CLAIM_TIMEOUT = int(os.getenv('REPORT_CLAIM_TIMEOUT', 1800))
+    REPORT_WORKER_POLL_INTERVAL = float(os.getenv('REPORT_WORKER_POLL_INTERVAL', 2))
+
+    # Przypomnienia o terminie zwrotu (flask send-reminders): ile dni przed terminem wysłać przypomnienie
+    # oraz liczba powiadomień zapisywanych w jednej transakcji
+    REMINDER_DAYS_BEFORE = int(os.getenv('REMINDER_DAYS_BEFORE', 3))
+    REMINDER_BATCH_SIZE = int(os.getenv('REMINDER_BATCH_SIZE', 1000))
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""add reports
+
+Revision ID: 00d62ce3b96b
+Revises: 2d0d6bba01b9
+Create Date: 2026-10-18 14:31:52.806417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '00d62ce3b96b'
+down_revision = '2d0d6bba01b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tabela `reports` z początkowego schematu została usunięta w efb1e78d1318; odtworzenie z kolumnami
+    # potrzebnymi do generowania raportów w tle
+    op.create_table('reports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=255), nullable=False),
+    sa.Column('generated_by', sa.Integer(), nullable=True),
+    sa.Column('params', sa.JSON(), nullable=False),
+    sa.Column('params_key', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['generated_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.create_index('ix_reports_status_created_at', ['status', 'created_at'], unique=False)
+        batch_op.create_index('ix_reports_type_params_key', ['type', 'params_key', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_index('ix_reports_type_params_key')
+        batch_op.drop_index('ix_reports_status_created_at')
+
+    op.drop_table('reports')
@@ -0,0 +1,53 @@
+"""loan filters and overdue indexes
+
+Revision ID: 2d0d6bba01b9
+Revises: a400b9c6951a
+Create Date: 2026-10-18 13:58:06.473120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d0d6bba01b9'
+down_revision = 'a400b9c6951a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Zwroty późniejsze niż 30 dni od wypożyczenia są w historii zapisywane jako przetrzymanie
+    if op.get_bind().dialect.name == 'sqlite':
+        late = "julianday(return_date) - julianday(checkout_date) >= 31"
+    else:
+        late = "return_date >= checkout_date + interval '31 days'"
+    op.execute(f"UPDATE loan_history SET status = 'Przetrzymana' WHERE status = 'Zwrócone' AND {late}")
+
+    with op.batch_alter_table('loans', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_loans_borrower_id'), ['borrower_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_loans_loan_date'), ['loan_date'], unique=False)
+        batch_op.create_index('ix_loans_active_return_date', ['return_date'], unique=False,
+                              postgresql_where=sa.text("status = 'Wypożyczona'"),
+                              sqlite_where=sa.text("status = 'Wypożyczona'"))
+
+    with op.batch_alter_table('loan_history', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_loan_history_checkout_date'), ['checkout_date'], unique=False)
+        batch_op.create_index('ix_loan_history_status_id', ['status', 'id'], unique=False)
+        batch_op.create_index('ix_loan_history_active_return_date', ['return_date'], unique=False,
+                              postgresql_where=sa.text("status = 'Wypożyczona'"),
+                              sqlite_where=sa.text("status = 'Wypożyczona'"))
+
+
+def downgrade():
+    with op.batch_alter_table('loan_history', schema=None) as batch_op:
+        batch_op.drop_index('ix_loan_history_active_return_date')
+        batch_op.drop_index('ix_loan_history_status_id')
+        batch_op.drop_index(batch_op.f('ix_loan_history_checkout_date'))
+
+    with op.batch_alter_table('loans', schema=None) as batch_op:
+        batch_op.drop_index('ix_loans_active_return_date')
+        batch_op.drop_index(batch_op.f('ix_loans_loan_date'))
+        batch_op.drop_index(batch_op.f('ix_loans_borrower_id'))
+
+    op.execute("UPDATE loan_history SET status = 'Zwrócone' WHERE status = 'Przetrzymana'")
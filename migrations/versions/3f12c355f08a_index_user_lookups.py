@@ -0,0 +1,63 @@
+"""index user lookups
+
+Revision ID: 3f12c355f08a
+Revises: 1c5a025f4b51
+Create Date: 2026-10-18 12:52:19.604377
+
+"""
+import logging
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f12c355f08a'
+down_revision = '1c5a025f4b51'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# Konta o powtórzonej nazwie użytkownika poza najstarszym (o najniższym ID)
+DUPLICATES = """
+    SELECT id FROM (
+        SELECT id, min(id) OVER (PARTITION BY username) AS keep_id FROM users
+    ) AS duplicates
+    WHERE id <> keep_id
+"""
+
+
+def upgrade():
+    # Indeks unikalny wymaga wcześniejszego usunięcia duplikatów nazw użytkowników. Konta nie są usuwane
+    # (odwołują się do nich pracownicy, powiadomienia i raporty): najstarsze zachowuje nazwę, a pozostałe
+    # otrzymują sufiks "#duplikat-<id>" i przed ponownym zalogowaniem trzeba nadać im nową nazwę.
+    # Zmienione konta są wypisywane w logu migracji, żeby administrator mógł powiadomić ich właścicieli.
+    renamed = op.get_bind().execute(sa.text(f"""
+        SELECT id, username FROM users WHERE id IN ({DUPLICATES}) ORDER BY username, id
+    """)).all()
+    for user_id, username in renamed:
+        logger.warning('Powtórzona nazwa użytkownika %r: konto %s otrzymuje nazwę %r', username, user_id,
+                       f'{username[:230]}#duplikat-{user_id}')
+    if renamed:
+        logger.warning('Zmieniono nazwy %d kont o powtórzonej nazwie użytkownika', len(renamed))
+
+    op.execute(f"""
+        UPDATE users
+        SET username = substr(username, 1, 230) || '#duplikat-' || CAST(id AS TEXT)
+        WHERE id IN ({DUPLICATES})
+    """)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_username'), ['username'], unique=True)
+
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_employees_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('employees', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_employees_user_id'))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_username'))
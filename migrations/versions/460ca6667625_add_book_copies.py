@@ -0,0 +1,119 @@
+"""add book copies
+
+Revision ID: 460ca6667625
+Revises: 99ba2f5bba19
+Create Date: 2026-10-18 15:49:02.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '460ca6667625'
+down_revision = '99ba2f5bba19'
+branch_labels = None
+depends_on = None
+
+
+def _barcode(book_id, number):
+    return f"CAST({book_id} AS VARCHAR(20)) || '-' || CAST({number} AS VARCHAR(20))"
+
+
+# Egzemplarze wypożyczone i odłożone dla rezerwacji nie były wliczane do `books.quantity`, więc ich numery
+# w obrębie książki następują po egzemplarzach dostępnych. Zapytanie wykonywane jest dwukrotnie
+# (wstawienie egzemplarzy i powiązanie z nimi wypożyczeń), a kody kreskowe wyznaczane są za każdym razem tak samo.
+HELD_COPIES = f"""
+    SELECT held.kind, held.id, held.book_id,
+           {_barcode('held.book_id', 'COALESCE(books.quantity, 0) + ROW_NUMBER() OVER '
+                                     '(PARTITION BY held.book_id ORDER BY held.kind, held.id)')} AS barcode
+    FROM (SELECT 'L' AS kind, id, book_id FROM loans WHERE status = 'Wypożyczona' AND book_id IS NOT NULL
+          UNION ALL
+          SELECT 'R' AS kind, id, book_id FROM reservations WHERE status = 'Przydzielona' AND book_id IS NOT NULL
+         ) held
+    JOIN books ON books.id = held.book_id
+"""
+
+
+def upgrade():
+    op.create_table('copies',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('barcode', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('location', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('copies', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_copies_barcode'), ['barcode'], unique=True)
+        batch_op.create_index('ix_copies_book_id_status', ['book_id', 'status'], unique=False)
+
+    with op.batch_alter_table('loans', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('copy_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_loans_copy_id'), ['copy_id'], unique=False)
+        batch_op.create_foreign_key('loans_copy_id_fkey', 'copies', ['copy_id'], ['id'])
+
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('copy_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('reservations_copy_id_fkey', 'copies', ['copy_id'], ['id'])
+
+    # Dostępne egzemplarze: `books.quantity` wierszy na książkę, o kodach <ID książki>-1, <ID książki>-2, ...
+    op.execute(f"""
+        INSERT INTO copies (book_id, barcode, status, created_at, updated_at)
+        WITH RECURSIVE numbers (book_id, number, quantity) AS (
+            SELECT id, 1, quantity FROM books WHERE quantity > 0
+            UNION ALL
+            SELECT book_id, number + 1, quantity FROM numbers WHERE number < quantity
+        )
+        SELECT book_id, {_barcode('book_id', 'number')}, 'Dostępny', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM numbers
+    """)
+
+    # Egzemplarze aktywnych wypożyczeń i przydzielonych rezerwacji
+    op.execute(f"""
+        INSERT INTO copies (book_id, barcode, status, created_at, updated_at)
+        SELECT book_id, barcode, CASE kind WHEN 'L' THEN 'Wypożyczony' ELSE 'Odłożony' END,
+               CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM ({HELD_COPIES}) held_copies
+    """)
+    for table, kind in (('loans', 'L'), ('reservations', 'R')):
+        op.execute(f"""
+            UPDATE {table} SET copy_id = copies.id
+            FROM ({HELD_COPIES}) held_copies JOIN copies ON copies.barcode = held_copies.barcode
+            WHERE held_copies.kind = '{kind}' AND {table}.id = held_copies.id
+        """)
+
+    # Dostępność wyznaczana jest z egzemplarzy
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_column('quantity')
+        batch_op.drop_column('status')
+
+
+def downgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('quantity', sa.Integer(), nullable=True))
+
+    op.execute("""
+        UPDATE books SET quantity = (SELECT count(*) FROM copies
+                                     WHERE copies.book_id = books.id AND copies.status = 'Dostępny')
+    """)
+    op.execute("UPDATE books SET status = CASE WHEN quantity > 0 THEN 'Dostępna' ELSE 'Wypożyczona' END")
+
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.drop_constraint('reservations_copy_id_fkey', type_='foreignkey')
+        batch_op.drop_column('copy_id')
+
+    with op.batch_alter_table('loans', schema=None) as batch_op:
+        batch_op.drop_constraint('loans_copy_id_fkey', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_loans_copy_id'))
+        batch_op.drop_column('copy_id')
+
+    with op.batch_alter_table('copies', schema=None) as batch_op:
+        batch_op.drop_index('ix_copies_book_id_status')
+        batch_op.drop_index(batch_op.f('ix_copies_barcode'))
+
+    op.drop_table('copies')
@@ -0,0 +1,32 @@
+"""add table versions
+
+Revision ID: 7443db58406f
+Revises: d0893fe9d6bb
+Create Date: 2026-10-18 10:05:12.418263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7443db58406f'
+down_revision = 'd0893fe9d6bb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(table_versions, [
+        {'name': 'books', 'version': 0},
+        {'name': 'categories', 'version': 0},
+    ])
+
+
+def downgrade():
+    op.drop_table('table_versions')
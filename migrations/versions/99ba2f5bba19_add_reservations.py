@@ -0,0 +1,45 @@
+"""add reservations
+
+Revision ID: 99ba2f5bba19
+Revises: e90c56eed47e
+Create Date: 2026-10-18 15:14:37.520846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '99ba2f5bba19'
+down_revision = 'e90c56eed47e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tabela `reservations` z początkowego schematu została usunięta w efb1e78d1318; odtworzenie
+    # z indeksem kolejki rezerwacji
+    op.create_table('reservations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=True),
+    sa.Column('borrower_id', sa.Integer(), nullable=True),
+    sa.Column('reservation_date', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('allocated_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.ForeignKeyConstraint(['borrower_id'], ['borrowers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_reservations_borrower_id'), ['borrower_id'], unique=False)
+        batch_op.create_index('ix_reservations_queue', ['book_id', 'status', 'reservation_date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.drop_index('ix_reservations_queue')
+        batch_op.drop_index(batch_op.f('ix_reservations_borrower_id'))
+
+    op.drop_table('reservations')
@@ -0,0 +1,80 @@
+"""denormalize loan history
+
+Revision ID: a400b9c6951a
+Revises: 3f12c355f08a
+Create Date: 2026-10-18 13:27:41.218305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a400b9c6951a'
+down_revision = '3f12c355f08a'
+branch_labels = None
+depends_on = None
+
+
+loan_history = sa.table('loan_history', sa.column('loan_id'), sa.column('book_id'), sa.column('borrower_id'),
+                        sa.column('book_title'), sa.column('book_authors'), sa.column('borrower_first_name'),
+                        sa.column('borrower_last_name'), sa.column('borrower_pesel'), sa.column('status'))
+loans = sa.table('loans', sa.column('id'), sa.column('book_id'), sa.column('borrower_id'), sa.column('status'))
+books = sa.table('books', sa.column('id'), sa.column('title'))
+authors = sa.table('authors', sa.column('id'), sa.column('first_name'), sa.column('last_name'))
+book_author = sa.table('book_author', sa.column('book_id'), sa.column('author_id'))
+borrowers = sa.table('borrowers', sa.column('id'), sa.column('first_name'), sa.column('last_name'),
+                     sa.column('pesel'))
+
+
+def upgrade():
+    with op.batch_alter_table('loan_history', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('book_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('borrower_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('book_title', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('book_authors', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('borrower_first_name', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('borrower_last_name', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('borrower_pesel', sa.String(length=11), nullable=True))
+        batch_op.add_column(sa.Column('status', sa.String(length=50), nullable=True))
+
+    # Wypełnienie kopii dla istniejących wpisów historii
+    op.execute(loan_history.update()
+               .where(loans.c.id == loan_history.c.loan_id)
+               .values(book_id=loans.c.book_id, borrower_id=loans.c.borrower_id, status=loans.c.status))
+
+    book_data = sa.select(
+        books.c.id, books.c.title,
+        sa.func.coalesce(sa.func.aggregate_strings(authors.c.first_name + ' ' + authors.c.last_name, ', '),
+                         '').label('authors')
+    ).select_from(books) \
+        .outerjoin(book_author, book_author.c.book_id == books.c.id) \
+        .outerjoin(authors, authors.c.id == book_author.c.author_id) \
+        .group_by(books.c.id, books.c.title) \
+        .subquery()
+    op.execute(loan_history.update()
+               .where(book_data.c.id == loan_history.c.book_id)
+               .values(book_title=book_data.c.title, book_authors=book_data.c.authors))
+
+    op.execute(loan_history.update()
+               .where(borrowers.c.id == loan_history.c.borrower_id)
+               .values(borrower_first_name=borrowers.c.first_name, borrower_last_name=borrowers.c.last_name,
+                       borrower_pesel=borrowers.c.pesel))
+
+    with op.batch_alter_table('loan_history', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_loan_history_book_id'), ['book_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_loan_history_borrower_id'), ['borrower_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('loan_history', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_loan_history_borrower_id'))
+        batch_op.drop_index(batch_op.f('ix_loan_history_book_id'))
+        batch_op.drop_column('status')
+        batch_op.drop_column('borrower_pesel')
+        batch_op.drop_column('borrower_last_name')
+        batch_op.drop_column('borrower_first_name')
+        batch_op.drop_column('book_authors')
+        batch_op.drop_column('book_title')
+        batch_op.drop_column('borrower_id')
+        batch_op.drop_column('book_id')
@@ -0,0 +1,82 @@
+"""refresh search vectors per statement
+
+Revision ID: b9a0105d32e8
+Revises: 460ca6667625
+Create Date: 2026-10-18 17:12:40.381205
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9a0105d32e8'
+down_revision = '460ca6667625'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Trigger dla każdego wiersza book_author przeliczał dokument książki po każdym powiązaniu, więc import
+    # wielowierszowymi INSERT-ami odświeżał tę samą książkę tyle razy, ile miała autorów. Trigger dla instrukcji
+    # odczytuje zmienione powiązania z tabeli przejściowej i odświeża każdą książkę raz.
+    op.execute("DROP TRIGGER IF EXISTS book_author_search_vector_update ON book_author")
+    op.execute("DROP FUNCTION IF EXISTS book_author_search_vector_trigger()")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION book_author_search_vector_trigger() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            UPDATE books SET search_vector = books_search_document(id, title, isbn, publisher)
+            WHERE id IN (SELECT book_id FROM changed_links);
+            RETURN NULL;
+        END
+        $$
+    """)
+    # Tabele przejściowe wymagają osobnego triggera dla każdego zdarzenia
+    op.execute("""
+        CREATE TRIGGER book_author_search_vector_insert
+        AFTER INSERT ON book_author
+        REFERENCING NEW TABLE AS changed_links
+        FOR EACH STATEMENT EXECUTE FUNCTION book_author_search_vector_trigger()
+    """)
+    op.execute("""
+        CREATE TRIGGER book_author_search_vector_delete
+        AFTER DELETE ON book_author
+        REFERENCING OLD TABLE AS changed_links
+        FOR EACH STATEMENT EXECUTE FUNCTION book_author_search_vector_trigger()
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS book_author_search_vector_delete ON book_author")
+    op.execute("DROP TRIGGER IF EXISTS book_author_search_vector_insert ON book_author")
+    op.execute("DROP FUNCTION IF EXISTS book_author_search_vector_trigger()")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION book_author_search_vector_trigger() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_book_id integer;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                v_book_id := OLD.book_id;
+            ELSE
+                v_book_id := NEW.book_id;
+            END IF;
+            UPDATE books SET search_vector = books_search_document(id, title, isbn, publisher)
+            WHERE id = v_book_id;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER book_author_search_vector_update
+        AFTER INSERT OR DELETE ON book_author
+        FOR EACH ROW EXECUTE FUNCTION book_author_search_vector_trigger()
+    """)
@@ -0,0 +1,153 @@
+"""add book search indexes
+
+Revision ID: be0e86d8d8b9
+Revises: 7443db58406f
+Create Date: 2026-10-18 10:41:37.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'be0e86d8d8b9'
+down_revision = '7443db58406f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_vector', sa.Text().with_variant(postgresql.TSVECTOR(), 'postgresql'),
+                                      nullable=True))
+
+    # Indeksy pełnotekstowe i trigramowe dostępne są tylko w PostgreSQL;
+    # na innych bazach wyszukiwanie korzysta z wolniejszego, przenośnego wariantu.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+
+    # unaccent() nie jest oznaczona jako IMMUTABLE, więc nie może być użyta w indeksie bezpośrednio
+    op.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+
+    # Konfiguracja wyszukiwania ignorująca wielkość liter i polskie znaki diakrytyczne (ą -> a, ł -> l, ...)
+    op.execute("CREATE TEXT SEARCH CONFIGURATION polish_unaccent ( COPY = simple )")
+    op.execute("""
+        ALTER TEXT SEARCH CONFIGURATION polish_unaccent
+        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple
+    """)
+
+    # Dokument wyszukiwania książki: tytuł i autorzy (waga A), ISBN (B), wydawnictwo (C)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION books_search_document(p_book_id integer, p_title text, p_isbn text,
+                                                         p_publisher text) RETURNS tsvector
+        LANGUAGE sql STABLE
+        AS $$
+            SELECT setweight(to_tsvector('polish_unaccent', coalesce(p_title, '')), 'A')
+                || setweight(to_tsvector('polish_unaccent', coalesce((
+                       SELECT string_agg(a.first_name || ' ' || a.last_name, ' ')
+                       FROM book_author ba JOIN authors a ON a.id = ba.author_id
+                       WHERE ba.book_id = p_book_id), '')), 'A')
+                || setweight(to_tsvector('simple', coalesce(p_isbn, '')), 'B')
+                || setweight(to_tsvector('polish_unaccent', coalesce(p_publisher, '')), 'C')
+        $$
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION books_search_vector_trigger() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            NEW.search_vector := books_search_document(NEW.id, NEW.title, NEW.isbn, NEW.publisher);
+            RETURN NEW;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER books_search_vector_update
+        BEFORE INSERT OR UPDATE OF title, isbn, publisher ON books
+        FOR EACH ROW EXECUTE FUNCTION books_search_vector_trigger()
+    """)
+
+    # Zmiana autorów książki odświeża jej dokument wyszukiwania
+    op.execute("""
+        CREATE OR REPLACE FUNCTION book_author_search_vector_trigger() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_book_id integer;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                v_book_id := OLD.book_id;
+            ELSE
+                v_book_id := NEW.book_id;
+            END IF;
+            UPDATE books SET search_vector = books_search_document(id, title, isbn, publisher)
+            WHERE id = v_book_id;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER book_author_search_vector_update
+        AFTER INSERT OR DELETE ON book_author
+        FOR EACH ROW EXECUTE FUNCTION book_author_search_vector_trigger()
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION authors_search_vector_trigger() RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            UPDATE books SET search_vector = books_search_document(id, title, isbn, publisher)
+            WHERE id IN (SELECT book_id FROM book_author WHERE author_id = NEW.id);
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER authors_search_vector_update
+        AFTER UPDATE OF first_name, last_name ON authors
+        FOR EACH ROW EXECUTE FUNCTION authors_search_vector_trigger()
+    """)
+
+    op.execute("UPDATE books SET search_vector = books_search_document(id, title, isbn, publisher)")
+
+    op.execute("CREATE INDEX ix_books_search_vector ON books USING gin (search_vector)")
+    op.execute("CREATE INDEX ix_books_title_trgm ON books USING gin (f_unaccent(lower(title)) gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_books_publisher_trgm ON books USING gin (f_unaccent(lower(publisher)) gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_books_isbn_trgm ON books USING gin (isbn gin_trgm_ops)")
+    op.execute("""
+        CREATE INDEX ix_authors_name_trgm ON authors
+        USING gin (f_unaccent(lower(first_name || ' ' || last_name)) gin_trgm_ops)
+    """)
+    op.execute("CREATE INDEX ix_book_author_author_id ON book_author (author_id)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_book_author_author_id")
+        op.execute("DROP INDEX IF EXISTS ix_authors_name_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_books_isbn_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_books_publisher_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_books_title_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_books_search_vector")
+        op.execute("DROP TRIGGER IF EXISTS authors_search_vector_update ON authors")
+        op.execute("DROP TRIGGER IF EXISTS book_author_search_vector_update ON book_author")
+        op.execute("DROP TRIGGER IF EXISTS books_search_vector_update ON books")
+        op.execute("DROP FUNCTION IF EXISTS authors_search_vector_trigger()")
+        op.execute("DROP FUNCTION IF EXISTS book_author_search_vector_trigger()")
+        op.execute("DROP FUNCTION IF EXISTS books_search_vector_trigger()")
+        op.execute("DROP FUNCTION IF EXISTS books_search_document(integer, text, text, text)")
+        op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS polish_unaccent")
+        op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
+
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_column('search_vector')
@@ -0,0 +1,41 @@
+"""add notifications
+
+Revision ID: e90c56eed47e
+Revises: 00d62ce3b96b
+Create Date: 2026-10-18 14:52:10.374019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e90c56eed47e'
+down_revision = '00d62ce3b96b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tabela `notifications` z początkowego schematu została usunięta w efb1e78d1318; odtworzenie z kolumnami
+    # potrzebnymi do przypomnień o terminie zwrotu
+    op.create_table('notifications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('loan_id', sa.Integer(), nullable=True),
+    sa.Column('type', sa.String(length=20), nullable=False),
+    sa.Column('due_date', sa.DateTime(), nullable=False),
+    sa.Column('recipient', sa.String(length=255), nullable=True),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['loan_id'], ['loans.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('loan_id', 'type', 'due_date', name='uq_notifications_loan_type_due_date')
+    )
+
+
+def downgrade():
+    op.drop_table('notifications')
@@ -0,0 +1,47 @@
+"""unique author names
+
+Revision ID: edbcf0256ded
+Revises: be0e86d8d8b9
+Create Date: 2026-10-18 11:20:54.177305
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'edbcf0256ded'
+down_revision = 'be0e86d8d8b9'
+branch_labels = None
+depends_on = None
+
+# Autorzy o tym samym imieniu i nazwisku oraz identyfikator autora, który zostaje zachowany
+DUPLICATES = """
+    SELECT id FROM (
+        SELECT id, min(id) OVER (PARTITION BY first_name, last_name) AS keep_id FROM authors
+    ) AS duplicates
+    WHERE id <> keep_id
+"""
+
+
+def upgrade():
+    # Scalenie ewentualnych duplikatów autorów przed założeniem ograniczenia unikalności
+    op.execute("""
+        INSERT INTO book_author (book_id, author_id)
+        SELECT ba.book_id, duplicates.keep_id
+        FROM book_author ba
+        JOIN (
+            SELECT id, min(id) OVER (PARTITION BY first_name, last_name) AS keep_id FROM authors
+        ) AS duplicates ON duplicates.id = ba.author_id
+        WHERE duplicates.id <> duplicates.keep_id
+        ON CONFLICT DO NOTHING
+    """)
+    op.execute(f"DELETE FROM book_author WHERE author_id IN ({DUPLICATES})")
+    op.execute(f"DELETE FROM authors WHERE id IN ({DUPLICATES})")
+
+    with op.batch_alter_table('authors', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_authors_name', ['first_name', 'last_name'])
+
+
+def downgrade():
+    with op.batch_alter_table('authors', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_authors_name', type_='unique')
@@ -0,0 +1,31 @@
+"""index loan foreign keys
+
+Revision ID: f07b185ea3fb
+Revises: edbcf0256ded
+Create Date: 2026-10-18 11:58:03.661920
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f07b185ea3fb'
+down_revision = 'edbcf0256ded'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('loans', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_loans_book_id'), ['book_id'], unique=False)
+
+    with op.batch_alter_table('loan_history', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_loan_history_loan_id'), ['loan_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('loan_history', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_loan_history_loan_id'))
+
+    with op.batch_alter_table('loans', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_loans_book_id'))
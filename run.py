@@ -1,5 +1,7 @@
 #Plik, który uruchamia aplikację
-from app import app
+from app import create_app
+
+app = create_app()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,53 @@
+# Wspólne fikstury testów: aplikacja z pustą bazą SQLite w katalogu tymczasowym (albo bazą wskazaną
+# przez TEST_DATABASE_URL, np. PostgreSQL), klient testowy i przykładowa biblioteka z generatora danych.
+import os
+
+import pytest
+
+from app import create_app, db
+from app.cache import response_cache
+from app.identity import identity_cache
+from app.seeding import default_counts, seed_database
+from config import engine_options
+
+
+@pytest.fixture
+def app(tmp_path):
+    url = os.getenv('TEST_DATABASE_URL') or f'sqlite:///{tmp_path / "test.db"}'
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': url,
+        'SQLALCHEMY_ENGINE_OPTIONS': engine_options(url),
+        'SQLALCHEMY_BINDS': {},
+        'SECRET_KEY': 'test',
+        'JWT_SECRET_KEY': 'test',
+        'SECURITY_PASSWORD_SALT': 'test',
+        # Szybkie haszowanie haseł - testy nie mierzą kosztu scrypt
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    })
+    with app.app_context():
+        db.create_all()
+    # Pamięci podręczne odpowiedzi i tożsamości są wspólne dla procesu, a wersje tabel każdej bazy testowej
+    # zaczynają się od zera
+    response_cache.invalidate()
+    identity_cache.clear()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+# Mała biblioteka: 40 książek z egzemplarzami i autorami, 10 czytelników, 30 wypożyczeń z historią
+@pytest.fixture
+def library(app):
+    counts = default_counts(40, authors=10, categories=3, borrowers=10, employees=2, loans=30)
+    with app.app_context():
+        return seed_database(counts, log=lambda message: None)
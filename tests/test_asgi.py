@@ -0,0 +1,96 @@
+# Asynchroniczna ścieżka odczytu (app/asgi.py) zwraca te same odpowiedzi co endpointy Flaska
+from functools import partial
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from anyio.from_thread import start_blocking_portal
+
+from app import db, versioning
+from app.asgi import AsyncReads, create_asgi_app
+from app.cache import response_cache
+
+PATHS = [
+    '/api/categories', '/api/books', '/api/books?limit=7', '/api/readers?limit=4', '/api/borrowers',
+    '/api/borrowers?limit=3', '/api/loans', '/api/loans?limit=6', '/api/loans?status=overdue&limit=3',
+    '/api/loans?borrower_id=2', '/api/loan-history', '/api/loan-history?limit=5', '/api/loan-history?status=returned',
+    '/api/loans?limit=0', '/api/books?after=zzz', '/api/loans?borrower_id=x', '/api/loan-history?date_from=bad',
+]
+
+
+@pytest.fixture
+def asgi_client(app, library, monkeypatch):
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            pytest.skip('Asynchroniczna ścieżka odczytu wymaga PostgreSQL')
+    # Ta sama wersja dostępności egzemplarzy dla obu ścieżek
+    monkeypatch.setattr(versioning, 'time', SimpleNamespace(time=lambda: 1_000_000.0))
+
+    # Odpowiedzi przygotowane przez ścieżkę asynchroniczną (a nie przez aplikację Flask w puli wątków)
+    handled = []
+    json = AsyncReads.json
+
+    def recording_json(self, *args, **kwargs):
+        handled.append(args[0])
+        return json(self, *args, **kwargs)
+
+    monkeypatch.setattr(AsyncReads, 'json', recording_json)
+
+    # Jedna pętla zdarzeń dla wszystkich żądań (pula połączeń asyncpg jest z nią związana) i cykl życia aplikacji,
+    # który zamyka silnik asynchroniczny
+    asgi_app = create_asgi_app(dict(app.config))
+    with start_blocking_portal() as portal, \
+            portal.wrap_async_context_manager(asgi_app.router.lifespan_context(asgi_app)):
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi_app), base_url='http://testserver')
+        yield SimpleNamespace(
+            handled=handled,
+            get=lambda path, **kwargs: portal.call(partial(http.get, path, **kwargs)),
+            post=lambda path, **kwargs: portal.call(partial(http.post, path, **kwargs)),
+        )
+        portal.call(http.aclose)
+
+
+# Odpowiedź bez udziału wspólnej pamięci podręcznej: (status, treść, typ, ETag, kursor następnej strony)
+def _fetch(get, path):
+    response_cache.invalidate()
+    response = get(path)
+    body = response.content if isinstance(response, httpx.Response) else response.data
+    return (response.status_code, body, response.headers.get('Content-Type'), response.headers.get('ETag'),
+            response.headers.get('X-Next-Cursor'))
+
+
+# Kolejne strony (do czterech) pobierane są kursorem z nagłówka X-Next-Cursor
+@pytest.mark.parametrize('path', PATHS)
+def test_async_reads_match_flask(client, asgi_client, path):
+    page_path = path
+    for _ in range(4):
+        flask_response = _fetch(client.get, page_path)
+        handled = len(asgi_client.handled)
+        assert _fetch(asgi_client.get, page_path) == flask_response
+        assert len(asgi_client.handled) == handled + 1
+
+        cursor = flask_response[4]
+        if not cursor:
+            break
+        page_path = path + ('&' if '?' in path else '?') + f'after={cursor}'
+
+
+def test_async_reads_share_etags_with_flask(client, asgi_client):
+    etag = client.get('/api/books?limit=5').headers['ETag']
+
+    response = asgi_client.get('/api/books?limit=5', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+    # Zapis przez aplikację Flask (w serwerze ASGI) zmienia ETag obu ścieżek
+    assert asgi_client.post('/api/categories', json={'name': 'Reportaż'}).status_code == 201
+    assert asgi_client.get('/api/books?limit=5', headers={'If-None-Match': etag}).status_code == 200
+    assert client.get('/api/books?limit=5').headers['ETag'] == asgi_client.get('/api/books?limit=5').headers['ETag']
+
+
+def test_streamed_and_write_requests_go_to_flask(client, asgi_client):
+    response = asgi_client.get('/api/loans?stream=1')
+    assert response.status_code == 200
+    assert response.content == client.get('/api/loans?stream=1').data
+    assert asgi_client.handled == []
+    assert AsyncReads.streamed(SimpleNamespace(query_params={}, headers={'accept': 'application/x-ndjson'}))
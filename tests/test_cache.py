@@ -0,0 +1,137 @@
+# Pamięć podręczna odpowiedzi katalogu (app/cache.py): trafienia, czyszczenie po zatwierdzeniu zapisu
+# i wpisy nieaktualne po zmianie wersji tabel przez inny proces
+from types import SimpleNamespace
+
+import pytest
+
+from app import cache as cache_module, db, serializers, versioning
+from app.cache import ResponseCache, response_cache
+from app.models import Category, TableVersion
+
+
+@pytest.fixture
+def queries(library, monkeypatch):
+    monkeypatch.setattr(versioning, 'time', SimpleNamespace(time=lambda: 1_000_000.0))
+
+    # Liczba wykonań endpointu listy kategorii
+    calls = []
+    categories_query = serializers.categories_query
+
+    def counting_categories_query():
+        calls.append(1)
+        return categories_query()
+
+    monkeypatch.setattr(serializers, 'categories_query', counting_categories_query)
+    return calls
+
+
+def _stats_delta(before):
+    after = response_cache.stats()
+    return {key: after[key] - before[key] for key in ('hits', 'misses', 'stale', 'invalidations')}
+
+
+def test_repeated_request_is_served_from_cache(client, queries):
+    before = response_cache.stats()
+
+    first = client.get('/api/categories')
+    second = client.get('/api/categories')
+
+    assert len(queries) == 1
+    assert second.data == first.data
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert second.mimetype == 'application/json'
+    assert _stats_delta(before) == {'hits': 1, 'misses': 1, 'stale': 0, 'invalidations': 0}
+
+    # Inne parametry zapytania to osobny wpis
+    client.get('/api/categories?x=1')
+    assert len(queries) == 2
+
+
+def test_cached_page_keeps_next_cursor(client, library):
+    first = client.get('/api/books?limit=5')
+    before = response_cache.stats()
+    second = client.get('/api/books?limit=5')
+
+    assert _stats_delta(before)['hits'] == 1
+    assert second.data == first.data
+    assert second.headers['X-Next-Cursor'] == first.headers['X-Next-Cursor']
+
+
+def test_commit_invalidates_dependent_entries(client, queries):
+    client.get('/api/categories')
+    client.get('/api/books')
+    entries = response_cache.stats()['entries']
+    before = response_cache.stats()
+
+    # Nowa książka zmienia tylko tabele `books` i `copies` - lista kategorii pozostaje w pamięci
+    response = client.post('/api/books', json={'title': 'Lalka', 'isbn': '978-83-240-0001-1', 'category': 1,
+                                               'publication_year': 1890, 'publisher': 'Ossolineum', 'authors': []})
+    assert response.status_code == 201
+    assert response_cache.stats()['entries'] == entries - 1
+
+    assert client.post('/api/categories', json={'name': 'Reportaż'}).status_code == 201
+    assert response_cache.stats()['entries'] == entries - 2
+    assert _stats_delta(before)['invalidations'] == 2
+
+    response = client.get('/api/categories')
+    assert 'Reportaż' in [category['name'] for category in response.get_json()]
+    assert len(queries) == 2
+
+
+def test_rolled_back_write_keeps_entries(app, client, queries):
+    client.get('/api/categories')
+
+    with app.app_context():
+        db.session.add(Category(name='Wycofana'))
+        versioning.bump_version('categories')
+        db.session.rollback()
+
+    client.get('/api/categories')
+    assert len(queries) == 1
+
+
+# Zapis wykonany przez inny proces nie czyści pamięci tego procesu - wpis odrzucany jest po porównaniu wersji
+def test_entry_is_stale_after_version_change_elsewhere(app, client, queries):
+    first = client.get('/api/categories')
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(Category.__table__.insert().values(name='Z innego procesu'))
+        connection.execute(db.update(TableVersion).where(TableVersion.name == 'categories')
+                           .values(version=TableVersion.version + 1))
+    assert response_cache.stats()['entries'] > 0
+    before = response_cache.stats()
+
+    response = client.get('/api/categories')
+
+    assert _stats_delta(before) == {'hits': 0, 'misses': 0, 'stale': 1, 'invalidations': 0}
+    assert len(queries) == 2
+    assert response.headers['ETag'] != first.headers['ETag']
+    assert 'Z innego procesu' in [category['name'] for category in response.get_json()]
+
+    client.get('/api/categories')
+    assert len(queries) == 2
+
+
+def test_cache_limits_and_expiry(monkeypatch):
+    cache = ResponseCache(max_entries=2, max_bytes=10, ttl=60)
+    cache.set('a', (1,), ['books'], b'aaaa', 'application/json')
+    cache.set('b', (1,), ['categories'], b'bbbb', 'application/json')
+    assert cache.get('a', (1,)) is not None
+
+    # Najdawniej używany wpis usuwany jest po przekroczeniu liczby wpisów lub rozmiaru
+    cache.set('c', (1,), ['books'], b'cccc', 'application/json')
+    assert cache.get('b', (1,)) is None
+    cache.set('d', (1,), ['books'], b'dddd', 'application/json')
+    assert cache.get('a', (1,)) is None
+    assert cache.stats()['evictions'] == 2
+    cache.set('e', (1,), ['books'], b'x' * 11, 'application/json')
+    assert cache.get('e', (1,)) is None
+
+    cache.invalidate(['categories'])
+    assert cache.stats()['entries'] == 2
+    cache.invalidate(['books'])
+    assert cache.stats()['entries'] == 0
+
+    cache.set('f', (1,), ['books'], b'ffff', 'application/json')
+    monkeypatch.setattr(cache_module, 'time', SimpleNamespace(monotonic=lambda: float('inf')))
+    assert cache.get('f', (1,)) is None
+    assert cache.stats()['stale'] == 1
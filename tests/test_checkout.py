@@ -0,0 +1,136 @@
+# Wypożyczanie dostępnych egzemplarzy książki (app/circulation.py)
+import threading
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app import db, versioning
+from app.models import Book, Copy, Loan, TableVersion
+from app.versioning import availability
+
+
+@pytest.fixture
+def book(app, library):
+    with app.app_context():
+        book = Book(title='Lalka', category_id=1)
+        db.session.add(book)
+        db.session.flush()
+        db.session.add_all([Copy(book_id=book.id, barcode=f'LALKA-{number}', status='Dostępny')
+                            for number in range(5)])
+        db.session.commit()
+        return book.id
+
+
+def _checkout(client, book_ids, borrower_id=1):
+    return client.post('/api/loans', json={'book_ids': book_ids, 'borrower_id': borrower_id,
+                                           'loan_date': '2026-10-01', 'return_date': '2026-10-15'})
+
+
+def _statuses(app, book_id):
+    with app.app_context():
+        return dict(db.session.query(Copy.id, Copy.status).filter(Copy.book_id == book_id).all())
+
+
+def _table_versions(app):
+    with app.app_context():
+        return dict(db.session.query(TableVersion.name, TableVersion.version).all())
+
+
+def _quantity(client, book_id):
+    return next(book['quantity'] for book in client.get('/api/books').get_json() if book['id'] == book_id)
+
+
+# Wypożyczenia i zwroty nie blokują wspólnego wiersza wersji; katalog pokazuje nową dostępność w kolejnym okresie
+def test_circulation_does_not_bump_table_versions(app, client, book, monkeypatch):
+    monkeypatch.setattr(availability, 'ttl', 60)
+    now = [1_000_000.0]
+    monkeypatch.setattr(versioning, 'time', SimpleNamespace(time=lambda: now[0]))
+    versions = _table_versions(app)
+    assert _quantity(client, book) == 5
+
+    loan_id, = _checkout(client, [book]).get_json()['loan_ids']
+    assert _table_versions(app) == versions
+    assert _quantity(client, book) == 5
+
+    now[0] += 60
+    assert _quantity(client, book) == 4
+
+    assert client.post(f'/api/loans/return/{loan_id}').status_code == 200
+    assert _table_versions(app) == versions
+    now[0] += 60
+    assert _quantity(client, book) == 5
+
+
+# Równoległe wypożyczenie zajmuje wybrany egzemplarz między wyborem kandydatów a ich oznaczeniem
+@pytest.fixture
+def concurrent_claim(app, book):
+    claimed = []
+
+    def claim(orm_execute_state):
+        if orm_execute_state.is_update and not claimed:
+            copy_id, = orm_execute_state.session.connection().execute(
+                db.select(Copy.id).where(Copy.book_id == book, Copy.status == 'Dostępny')
+                .order_by(Copy.id).limit(1)).one()
+            orm_execute_state.session.connection().execute(
+                db.update(Copy).where(Copy.id == copy_id).values(status='Wypożyczony'))
+            claimed.append(copy_id)
+
+    with app.app_context():
+        event.listen(db.session, 'do_orm_execute', claim)
+    yield claimed
+    with app.app_context():
+        event.remove(db.session, 'do_orm_execute', claim)
+
+
+def test_checkout_retries_copies_claimed_concurrently(app, client, book, concurrent_claim):
+    response = _checkout(client, [book, book, book])
+
+    assert response.status_code == 201, response.get_json()
+    assert len(concurrent_claim) == 1
+    with app.app_context():
+        lent = {copy_id for copy_id, in db.session.query(Loan.copy_id).filter(Loan.book_id == book).all()}
+    assert len(lent) == 3
+    assert concurrent_claim[0] not in lent
+    assert list(_statuses(app, book).values()).count('Dostępny') == 1
+
+
+def test_checkout_rejects_when_no_copies_remain(app, client, book, concurrent_claim):
+    response = _checkout(client, [book] * 5)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == f'Brak dostępnych egzemplarzy książki o ID: {book}'
+    with app.app_context():
+        assert db.session.query(Loan).filter(Loan.book_id == book).count() == 0
+
+
+# Równoległe wypożyczenia tej samej książki: wydanych zostaje dokładnie tyle egzemplarzy, ile jest dostępnych.
+# Test ścieżki FOR UPDATE SKIP LOCKED - SQLite ją ignoruje i szereguje zapisy blokadą pliku.
+def test_concurrent_checkouts_never_oversell(app, book):
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            pytest.skip('SKIP LOCKED wymaga PostgreSQL')
+    clients, copies = 20, 5
+    barrier = threading.Barrier(clients)
+    responses = [None] * clients
+
+    def borrow(index):
+        client = app.test_client()
+        barrier.wait()
+        responses[index] = _checkout(client, [book], borrower_id=index % 10 + 1)
+
+    threads = [threading.Thread(target=borrow, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    codes = [response.status_code for response in responses]
+    assert codes.count(201) == copies, [response.get_json() for response in responses]
+    assert codes.count(400) == clients - copies
+    assert all(response.get_json()['error'] == f'Brak dostępnych egzemplarzy książki o ID: {book}'
+               for response in responses if response.status_code == 400)
+    assert list(_statuses(app, book).values()) == ['Wypożyczony'] * copies
+    with app.app_context():
+        lent = [copy_id for copy_id, in db.session.query(Loan.copy_id).filter(Loan.book_id == book).all()]
+    assert len(lent) == len(set(lent)) == copies
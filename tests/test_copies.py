@@ -0,0 +1,83 @@
+# Usuwanie książek i wycofywanie egzemplarzy (DELETE /api/books/<id>)
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models import Book, Copy, Loan, Reservation
+
+
+@pytest.fixture
+def book(app, library):
+    with app.app_context():
+        book = Book(title='Przedwiośnie', category_id=1)
+        db.session.add(book)
+        db.session.flush()
+        db.session.add_all([Copy(book_id=book.id, barcode=f'PRZEDWIOSNIE-{number}', status='Dostępny')
+                            for number in range(2)])
+        db.session.commit()
+        return book.id
+
+
+def _checkout(client, book_id):
+    response = client.post('/api/loans', json={'book_ids': [book_id], 'borrower_id': 1,
+                                               'loan_date': '2026-10-01', 'return_date': '2026-10-15'})
+    assert response.status_code == 201
+    return response.get_json()['loan_ids'][0]
+
+
+def _statuses(app, book_id):
+    with app.app_context():
+        return [status for status, in db.session.query(Copy.status).filter(Copy.book_id == book_id)
+                .order_by(Copy.id).all()]
+
+
+def test_delete_withdraws_available_copy_then_deletes_book(app, client, book):
+    assert client.delete(f'/api/books/{book}').status_code == 200
+    assert _statuses(app, book) == ['Dostępny', 'Wycofany']
+
+    assert client.delete(f'/api/books/{book}').status_code == 200
+    with app.app_context():
+        assert db.session.get(Book, book) is None
+    assert _statuses(app, book) == []
+
+
+def test_delete_refuses_book_with_last_copy_on_loan(app, client, book):
+    assert client.delete(f'/api/books/{book}').status_code == 200
+    loan_id = _checkout(client, book)
+
+    response = client.delete(f'/api/books/{book}')
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Nie można usunąć książki, która jest wypożyczona lub zarezerwowana'
+    assert _statuses(app, book) == ['Wypożyczony', 'Wycofany']
+    with app.app_context():
+        assert db.session.get(Book, book) is not None
+        assert db.session.get(Loan, loan_id).copy_id is not None
+
+    assert client.post(f'/api/loans/return/{loan_id}').status_code == 200
+    assert client.delete(f'/api/books/{book}').status_code == 200
+
+
+def test_delete_refuses_book_with_waiting_reservation(app, client, book):
+    assert client.delete(f'/api/books/{book}').status_code == 200
+    with app.app_context():
+        reservation = Reservation(book_id=book, borrower_id=2, status='Oczekująca',
+                                  reservation_date=datetime(2026, 10, 1))
+        db.session.add(reservation)
+        db.session.commit()
+        reservation_id = reservation.id
+
+    assert client.delete(f'/api/books/{book}').status_code == 400
+
+    assert client.delete(f'/api/reservations/{reservation_id}').status_code == 200
+    assert client.delete(f'/api/books/{book}').status_code == 200
+
+
+def test_delete_refuses_book_with_copy_held_for_reservation(app, client, book):
+    assert client.delete(f'/api/books/{book}').status_code == 200
+    assert client.post('/api/reservations', json={'book_id': book, 'borrower_id': 2}).status_code == 201
+    assert _statuses(app, book) == ['Odłożony', 'Wycofany']
+
+    assert client.delete(f'/api/books/{book}').status_code == 400
+    assert _statuses(app, book) == ['Odłożony', 'Wycofany']
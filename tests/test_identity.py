@@ -0,0 +1,102 @@
+# Tożsamość zalogowanego użytkownika (app/identity.py): pamięć podręczna procesu unieważniana zmianą danych
+# użytkownika lub pracownika
+from types import SimpleNamespace
+
+import pytest
+
+from app import db, identity
+from app.models import Role
+
+EMPLOYEE = {'first_name': 'Jan', 'last_name': 'Kowalski', 'pesel': '90010112345', 'email': 'jan@example.com',
+            'phone_number': '500100200', 'password': 'haslo123'}
+
+
+@pytest.fixture
+def employee(app, client):
+    with app.app_context():
+        db.session.add_all([Role(id=1, role_name='Admin'), Role(id=2, role_name='Pracownik')])
+        db.session.commit()
+
+    response = client.post('/add-employee', json=EMPLOYEE)
+    assert response.status_code == 201
+    employee_id = response.get_json()['employee_id']
+
+    response = client.post('/users/login', json={'username': EMPLOYEE['email'], 'password': EMPLOYEE['password']})
+    assert response.status_code == 200
+    return SimpleNamespace(id=employee_id, headers={'Authorization': f"Bearer {response.get_json()['access_token']}"})
+
+
+# Identyfikatory użytkowników, których tożsamość wczytano z bazy (z pominięciem pamięci podręcznej)
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+    load_identity = identity._load_identity
+
+    def counting_load_identity(user_id):
+        calls.append(user_id)
+        return load_identity(user_id)
+
+    monkeypatch.setattr(identity, '_load_identity', counting_load_identity)
+    return calls
+
+
+def _details(client, employee):
+    return client.get('/api/user-details', headers=employee.headers)
+
+
+def test_identity_is_cached(client, employee, loads):
+    first = _details(client, employee)
+    second = _details(client, employee)
+
+    assert first.status_code == second.status_code == 200
+    assert second.get_json() == first.get_json() == {
+        'username': 'jan@example.com', 'role': 'Pracownik', 'first_name': 'Jan', 'last_name': 'Kowalski',
+        'email': 'jan@example.com'}
+    assert len(loads) == 1
+
+
+def test_update_username_invalidates_identity(client, employee, loads):
+    _details(client, employee)
+
+    response = client.put('/api/update-username', json={'newUsername': 'jan.kowalski@example.com'},
+                          headers=employee.headers)
+    assert response.status_code == 200
+
+    # Dotychczasowy token wskazuje to samo konto (po ID) - odczyt zwraca nową nazwę
+    assert _details(client, employee).get_json()['username'] == 'jan.kowalski@example.com'
+    new_token = {'Authorization': f"Bearer {response.get_json()['newToken']}"}
+    assert client.get('/api/user-details', headers=new_token).get_json()['username'] == 'jan.kowalski@example.com'
+    assert len(loads) == 2
+
+
+def test_update_employee_invalidates_identity(client, employee, loads):
+    _details(client, employee)
+
+    response = client.put(f'/api/employees/{employee.id}',
+                          json=dict(EMPLOYEE, first_name='Janusz', email='janusz@example.com'))
+    assert response.status_code == 200
+
+    details = _details(client, employee).get_json()
+    assert (details['username'], details['first_name']) == ('janusz@example.com', 'Janusz')
+    assert len(loads) == 2
+
+
+def test_delete_employee_invalidates_identity(client, employee, loads):
+    assert _details(client, employee).status_code == 200
+
+    assert client.delete(f'/api/employees/{employee.id}').status_code == 200
+
+    response = _details(client, employee)
+    assert response.status_code == 404
+    assert response.get_json() == {'error': 'Użytkownik nie znaleziony'}
+    assert len(loads) == 2
+
+
+def test_failed_update_keeps_cached_identity(client, employee, loads):
+    _details(client, employee)
+
+    response = client.put('/api/update-username', json={'newUsername': ''}, headers=employee.headers)
+    assert response.status_code == 400
+
+    assert _details(client, employee).get_json()['username'] == 'jan@example.com'
+    assert len(loads) == 1
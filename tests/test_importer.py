@@ -0,0 +1,206 @@
+# Masowy import katalogu (app/importer.py): partie, błędy rekordów, ponowienie zapisu po jednym rekordzie,
+# deduplikacja autorów i kategorie
+import io
+import json
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.importer import CatalogImporter, import_catalog
+from app.models import Author, Book, Category, Copy, book_author
+
+HEADER = 'title,isbn,category,category_id,publication_year,publisher,quantity,authors\n'
+
+
+def _csv(*rows):
+    return HEADER + ''.join(row + '\n' for row in rows)
+
+
+def _import(app, content, fmt='csv', batch_size=None):
+    with app.app_context():
+        return import_catalog(io.BytesIO(content.encode('utf-8')), fmt, batch_size)
+
+
+def _book(app, isbn):
+    with app.app_context():
+        book = db.session.query(Book).filter(Book.isbn == isbn).one()
+        return (book.title, book.category.name, db.session.query(Copy).filter(Copy.book_id == book.id).count(),
+                sorted((author.first_name, author.last_name) for author in book.authors))
+
+
+def test_records_are_written_in_batches(app, library, monkeypatch):
+    commits = []
+    commit = CatalogImporter._commit
+
+    def counting_commit(self, books):
+        commits.append([line_no for line_no, _ in books])
+        return commit(self, books)
+
+    monkeypatch.setattr(CatalogImporter, '_commit', counting_commit)
+    content = _csv(*(f'Tom {number},IMP-{number},Kategoria 1,,2001,Znak,{number},' for number in range(1, 6)))
+
+    summary = _import(app, content, batch_size=2)
+
+    assert summary == {'imported': 5, 'failed': 0, 'errors': []}
+    assert commits == [[2, 3], [4, 5], [6]]
+    assert [_book(app, f'IMP-{number}')[2] for number in range(1, 6)] == [1, 2, 3, 4, 5]
+
+    # Endpoint używa IMPORT_BATCH_SIZE z konfiguracji
+    app.config['IMPORT_BATCH_SIZE'] = 3
+    commits.clear()
+    response = app.test_client().post('/api/books/import', content_type='text/csv',
+                                      data=_csv(*(f'Tom {number},API-{number},Kategoria 1,,2001,Znak,,'
+                                                  for number in range(4))))
+    assert response.get_json()['imported'] == 4
+    assert commits == [[2, 3, 4], [5]]
+
+
+def test_invalid_records_are_reported_without_stopping_import(app, library):
+    content = _csv(
+        'Pan Tadeusz,IMP-1,Epika,,1834,Ossolineum,2,Adam Mickiewicz',
+        ',IMP-2,Epika,,1834,Ossolineum,,',
+        'Lalka,IMP-3,Epika,,rok,Ossolineum,,',
+        'Lalka,IMP-4,Epika,,1890,Ossolineum,0,',
+        'Lalka,IMP-5,,,1890,Ossolineum,,',
+        'Dziady,IMP-1,Epika,,1823,Ossolineum,,',
+        'Ferdydurke,9780000000001,Epika,,1937,Rój,,',
+        'Solaris,IMP-6,,999999,1961,MON,,',
+        'Solaris,IMP-7,,abc,1961,MON,,',
+        'Faraon,IMP-8,Epika,,1897,Ossolineum,,Prus',
+        'Faraon,IMP-9,Epika,,1897,Ossolineum,,Bolesław Prus',
+    )
+
+    summary = _import(app, content, batch_size=4)
+
+    assert summary == {'imported': 2, 'failed': 9, 'errors': [
+        {'line': 3, 'error': 'Brakujące dane książki'},
+        {'line': 4, 'error': 'Nieprawidłowy rok wydania lub liczba egzemplarzy'},
+        {'line': 5, 'error': 'Nieprawidłowa liczba egzemplarzy'},
+        {'line': 6, 'error': 'Brakujące dane książki'},
+        {'line': 7, 'error': 'Książka z tym ISBN już istnieje'},
+        {'line': 8, 'error': 'Książka z tym ISBN już istnieje'},
+        {'line': 9, 'error': 'Nie znaleziono kategorii'},
+        {'line': 10, 'error': 'Nieprawidłowy identyfikator kategorii'},
+        {'line': 11, 'error': 'Imię i nazwisko autora są wymagane'},
+    ]}
+    assert _book(app, 'IMP-1') == ('Pan Tadeusz', 'Epika', 2, [('Adam', 'Mickiewicz')])
+    assert _book(app, 'IMP-9')[:3] == ('Faraon', 'Epika', 1)
+
+
+def test_duplicate_isbn_within_batch_is_rejected(app, library):
+    summary = _import(app, _csv('Lalka,IMP-1,Epika,,1890,Ossolineum,,', 'Faraon,IMP-1,Epika,,1897,Ossolineum,,'))
+
+    assert summary['errors'] == [{'line': 3, 'error': 'Książka z tym ISBN występuje w pliku więcej niż raz'}]
+    assert _book(app, 'IMP-1')[0] == 'Lalka'
+
+
+def test_jsonl_errors_keep_line_numbers(app, library):
+    lines = [
+        json.dumps({'title': 'Quo vadis', 'isbn': 'IMP-1', 'category': 2, 'publication_year': 1896,
+                    'publisher': 'Gebethner', 'authors': [{'firstName': 'Henryk', 'lastName': 'Sienkiewicz'}]}),
+        '',
+        '{"title": "Potop"',
+        '[1, 2]',
+        json.dumps({'title': 'Krzyżacy', 'isbn': 'IMP-2', 'category': 'Powieść historyczna',
+                    'publication_year': 1900, 'publisher': 'Gebethner', 'authors': 'Henryk Sienkiewicz'}),
+    ]
+
+    summary = _import(app, '\n'.join(lines) + '\n', fmt='jsonl')
+
+    assert summary == {'imported': 2, 'failed': 2, 'errors': [
+        {'line': 3, 'error': 'Nieprawidłowy format JSON'},
+        {'line': 4, 'error': 'Nieprawidłowy format JSON'},
+    ]}
+    assert _book(app, 'IMP-1') == ('Quo vadis', 'Kategoria 2', 1, [('Henryk', 'Sienkiewicz')])
+    assert _book(app, 'IMP-2')[1] == 'Powieść historyczna'
+
+
+# Partia odrzucona przez bazę jest zapisywana ponownie po jednym rekordzie; zgłaszany jest tylko błędny wiersz
+def test_rejected_batch_is_retried_row_by_row(app, library, monkeypatch):
+    write = CatalogImporter._write
+
+    def failing_write(self, books):
+        result = write(self, books)
+        if any(book['isbn'] == 'IMP-3' for _, book in books):
+            raise IntegrityError('INSERT INTO books', {}, Exception('rekord odrzucony przez bazę'))
+        return result
+
+    monkeypatch.setattr(CatalogImporter, '_write', failing_write)
+    content = _csv(*(f'Tom {number},IMP-{number},Nowa kategoria,,2001,Znak,2,Jan Nowak' for number in range(1, 7)))
+
+    summary = _import(app, content, batch_size=4)
+
+    assert summary == {'imported': 5, 'failed': 1,
+                       'errors': [{'line': 4, 'error': 'Błąd zapisu książki w bazie danych'}]}
+    with app.app_context():
+        assert db.session.query(Book).filter(Book.isbn.like('IMP-%')).count() == 5
+        assert db.session.query(Book).filter(Book.isbn == 'IMP-3').count() == 0
+        # Wycofana partia nie zostawia kategorii, autora ani egzemplarzy z identyfikatorami z pamięci importera
+        assert db.session.query(Category).filter(Category.name == 'Nowa kategoria').count() == 1
+        assert db.session.query(Author).filter(Author.first_name == 'Jan', Author.last_name == 'Nowak').count() == 1
+        assert db.session.query(Copy).join(Book).filter(Book.isbn.like('IMP-%')).count() == 10
+    assert all(_book(app, f'IMP-{number}')[1:] == ('Nowa kategoria', 2, [('Jan', 'Nowak')])
+               for number in (1, 2, 4, 5, 6))
+
+
+def test_authors_are_deduplicated_across_records_and_batches(app, library):
+    with app.app_context():
+        existing = db.session.query(Author).order_by(Author.id).first()
+        existing_name = f'{existing.first_name} {existing.last_name}'
+        authors_before = db.session.query(Author).count()
+
+    content = _csv(
+        f'Tom 1,IMP-1,Epika,,2001,Znak,,Jan Nowak; {existing_name}',
+        'Tom 2,IMP-2,Epika,,2001,Znak,,Jan Nowak; Jan Nowak',
+        'Tom 3,IMP-3,Epika,,2001,Znak,,Anna Maria Kowalska',
+        f'Tom 4,IMP-4,Epika,,2001,Znak,,{existing_name}; Jan Nowak',
+        'Tom 5,IMP-5,Epika,,2001,Znak,,Anna Maria Kowalska',
+    )
+
+    summary = _import(app, content, batch_size=2)
+
+    assert summary['imported'] == 5
+    with app.app_context():
+        assert db.session.query(Author).count() == authors_before + 2
+        assert db.session.query(Author).filter(Author.first_name == 'Anna Maria',
+                                               Author.last_name == 'Kowalska').count() == 1
+        links = db.session.query(book_author).join(Book, Book.id == book_author.c.book_id) \
+            .filter(Book.isbn.like('IMP-%')).count()
+        assert links == 7
+    assert _book(app, 'IMP-2')[3] == [('Jan', 'Nowak')]
+    assert _book(app, 'IMP-4')[3] == sorted([(existing.first_name, existing.last_name), ('Jan', 'Nowak')])
+
+
+# Kategoria złożona z cyfr jest nazwą; identyfikator kategorii podaje się w kolumnie category_id
+def test_numeric_category_is_a_name(app, library):
+    with app.app_context():
+        db.session.add(Category(name='1984'))
+        db.session.commit()
+
+    summary = _import(app, _csv(
+        'Rok 1984,IMP-1,1984,,1949,Secker,,',
+        'Folwark zwierzęcy,IMP-2,1,,1945,Secker,,',
+        'Proces,IMP-3,,2,1925,Die Schmiede,,',
+        'Zamek,IMP-4,1984,3,1926,Kurt Wolff,,',
+    ))
+
+    assert summary == {'imported': 4, 'failed': 0, 'errors': []}
+    assert _book(app, 'IMP-1')[1] == '1984'
+    assert _book(app, 'IMP-2')[1] == '1'
+    assert _book(app, 'IMP-3')[1] == 'Kategoria 2'
+    assert _book(app, 'IMP-4')[1] == 'Kategoria 3'
+    with app.app_context():
+        assert db.session.query(Category).filter(Category.name.in_(['1984', '1'])).count() == 2
+
+
+@pytest.mark.parametrize('category', ['Kategoria 1', ' Kategoria 1 '])
+def test_existing_category_is_matched_by_name(app, library, category):
+    with app.app_context():
+        categories_before = db.session.query(Category).count()
+
+    assert _import(app, _csv(f'Tom,IMP-1,{category},,2001,Znak,,'))['imported'] == 1
+
+    assert _book(app, 'IMP-1')[1] == 'Kategoria 1'
+    with app.app_context():
+        assert db.session.query(Category).count() == categories_before
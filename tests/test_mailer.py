@@ -0,0 +1,219 @@
+# Kolejka e-mail (app/mailer.py): zapis do kolejki w żądaniu, wysyłka przez lokalny serwer SMTP (aiosmtpd),
+# ponawianie z rosnącym opóźnieniem, odrzucenia stałe i rezerwowanie partii przez kilka procesów
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app import db
+from app.mailer import MailWorker, enqueue_email
+from app.models import OutgoingEmail, User
+from app.reminders import SUBJECTS
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.rejected = set()
+        self.temporary_failures = 0
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.rejected:
+            return '550 5.1.1 Nie ma takiej skrzynki'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.temporary_failures:
+            self.temporary_failures -= 1
+            return '451 4.3.0 Spróbuj później'
+        self.messages.append((envelope.rcpt_tos[0], envelope.content.decode()))
+        return '250 OK'
+
+
+@pytest.fixture
+def smtp():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+@pytest.fixture
+def mail_app(app, smtp):
+    app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp.port, MAIL_USE_SSL=False, MAIL_USE_TLS=False,
+                      MAIL_USERNAME='biblioteka@example.com', MAIL_PASSWORD=None, MAIL_RETRY_BACKOFF=30,
+                      MAIL_MAX_ATTEMPTS=3)
+    return app
+
+
+def enqueue(app, count, recipient='czytelnik{}@example.com'):
+    with app.app_context():
+        emails = [enqueue_email(recipient.format(i), f'Temat {i}', f'Treść {i}') for i in range(count)]
+        db.session.commit()
+        return [email.id for email in emails]
+
+
+def run_worker(app, **kwargs):
+    with app.app_context():
+        return MailWorker(**kwargs).run(once=True)
+
+
+def outbox(app, email_id):
+    with app.app_context():
+        return db.session.get(OutgoingEmail, email_id)
+
+
+# Zaległa wiadomość staje się ponownie gotowa do wysyłki
+def make_due(app, email_id):
+    with app.app_context():
+        db.session.get(OutgoingEmail, email_id).next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+
+def test_reset_password_only_enqueues(app, client):
+    with app.app_context():
+        user = User(username='jan@example.com')
+        user.set_password('haslo123')
+        db.session.add(user)
+        db.session.commit()
+
+    # Serwer SMTP nie jest skonfigurowany - żądanie nie może się z nim łączyć
+    response = client.post('/reset-password', json={'email': 'jan@example.com'})
+
+    assert response.status_code == 200
+    with app.app_context():
+        email = OutgoingEmail.query.one()
+        assert (email.recipient, email.status, email.attempts) == ('jan@example.com', 'pending', 0)
+        assert 'http://localhost:3000/reset/' in email.body
+
+
+def test_worker_delivers_queued_messages(mail_app, smtp):
+    ids = enqueue(mail_app, 10)
+
+    assert run_worker(mail_app, threads=3, batch_size=4) == (10, 0)
+
+    assert sorted(recipient for recipient, _ in smtp.handler.messages) == \
+        sorted(f'czytelnik{i}@example.com' for i in range(10))
+    assert all('From: biblioteka@example.com' in content for _, content in smtp.handler.messages)
+    for email_id in ids:
+        email = outbox(mail_app, email_id)
+        assert (email.status, email.attempts, email.claimed_at) == ('sent', 1, None)
+        assert email.sent_at is not None
+
+
+def test_unreachable_server_is_retried_with_backoff(mail_app):
+    mail_app.config['MAIL_PORT'] = free_port()
+    [email_id] = enqueue(mail_app, 1)
+
+    delays = []
+    for attempt in (1, 2):
+        started = datetime.utcnow()
+        assert run_worker(mail_app, threads=1) == (0, 1)
+        email = outbox(mail_app, email_id)
+        assert (email.status, email.attempts, email.claimed_at) == ('pending', attempt, None)
+        assert email.last_error
+        delays.append((email.next_attempt_at - started).total_seconds())
+
+        # Wiadomość nie jest ponawiana przed upływem opóźnienia
+        assert run_worker(mail_app, threads=1) == (0, 0)
+        make_due(mail_app, email_id)
+
+    # Opóźnienie 30 s, następnie 60 s, z losowym odchyleniem do 20%
+    assert 24 <= delays[0] <= 36.5
+    assert 48 <= delays[1] <= 72.5
+
+    # Po MAIL_MAX_ATTEMPTS próbach wiadomość nie jest już ponawiana
+    assert run_worker(mail_app, threads=1) == (0, 1)
+    assert outbox(mail_app, email_id).status == 'failed'
+
+
+def test_temporary_rejection_is_delivered_on_retry(mail_app, smtp):
+    smtp.handler.temporary_failures = 1
+    [email_id] = enqueue(mail_app, 1)
+
+    assert run_worker(mail_app, threads=1) == (0, 1)
+    assert outbox(mail_app, email_id).status == 'pending'
+
+    make_due(mail_app, email_id)
+    assert run_worker(mail_app, threads=1) == (1, 0)
+    email = outbox(mail_app, email_id)
+    assert (email.status, email.attempts) == ('sent', 2)
+    assert len(smtp.handler.messages) == 1
+
+
+def test_permanent_rejection_fails_without_retry(mail_app, smtp):
+    smtp.handler.rejected.add('czytelnik1@example.com')
+    ids = enqueue(mail_app, 3)
+
+    assert run_worker(mail_app, threads=1) == (2, 1)
+
+    statuses = [(outbox(mail_app, email_id).status, outbox(mail_app, email_id).attempts) for email_id in ids]
+    assert statuses == [('sent', 1), ('failed', 1), ('sent', 1)]
+
+
+def test_claimed_messages_are_skipped_until_claim_expires(mail_app):
+    mail_app.config['MAIL_CLAIM_TIMEOUT'] = 300
+    ids = enqueue(mail_app, 5)
+
+    with mail_app.app_context():
+        first = [email['id'] for email in MailWorker(threads=1, batch_size=3).claim_batch()]
+        second = [email['id'] for email in MailWorker(threads=1, batch_size=3).claim_batch()]
+        assert sorted(first + second) == ids
+        assert MailWorker(threads=1).claim_batch() == []
+
+        # Wiadomości procesu, który przestał działać, wracają do kolejki po MAIL_CLAIM_TIMEOUT
+        db.session.execute(db.update(OutgoingEmail).where(OutgoingEmail.id.in_(first))
+                           .values(claimed_at=datetime.utcnow() - timedelta(seconds=301)))
+        db.session.commit()
+        assert sorted(email['id'] for email in MailWorker(threads=1).claim_batch()) == first
+
+
+def test_claim_skips_rows_locked_by_another_worker(mail_app):
+    with mail_app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            pytest.skip('SKIP LOCKED wymaga PostgreSQL')
+    ids = enqueue(mail_app, 4)
+
+    with mail_app.app_context():
+        with db.engine.connect() as other:
+            # Inny proces trzyma blokadę na dwóch pierwszych wiadomościach
+            other.execute(db.select(OutgoingEmail.id).where(OutgoingEmail.id.in_(ids[:2])).with_for_update())
+            claimed = [email['id'] for email in MailWorker(threads=1).claim_batch()]
+            other.rollback()
+
+    assert claimed == ids[2:]
+
+
+def test_mail_worker_requires_smtp_settings(app):
+    app.config.update(MAIL_SERVER=None, MAIL_PORT=None)
+
+    result = app.test_cli_runner().invoke(args=['mail-worker', '--once'])
+
+    assert result.exit_code == 1
+    assert 'MAIL_SERVER, MAIL_PORT' in result.output
+
+
+# flask send-reminders --send wysyła tylko przypomnienia; pozostałe wiadomości czekają na flask mail-worker
+def test_send_reminders_sends_only_reminder_mail(mail_app, smtp):
+    other_ids = enqueue(mail_app, 2)
+    with mail_app.app_context():
+        reminder = enqueue_email('anna@example.com', SUBJECTS['overdue'], 'Minął termin zwrotu')
+        db.session.commit()
+        reminder_id = reminder.id
+
+    result = mail_app.test_cli_runner().invoke(args=['send-reminders', '--send'])
+
+    assert result.exit_code == 0
+    assert 'Wysłano: 1, nieudane próby: 0' in result.output
+    assert [recipient for recipient, _ in smtp.handler.messages] == ['anna@example.com']
+    assert outbox(mail_app, reminder_id).status == 'sent'
+    assert [outbox(mail_app, email_id).status for email_id in other_ids] == ['pending', 'pending']
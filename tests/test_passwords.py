@@ -0,0 +1,113 @@
+# Haszowanie haseł w ograniczonej puli (app/passwords.py): logowanie, aktualizacja skrótu i zachowanie
+# po przepełnieniu puli - odpowiedź 503 zamiast oczekiwania bez końca
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import db, passwords
+from app.models import User
+from app.passwords import password_hasher
+
+
+@pytest.fixture
+def user(app):
+    with app.app_context():
+        user = User(username='jan@example.com')
+        user.set_password('haslo123')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def configure_hasher(app, **settings):
+    app.config.update(settings)
+    password_hasher.configure(app.config)
+
+
+def login(client, password='haslo123'):
+    return client.post('/users/login', json={'username': 'jan@example.com', 'password': password})
+
+
+def test_login_verifies_password(client, user):
+    response = login(client)
+    assert response.status_code == 200
+    assert response.get_json()['access_token']
+
+    assert login(client, 'zle-haslo').status_code == 401
+    assert client.post('/users/login', json={'username': 'nikt@example.com', 'password': 'x'}).status_code == 404
+
+
+def test_login_rehashes_password_stored_with_old_method(app, client, user):
+    with app.app_context():
+        db.session.get(User, user).password = generate_password_hash('haslo123', 'pbkdf2:sha256:500')
+        db.session.commit()
+
+    assert login(client).status_code == 200
+
+    with app.app_context():
+        assert db.session.get(User, user).password.startswith(password_hasher.method + '$')
+    assert login(client).status_code == 200
+    assert login(client, 'zle-haslo').status_code == 401
+
+
+def test_concurrent_logins_run_at_most_workers_hashes(app, client, user, monkeypatch):
+    configure_hasher(app, PASSWORD_HASH_WORKERS=2, PASSWORD_HASH_QUEUE_SIZE=32)
+    lock = threading.Lock()
+    running = peak = 0
+    verify = passwords.check_password_hash
+
+    def counting_verify(pwhash, password):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        try:
+            return verify(pwhash, password)
+        finally:
+            with lock:
+                running -= 1
+
+    monkeypatch.setattr(passwords, 'check_password_hash', counting_verify)
+    attempts = ['haslo123', 'zle-haslo'] * 6
+    with ThreadPoolExecutor(max_workers=len(attempts)) as pool:
+        statuses = list(pool.map(lambda password: login(app.test_client(), password).status_code, attempts))
+
+    assert statuses == [200, 401] * 6
+    assert peak == 2
+
+
+def test_saturated_hasher_rejects_with_503_instead_of_hanging(app, user, monkeypatch):
+    configure_hasher(app, PASSWORD_HASH_WORKERS=2, PASSWORD_HASH_QUEUE_SIZE=0, PASSWORD_HASH_QUEUE_TIMEOUT=0.2)
+    started = threading.Semaphore(0)
+    release = threading.Event()
+    verify = passwords.check_password_hash
+
+    def blocking_verify(pwhash, password):
+        started.release()
+        release.wait(10)
+        return verify(pwhash, password)
+
+    monkeypatch.setattr(passwords, 'check_password_hash', blocking_verify)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        # Dwa logowania zajmują obie pozycje puli
+        pending = [pool.submit(login, app.test_client(), password) for password in ('haslo123', 'zle-haslo')]
+        for _ in pending:
+            assert started.acquire(timeout=5)
+
+        start = time.perf_counter()
+        response = login(app.test_client())
+        elapsed = time.perf_counter() - start
+
+        release.set()
+        assert [future.result().status_code for future in pending] == [200, 401]
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert elapsed < 2
+
+    # Po zwolnieniu puli logowanie znowu działa
+    assert login(app.test_client()).status_code == 200
@@ -0,0 +1,38 @@
+# Endpointy list wykonują stałą liczbę zapytań niezależnie od liczby rekordów;
+# ładowanie relacji osobno dla każdego wiersza (N+1) przekracza limit
+import pytest
+
+from app import serializers
+from app.profiler import QueryBudgetExceeded, query_budget
+
+
+@pytest.mark.parametrize('path, budget', [
+    # wersje tabel (ETag), strona książek, autorzy strony
+    ('/api/books', 3),
+    ('/api/readers', 1),
+    # wypożyczenia, autorzy wypożyczonych książek
+    ('/api/loans', 2),
+    ('/api/loan-history', 1),
+])
+def test_list_endpoint_query_budget(client, library, path, budget):
+    with query_budget(budget, max_repeated=1):
+        response = client.get(path)
+
+    assert response.status_code == 200
+    assert len(response.get_json()) >= 10
+
+
+# Pobieranie autorów osobno dla każdej książki (regresja N+1) przekracza limit
+def test_query_budget_catches_per_row_loading(client, library, monkeypatch):
+    batched = serializers.authors_by_book
+
+    def per_book(book_ids):
+        authors = {}
+        for book_id in book_ids:
+            authors.update(batched([book_id]))
+        return authors
+
+    monkeypatch.setattr(serializers, 'authors_by_book', per_book)
+    with pytest.raises(QueryBudgetExceeded):
+        with query_budget(2, max_repeated=1):
+            client.get('/api/loans')
@@ -0,0 +1,91 @@
+# Przypomnienia o terminie zwrotu (app/reminders.py): jedno powiadomienie i jedna wiadomość na wypożyczenie,
+# rodzaj przypomnienia i termin zwrotu, także po ponownym uruchomieniu zadania
+from datetime import date, timedelta
+
+import pytest
+
+from app import db
+from app.models import Book, Borrower, Category, Copy, Loan, Notification, OutgoingEmail
+from app.reminders import SUBJECTS, send_reminders
+
+
+def _borrower(number, email):
+    return Borrower(first_name='Anna', last_name=f'Nowak {number}', email=email, pesel=f'9001011234{number}',
+                    address='ul. Polna 1', postal_code='00-001', city='Warszawa')
+
+
+# Wypożyczenia z terminem zwrotu za dzień, za dziesięć dni i przed dwoma dniami
+# oraz przetrzymane wypożyczenie czytelnika bez adresu e-mail
+@pytest.fixture
+def loans(app, client):
+    with app.app_context():
+        category = Category(name='Powieść')
+        db.session.add(category)
+        db.session.flush()
+        book = Book(title='Lalka', category_id=category.id)
+        borrowers = [_borrower(1, 'anna@example.com'), _borrower(2, None)]
+        db.session.add_all([book] + borrowers)
+        db.session.flush()
+        db.session.add_all([Copy(book_id=book.id, barcode=f'LALKA-{number}', status='Dostępny')
+                            for number in range(4)])
+        db.session.commit()
+        book_id, borrower_ids = book.id, [borrower.id for borrower in borrowers]
+
+    today = date.today()
+    loan_ids = {}
+    for name, borrower_id, days in (('due_soon', borrower_ids[0], 1), ('later', borrower_ids[0], 10),
+                                    ('overdue', borrower_ids[0], -2), ('no_email', borrower_ids[1], -2)):
+        response = client.post('/api/loans', json={
+            'book_ids': [book_id], 'borrower_id': borrower_id, 'loan_date': str(today - timedelta(days=20)),
+            'return_date': str(today + timedelta(days=days))})
+        assert response.status_code == 201
+        [loan_ids[name]] = response.get_json()['loan_ids']
+    return loan_ids
+
+
+def _run(app, **kwargs):
+    with app.app_context():
+        return send_reminders(**kwargs)
+
+
+def _queued(app):
+    with app.app_context():
+        notifications = sorted((notification.loan_id, notification.type, notification.recipient)
+                               for notification in Notification.query.all())
+        emails = sorted((email.recipient, email.subject, email.status) for email in OutgoingEmail.query.all())
+        return notifications, emails
+
+
+@pytest.mark.parametrize('batch_size', [None, 1])
+def test_rerun_does_not_duplicate_reminders(app, loans, batch_size):
+    assert _run(app, days_before=3, batch_size=batch_size) == 2
+    queued = _queued(app)
+    assert queued == (
+        sorted([(loans['due_soon'], 'due_soon', 'anna@example.com'),
+                (loans['overdue'], 'overdue', 'anna@example.com')]),
+        sorted([('anna@example.com', SUBJECTS['due_soon'], 'pending'),
+                ('anna@example.com', SUBJECTS['overdue'], 'pending')]),
+    )
+
+    assert _run(app, days_before=3, batch_size=batch_size) == 0
+    assert _queued(app) == queued
+
+
+def test_new_due_date_gets_new_reminder(app, loans):
+    assert _run(app, days_before=3) == 2
+
+    # Przedłużone wypożyczenie z nowym terminem w oknie przypomnień otrzymuje nowe przypomnienie
+    with app.app_context():
+        loan = db.session.get(Loan, loans['due_soon'])
+        loan.return_date += timedelta(days=1)
+        db.session.commit()
+
+    assert _run(app, days_before=3) == 1
+    assert _run(app, days_before=3) == 0
+    notifications, emails = _queued(app)
+    assert [notification[:2] for notification in notifications].count((loans['due_soon'], 'due_soon')) == 2
+    assert len(emails) == 3
+
+    # Wypożyczenie z terminem za dziesięć dni trafia do przypomnień po wydłużeniu okna
+    assert _run(app, days_before=10) == 1
+    assert _run(app, days_before=10) == 0
@@ -0,0 +1,49 @@
+# Kolejka rezerwacji książki stronicowana jest w kolejności kolejki (data rezerwacji, ID)
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import Reservation
+
+
+@pytest.fixture
+def queue(app, library):
+    start = datetime(2026, 1, 10, 12, 0, 0, 250000)
+    # Daty celowo niezgodne z kolejnością ID; dwie rezerwacje mają tę samą datę
+    offsets = [5, 1, 3, 1, 0, 4, 2, 6, 3]
+    with app.app_context():
+        reservations = [Reservation(book_id=1, borrower_id=index % 10 + 1, status='Oczekująca',
+                                    reservation_date=start + timedelta(hours=offset))
+                        for index, offset in enumerate(offsets)]
+        db.session.add_all(reservations)
+        # Rezerwacje innej książki i zrealizowane nie należą do kolejki
+        db.session.add(Reservation(book_id=2, borrower_id=1, status='Oczekująca', reservation_date=start))
+        db.session.add(Reservation(book_id=1, borrower_id=2, status='Zrealizowana', reservation_date=start))
+        db.session.commit()
+        ordered = sorted(reservations, key=lambda reservation: (reservation.reservation_date, reservation.id))
+        return [reservation.id for reservation in ordered]
+
+
+@pytest.mark.parametrize('limit', [1, 2, 4, 100])
+def test_reservation_pages_follow_queue_order(client, queue, limit):
+    seen, cursor = [], None
+    while True:
+        response = client.get('/api/books/1/reservations', query_string={'limit': limit, 'after': cursor or ''})
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page) <= limit
+        seen += [reservation['id'] for reservation in page]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+
+    assert seen == queue
+
+
+def test_reservation_cursor_from_another_list_is_rejected(client, queue):
+    books_cursor = client.get('/api/books?limit=1').headers['X-Next-Cursor']
+
+    response = client.get('/api/books/1/reservations', query_string={'after': books_cursor})
+
+    assert response.status_code == 400
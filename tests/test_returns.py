@@ -0,0 +1,123 @@
+# Zbiorczy zwrot wypożyczeń (POST /api/loans/return)
+import pytest
+
+from app import circulation, db
+from app.models import Book, Copy, Loan, LoanHistory
+
+ALREADY_RETURNED = 'Wypożyczenie zostało już zwrócone'
+
+
+@pytest.fixture
+def book(app, library):
+    with app.app_context():
+        book = Book(title='Chłopi', category_id=1)
+        db.session.add(book)
+        db.session.flush()
+        db.session.add_all([Copy(book_id=book.id, barcode=f'CHLOPI-{number}', status='Dostępny')
+                            for number in range(3)])
+        db.session.commit()
+        return book.id
+
+
+@pytest.fixture
+def loans(client, book):
+    loan_ids = []
+    for day in ('01', '02', '03'):
+        response = client.post('/api/loans', json={'book_ids': [book], 'borrower_id': 1,
+                                                   'loan_date': f'2026-10-{day}', 'return_date': '2026-10-20'})
+        assert response.status_code == 201
+        loan_ids += response.get_json()['loan_ids']
+    return loan_ids
+
+
+def _return(client, payload):
+    response = client.post('/api/loans/return', json=payload)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def _state(app, loan_id):
+    with app.app_context():
+        loan = db.session.get(Loan, loan_id)
+        copy = db.session.get(Copy, loan.copy_id)
+        history = db.session.query(LoanHistory).filter(LoanHistory.loan_id == loan_id).one()
+        return loan.status, copy.status, history.status, history.return_date, copy.barcode
+
+
+@pytest.mark.parametrize('body', ['null', '[1, 2]', '"1"', '{}', '{"loan_ids": []}', '{"loan_ids": ["1"]}',
+                                  '{"barcodes": [1]}', '{"loan_ids": [1], "book_ids": [1]}', 'nie json'])
+def test_invalid_body_is_rejected(client, body):
+    response = client.post('/api/loans/return', data=body, content_type='application/json')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Wymagana jest niepusta lista loan_ids, book_ids albo barcodes'}
+
+
+def test_loan_ids_report_each_item(app, client, loans):
+    first, second, third = loans
+    assert client.post(f'/api/loans/return/{third}').status_code == 200
+
+    summary = _return(client, {'loan_ids': [first, 999999, first, third, second]})
+
+    assert summary == {'returned': 2, 'failed': 3, 'results': [
+        {'loan_id': first, 'returned': True},
+        {'loan_id': 999999, 'returned': False, 'error': 'Nie znaleziono wypożyczenia'},
+        {'loan_id': first, 'returned': False, 'error': ALREADY_RETURNED},
+        {'loan_id': third, 'returned': False, 'error': ALREADY_RETURNED},
+        {'loan_id': second, 'returned': True},
+    ]}
+    assert all(_state(app, loan_id)[:3] == ('Zwrócone', 'Dostępny', 'Zwrócone') for loan_id in loans)
+
+
+def test_book_ids_close_oldest_loans_first(app, client, book, loans):
+    summary = _return(client, {'book_ids': [book, book, 999999]})
+
+    assert summary['returned'] == 2
+    assert summary['results'] == [
+        {'book_id': book, 'loan_id': loans[0], 'returned': True},
+        {'book_id': book, 'loan_id': loans[1], 'returned': True},
+        {'book_id': 999999, 'returned': False, 'error': 'Brak aktywnego wypożyczenia książki'},
+    ]
+    assert _state(app, loans[2])[:2] == ('Wypożyczona', 'Wypożyczony')
+
+    summary = _return(client, {'book_ids': [book, book]})
+    assert [result['returned'] for result in summary['results']] == [True, False]
+
+
+def test_barcodes_report_each_item(app, client, loans):
+    barcode = _state(app, loans[1])[4]
+    assert client.post(f'/api/loans/return/{loans[0]}').status_code == 200
+    available = _state(app, loans[0])[4]
+
+    summary = _return(client, {'barcodes': [barcode, 'BRAK-1', available, barcode]})
+
+    assert summary == {'returned': 1, 'failed': 3, 'results': [
+        {'barcode': barcode, 'loan_id': loans[1], 'returned': True},
+        {'barcode': 'BRAK-1', 'returned': False, 'error': 'Nie znaleziono egzemplarza'},
+        {'barcode': available, 'returned': False, 'error': 'Brak aktywnego wypożyczenia egzemplarza'},
+        {'barcode': barcode, 'loan_id': loans[1], 'returned': False, 'error': ALREADY_RETURNED},
+    ]}
+
+
+# Status egzemplarza i data zwrotu w historii zmieniają się w tej samej transakcji co status wypożyczenia
+def test_history_and_copy_change_in_one_transaction(app, client, loans, monkeypatch):
+    before = _state(app, loans[0])
+    assert before[:3] == ('Wypożyczona', 'Wypożyczony', 'Wypożyczona')
+
+    record_returns = circulation.record_returns
+
+    def failing_record_returns(loan_ids, returned_at):
+        record_returns(loan_ids, returned_at)
+        raise RuntimeError('awaria po aktualizacji historii')
+
+    monkeypatch.setattr(circulation, 'record_returns', failing_record_returns)
+    with pytest.raises(RuntimeError):
+        client.post('/api/loans/return', json={'loan_ids': [loans[0]]})
+    assert _state(app, loans[0]) == before
+
+    monkeypatch.undo()
+    _return(client, {'loan_ids': [loans[0]]})
+    loan_status, copy_status, history_status, returned_at, _ = _state(app, loans[0])
+    assert (loan_status, copy_status, history_status) == ('Zwrócone', 'Dostępny', 'Zwrócone')
+    with app.app_context():
+        assert returned_at == db.session.get(Loan, loans[0]).updated_at
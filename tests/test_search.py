@@ -0,0 +1,56 @@
+# Wyszukiwanie w katalogu ignoruje wielkość liter i polskie znaki diakrytyczne w zapytaniu i w danych
+import pytest
+
+from app import db
+
+
+def add_book(client, category_id, title, isbn, publisher, author):
+    first_name, last_name = author.split(' ')
+    response = client.post('/api/books', json={
+        'title': title, 'isbn': isbn, 'category': category_id, 'publication_year': 1993, 'publisher': publisher,
+        'authors': [{'firstName': first_name, 'lastName': last_name}]
+    })
+    assert response.status_code == 201
+    return response.get_json()['book_id']
+
+
+@pytest.fixture
+def catalog(app, client):
+    with app.app_context():
+        if db.engine.dialect.name == 'postgresql':
+            pytest.skip('wyszukiwanie w PostgreSQL wymaga obiektów z migracji be0e86d8d8b9, '
+                        'których db.create_all() nie tworzy')
+    category_id = client.post('/api/categories', json={'name': 'Fantastyka'}).get_json()['category_id']
+    return {
+        'wiedzmin': add_book(client, category_id, 'Wiedźmin', '9788375780635', 'SuperNOWA', 'Andrzej Sapkowski'),
+        'lalka': add_book(client, category_id, 'Lalka', '9788373271890', 'Świat Książki', 'Bolesław Prus'),
+        'solaris': add_book(client, category_id, 'Solaris', '9788308049372', 'Wydawnictwo Literackie',
+                            'Stanisław Lem'),
+    }
+
+
+def search(client, q):
+    response = client.get('/api/books/search', query_string={'q': q})
+    assert response.status_code == 200
+    return [book['id'] for book in response.get_json()]
+
+
+@pytest.mark.parametrize('q, expected', [
+    ('wiedzmin', 'wiedzmin'),
+    ('WIEDŹMIN', 'wiedzmin'),
+    ('Wiedźmin', 'wiedzmin'),
+    ('boleslaw prus', 'lalka'),
+    ('Stanislaw', 'solaris'),
+    ('swiat ksiazki', 'lalka'),
+    ('ŁALKA', 'lalka'),
+])
+def test_search_ignores_case_and_diacritics(client, catalog, q, expected):
+    assert search(client, q) == [catalog[expected]]
+
+
+def test_search_by_isbn_fragment(client, catalog):
+    assert search(client, '837327') == [catalog['lalka']]
+
+
+def test_search_escapes_like_wildcards(client, catalog):
+    assert search(client, '%') == []
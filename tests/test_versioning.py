@@ -0,0 +1,102 @@
+# Warunkowe odpowiedzi list katalogu (app/versioning.py): 304 dla aktualnego ETagu i nowy ETag po każdym zapisie
+from types import SimpleNamespace
+
+import pytest
+
+from app import serializers, versioning
+
+BOOK = {'title': 'Lalka', 'isbn': '978-83-240-0001-1', 'category': 1, 'publication_year': 1890,
+        'publisher': 'Ossolineum', 'quantity': 1, 'authors': [{'firstName': 'Bolesław', 'lastName': 'Prus'}]}
+
+
+# Stała wersja dostępności egzemplarzy - ETag listy książek zmienia się wyłącznie po zapisach
+@pytest.fixture(autouse=True)
+def frozen_availability(monkeypatch):
+    monkeypatch.setattr(versioning, 'time', SimpleNamespace(time=lambda: 1_000_000.0))
+
+
+def _add_book(client, **fields):
+    response = client.post('/api/books', json=dict(BOOK, **fields))
+    assert response.status_code == 201
+    return response.get_json()['book_id']
+
+
+def _add_category(client, name):
+    response = client.post('/api/categories', json={'name': name})
+    assert response.status_code == 201
+    return response.get_json()['category_id']
+
+
+@pytest.mark.parametrize('path', ['/api/categories', '/api/books', '/api/books?limit=5'])
+def test_matching_etag_returns_304_without_running_view(client, library, monkeypatch, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    # Odpowiedź 304 nie wykonuje zapytań endpointu
+    def unexpected(*args, **kwargs):
+        raise AssertionError('endpoint wykonany mimo aktualnego ETagu')
+
+    monkeypatch.setattr(serializers, 'categories_query', unexpected)
+    monkeypatch.setattr(serializers, 'books_query', unexpected)
+
+    response = client.get(path, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+    response = client.get(path, headers={'If-None-Match': f'"inny", {etag}'})
+    assert response.status_code == 304
+
+
+def test_etag_depends_on_query_string(client, library):
+    etag = client.get('/api/books?limit=5').headers['ETag']
+
+    assert client.get('/api/books?limit=6').headers['ETag'] != etag
+    response = client.get('/api/books?limit=6', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(response.get_json()) == 6
+
+
+# Zapis zmienia ETag list, które od niego zależą; pozostałe listy zachowują swój ETag
+@pytest.mark.parametrize('write, changed', [
+    ('add_category', {'/api/categories', '/api/books'}),
+    ('delete_category', {'/api/categories', '/api/books'}),
+    ('add_book', {'/api/books'}),
+    ('update_book', {'/api/books'}),
+    ('delete_book', {'/api/books'}),
+])
+def test_writes_change_etags(client, library, write, changed):
+    book_id = _add_book(client)
+    category_id = _add_category(client, 'Do usunięcia')
+    paths = ['/api/categories', '/api/books']
+    etags = {path: client.get(path).headers['ETag'] for path in paths}
+
+    if write == 'add_category':
+        _add_category(client, 'Reportaż')
+    elif write == 'delete_category':
+        assert client.delete(f'/api/categories/{category_id}').status_code == 200
+    elif write == 'add_book':
+        _add_book(client, isbn='978-83-240-0002-8')
+    elif write == 'update_book':
+        assert client.put(f'/api/books/{book_id}', json=dict(BOOK, title='Lalka. Tom 1')).status_code == 200
+    else:
+        assert client.delete(f'/api/books/{book_id}').status_code == 200
+
+    for path in paths:
+        response = client.get(path, headers={'If-None-Match': etags[path]})
+        if path in changed:
+            assert response.status_code == 200
+            assert response.headers['ETag'] != etags[path]
+        else:
+            assert response.status_code == 304
+
+
+def test_failed_write_keeps_etag(client, library):
+    etag = client.get('/api/categories').headers['ETag']
+
+    assert client.post('/api/categories', json={}).status_code == 400
+    assert client.delete('/api/categories/1').status_code == 400
+
+    assert client.get('/api/categories', headers={'If-None-Match': etag}).status_code == 304